@@ -0,0 +1,2 @@
+# backend/bench/__init__.py
+# Module: ODOCO Backend — Benchmarks and test clients (python -m backend.bench.<name>)
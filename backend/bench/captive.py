@@ -0,0 +1,120 @@
+# backend/bench/captive.py
+# Module: ODOCO load test — connectivity-check flood against the captive portal responder
+
+"""Against a running responder (subsystem "captive") or a local one in a child process:
+
+    python -m backend.bench.captive --target 192.168.50.1:8081 --connections 64 --duration 10
+    python -m backend.bench.captive --local --connections 64 --duration 10
+
+Each connection is keep-alive and sends connectivity-check requests back to back (the
+pattern of many phones re-probing at once). Reports requests/s, latency percentiles and
+response status counts.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from backend.services.captive_service import CHECK_URLS, CaptivePortal, _ResponderProtocol
+
+REQUESTS = [
+    f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: odoco-bench\r\n\r\n".encode()
+    for host, path in CHECK_URLS
+]
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, deadline: float, pipeline: int, latencies: list, statuses: Counter) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            batch = random.choices(REQUESTS, k=pipeline)
+            t0 = time.perf_counter()
+            writer.write(b"".join(batch))
+            for _ in batch:
+                statuses[await read_response(reader)] += 1
+            latencies.append((time.perf_counter() - t0) / pipeline)
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        statuses[type(e).__name__] += 1
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, connections: int, duration: float, pipeline: int) -> None:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(host, port, t0 + duration, pipeline, latencies, statuses)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - t0
+    total = sum(v for k, v in statuses.items() if isinstance(k, int))
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    print(f"{connections} connections x pipeline {pipeline}, {elapsed:.1f}s")
+    print(f"requests: {total}  ({total / elapsed:,.0f} req/s)")
+    print(f"latency ms: p50={pct(0.5):.2f} p90={pct(0.9):.2f} p99={pct(0.99):.2f} max={pct(1.0):.2f}")
+    print("responses:", dict(statuses))
+
+
+def serve(port: int) -> None:
+    """Responder only (no nft, no DB): every client is unauthorized and gets the redirect."""
+    async def main():
+        portal = CaptivePortal("http://192.168.50.1:8000/portal", "lo", port, 3600, listen_host="127.0.0.1")
+        server = await asyncio.get_running_loop().create_server(
+            lambda: _ResponderProtocol(portal), "127.0.0.1", port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Captive responder load test")
+    parser.add_argument("--target", default="127.0.0.1:8081", help="host:port of the responder")
+    parser.add_argument("--local", action="store_true", help="start a responder in a child process")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--pipeline", type=int, default=1, help="requests in flight per connection")
+    args = parser.parse_args()
+
+    host, _, port = args.target.rpartition(":")
+    port = int(port)
+    if args.serve:
+        serve(port)
+        return
+
+    child = None
+    if args.local:
+        host = "127.0.0.1"
+        child = subprocess.Popen([sys.executable, "-m", "backend.bench.captive", "--serve", "--target", f"{host}:{port}"],
+                                 env={**os.environ, "PYTHONUNBUFFERED": "1"})
+        time.sleep(1.0)
+    try:
+        asyncio.run(run(host, port, args.connections, args.duration, args.pipeline))
+    finally:
+        if child is not None:
+            child.terminate()
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# backend/bench/serialization.py
+# Module: ODOCO micro-benchmark — serialization CPU per request, default FastAPI path vs fast path
+
+"""Run on the device, from the repo root (uses the app's DB for the summary):
+
+    python -m backend.bench.serialization --iterations 2000 --servers 200
+
+"before" is what FastAPI does for a returned dict / response_model list: jsonable_encoder
+(plus ServerOut validation for /servers) and stdlib json. "after" is the path the endpoints
+now take. Only encoding is timed: the summary uses the snapshot sections (the live ones are
+a SQLite query per request either way) and the servers are built in memory.
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from backend.core import encoding
+from backend.db.models import Server
+from backend.routers.servers import server_row
+from backend.schemas.servers import ServerOut
+from backend.services.snapshot_service import SNAPSHOT_SECTIONS, encode_summary
+from backend.services.summary_service import build_summary
+
+
+def starlette_json(content) -> bytes:
+    # starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+class _PublishedSnapshot:
+    """Stands in for SummarySnapshot: one published version holding the probing sections."""
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def current_versioned(self):
+        return 1, self.data
+
+
+def cpu_us(fn, iterations: int) -> tuple[float, int]:
+    size = len(fn())
+    t0 = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - t0) / iterations * 1e6, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ODOCO serialization micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--servers", type=int, default=200)
+    args = parser.parse_args()
+
+    summary = build_summary(SNAPSHOT_SECTIONS)
+    snapshot = _PublishedSnapshot(summary)
+    servers = [
+        Server(id=i, name=f"server-{i}", host=f"mc{i}.example.net", port=19132 + i % 100,
+               edition="java" if i % 3 else "bedrock", is_active=i == 0, notes="" if i % 2 else "lan party")
+        for i in range(args.servers)
+    ]
+    server_list = TypeAdapter(list[ServerOut])
+
+    def servers_before():
+        validated = server_list.validate_python(servers, from_attributes=True)
+        return starlette_json(jsonable_encoder(server_list.dump_python(validated, mode="json")))
+
+    cases = [
+        ("summary", "before: jsonable_encoder + json", lambda: starlette_json(jsonable_encoder(summary))),
+        ("summary", "after: json encoder", lambda: encoding.dumps_json(summary)),
+        # Sections encoded once per snapshot version, spliced per request.
+        ("summary", "after: cached sections (json)",
+         lambda: encode_summary(snapshot, SNAPSHOT_SECTIONS, encoding.JSON)),
+        ("servers", "before: ServerOut + jsonable_encoder + json", servers_before),
+        ("servers", "after: row serializer + json encoder",
+         lambda: encoding.dumps_json([server_row(s) for s in servers])),
+    ]
+    if encoding.msgpack is not None:
+        cases += [
+            ("summary", "after: cached sections (msgpack)",
+             lambda: encode_summary(snapshot, SNAPSHOT_SECTIONS, encoding.MSGPACK)),
+            ("servers", "after: row serializer + msgpack",
+             lambda: encoding.dumps_msgpack([server_row(s) for s in servers])),
+        ]
+
+    print(f"json encoder: {'orjson' if encoding.orjson is not None else 'stdlib json'}; "
+          f"msgpack: {'yes' if encoding.msgpack is not None else 'not installed'}; "
+          f"{args.servers} servers; {args.iterations} iterations")
+    print(f"{'endpoint':<9} {'path':<46} {'us/request':>11} {'bytes':>8}")
+    for endpoint, label, fn in cases:
+        us, size = cpu_us(fn, args.iterations)
+        print(f"{endpoint:<9} {label:<46} {us:>11.1f} {size:>8}")
+
+
+if __name__ == "__main__":
+    main()
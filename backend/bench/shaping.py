@@ -0,0 +1,140 @@
+# backend/bench/shaping.py
+# Module: ODOCO benchmark — latency under load with shaping off and on
+
+"""Run on a laptop connected to the ODOCO AP (stdlib only, no backend deps needed):
+
+    python -m backend.bench.shaping --api http://192.168.50.1:8000 \\
+        --load-url http://speedtest.example.net/100MB.bin --down-kbit 45000 --up-kbit 9000
+
+--down-kbit/--up-kbit are what shaping is forced to: use ~90% of the WAN's measured rates,
+otherwise the bottleneck queue stays in the modem and shaping cannot help.
+
+For each state (off, then on) it forces shaping through PUT /shaping/override, measures
+idle latency, then latency while `--streams` parallel downloads saturate the link. Latency
+is TCP connect time to `--probe` (one round trip, no root needed for ICMP). The override is
+cleared at the end, so the mode profile applies again.
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+import urllib.request
+
+
+def set_override(api: str, enabled, down_kbit: int = 0, up_kbit: int = 0) -> None:
+    body = {"enabled": enabled, "wan_down_kbit": down_kbit, "wan_up_kbit": up_kbit}
+    req = urllib.request.Request(f"{api}/shaping/override", data=json.dumps(body).encode(),
+                                 method="PUT", headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        resp.read()
+
+
+def probe_rtt_ms(host: str, port: int, timeout: float = 2.0):
+    t0 = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return (time.perf_counter() - t0) * 1000.0
+    except OSError:
+        return None
+
+
+def sample(host: str, port: int, duration: float, interval: float) -> tuple[list[float], int]:
+    rtts, lost = [], 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        rtt = probe_rtt_ms(host, port)
+        if rtt is None:
+            lost += 1
+        else:
+            rtts.append(rtt)
+        time.sleep(interval)
+    return rtts, lost
+
+
+def download(url: str, stop: threading.Event, counter: list, lock: threading.Lock) -> None:
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(url, timeout=10) as resp:
+                while not stop.is_set():
+                    chunk = resp.read(64 * 1024)
+                    if not chunk:
+                        break
+                    with lock:
+                        counter[0] += len(chunk)
+        except OSError:
+            time.sleep(0.5)
+
+
+def pct(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def run_state(args, enabled: bool) -> dict:
+    set_override(args.api, enabled, args.down_kbit, args.up_kbit)
+    time.sleep(args.settle)
+    idle, _ = sample(args.probe_host, args.probe_port, args.idle, args.interval)
+
+    stop, lock, counter = threading.Event(), threading.Lock(), [0]
+    threads = [threading.Thread(target=download, args=(args.load_url, stop, counter, lock), daemon=True)
+               for _ in range(args.streams)]
+    for t in threads:
+        t.start()
+    time.sleep(2.0)  # let TCP ramp up and queues fill
+    with lock:
+        start_bytes = counter[0]
+    t0 = time.perf_counter()
+    loaded, lost = sample(args.probe_host, args.probe_port, args.duration, args.interval)
+    elapsed = time.perf_counter() - t0
+    with lock:
+        moved = counter[0] - start_bytes
+    stop.set()
+    for t in threads:
+        t.join(timeout=12)
+    return {
+        "shaping": "on" if enabled else "off",
+        "idle_p50": pct(idle, 0.5),
+        "load_p50": pct(loaded, 0.5),
+        "load_p95": pct(loaded, 0.95),
+        "load_p99": pct(loaded, 0.99),
+        "lost": lost,
+        "mbit_s": moved * 8 / elapsed / 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency under load, shaping off vs on")
+    parser.add_argument("--api", default="http://192.168.50.1:8000")
+    parser.add_argument("--load-url", required=True, help="large file to download in parallel")
+    parser.add_argument("--down-kbit", type=int, required=True, help="WAN download rate to shape to")
+    parser.add_argument("--up-kbit", type=int, required=True, help="WAN upload rate to shape to")
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--probe", default="1.1.1.1:443", help="host:port for TCP connect RTT")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--idle", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.2)
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds after toggling shaping")
+    args = parser.parse_args()
+    host, _, port = args.probe.rpartition(":")
+    args.probe_host, args.probe_port = host, int(port)
+    args.api = args.api.rstrip("/")
+
+    results = []
+    try:
+        for enabled in (False, True):
+            results.append(run_state(args, enabled))
+    finally:
+        set_override(args.api, None)
+
+    print(f"{'shaping':<8} {'idle p50':>9} {'load p50':>9} {'load p95':>9} {'load p99':>9} {'lost':>5} {'Mbit/s':>8}")
+    for r in results:
+        print(f"{r['shaping']:<8} {r['idle_p50']:>8.1f}ms {r['load_p50']:>7.1f}ms {r['load_p95']:>7.1f}ms "
+              f"{r['load_p99']:>7.1f}ms {r['lost']:>5} {r['mbit_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# backend/bench/speedtest.py
+# Module: ODOCO native speed test client — TCP goodput plus UDP RTT/loss against the router
+
+"""Run from any LAN machine with this repo (stdlib only, nothing to install):
+
+    python -m backend.bench.speedtest --router 192.168.50.1 --duration 20 --streams 4
+
+Opens a "native" session over the HTTP API, measures idle RTT with UDP echoes, then
+download and upload over parallel TCP streams on the speed test port while the UDP probes
+keep running (latency under load and loss), and posts the result so it shows up in
+/speedtest next to the browser and WAN runs. --mbit asks for a lower cap than the router's.
+"""
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+import urllib.request
+
+CHUNK = 64 * 1024
+UDP_HEADER = struct.Struct("!16sId")  # same layout as speedtest_service.UDP_HEADER
+PROBE_INTERVAL_S = 0.05
+PROBE_TIMEOUT_S = 1.0
+
+
+def api(base: str, method: str, path: str, body=None) -> dict:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read() or b"{}")
+
+
+def percentile(values: list[float], p: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, round(p * (len(values) - 1)))], 2)
+
+
+class UdpProber(threading.Thread):
+    """Sends a numbered probe every PROBE_INTERVAL_S and matches the echoes; a probe not
+    echoed within PROBE_TIMEOUT_S is lost."""
+
+    def __init__(self, host: str, port: int, session_id: str):
+        super().__init__(daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+        self.sock.settimeout(PROBE_INTERVAL_S)
+        self.sid = session_id.encode().ljust(16)[:16]
+        self.phase = "idle"
+        self.sent: dict[int, tuple[str, float]] = {}
+        self.rtts: dict[str, list[float]] = {}
+        self.stop = threading.Event()
+
+    def run(self) -> None:
+        seq = 0
+        while not self.stop.is_set():
+            now = time.monotonic()
+            self.sock.send(UDP_HEADER.pack(self.sid, seq, now))
+            self.sent[seq] = (self.phase, now)
+            seq += 1
+            deadline = now + PROBE_INTERVAL_S
+            while (left := deadline - time.monotonic()) > 0:
+                self.sock.settimeout(left)
+                try:
+                    data = self.sock.recv(64)
+                except (socket.timeout, ConnectionRefusedError):
+                    continue
+                if len(data) >= UDP_HEADER.size:
+                    _, n, t0 = UDP_HEADER.unpack_from(data)
+                    sent = self.sent.pop(n, None)
+                    if sent is not None and time.monotonic() - t0 <= PROBE_TIMEOUT_S:
+                        self.rtts.setdefault(sent[0], []).append((time.monotonic() - t0) * 1000)
+        self.sock.close()
+
+    def loss(self, phase: str):
+        cutoff = time.monotonic() - PROBE_TIMEOUT_S
+        lost = sum(1 for p, t in self.sent.values() if p == phase and t < cutoff)
+        total = lost + len(self.rtts.get(phase, []))
+        return round(lost / total, 4) if total else None
+
+
+def tcp_phase(host: str, port: int, session_id: str, mode: str, streams: int, seconds: float) -> float:
+    """Mbit/s moved by `streams` parallel connections in `mode` ("recv" = download)."""
+    total = [0] * streams
+    deadline = time.monotonic() + seconds
+
+    def worker(i: int) -> None:
+        payload = bytes(CHUNK)
+        try:
+            with socket.create_connection((host, port), timeout=5) as s:
+                s.sendall(f"{session_id} {mode}\n".encode())
+                f = s.makefile("rb")
+                if f.readline().strip() != b"OK":
+                    return
+                while time.monotonic() < deadline:
+                    if mode == "recv":
+                        data = s.recv(CHUNK)
+                        if not data:
+                            break
+                        total[i] += len(data)
+                    else:
+                        s.sendall(payload)
+                        total[i] += len(payload)
+        except OSError:
+            pass
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(streams)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return round(sum(total) * 8 / (time.monotonic() - t0) / 1e6, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--router", default="192.168.50.1")
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--mbit", type=float, default=None)
+    parser.add_argument("--idle", type=float, default=2.0, help="seconds of idle RTT probes")
+    args = parser.parse_args()
+
+    base = f"http://{args.router}:{args.api_port}"
+    session = api(base, "POST", "/speedtest/sessions",
+                  {"kind": "native", "duration_s": args.duration, "max_mbit": args.mbit})
+    sid, port = session["id"], session["port"]
+    phase_s = max((session["duration_s"] - args.idle) / 2 - 0.5, 1.0)
+    print(f"session {sid}: {session['duration_s']:.0f}s, cap {session['max_mbit']:.0f} Mbit/s, port {port}")
+
+    prober = UdpProber(args.router, port, sid)
+    prober.start()
+    try:
+        time.sleep(args.idle)
+        prober.phase = "loaded"
+        down = tcp_phase(args.router, port, sid, "recv", args.streams, phase_s)
+        print(f"download {down} Mbit/s")
+        # What the router actually received: the client side also counts its socket buffers.
+        before = api(base, "GET", f"/speedtest/sessions/{sid}")["bytes"]["up"]
+        t0 = time.monotonic()
+        tcp_phase(args.router, port, sid, "send", args.streams, phase_s)
+        received = api(base, "GET", f"/speedtest/sessions/{sid}")["bytes"]["up"] - before
+        up = round(received * 8 / (time.monotonic() - t0) / 1e6, 2)
+        print(f"upload   {up} Mbit/s")
+        time.sleep(PROBE_TIMEOUT_S)
+    except KeyboardInterrupt:
+        api(base, "DELETE", f"/speedtest/sessions/{sid}")
+        raise
+    finally:
+        prober.stop.set()
+        prober.join()
+
+    idle, loaded = prober.rtts.get("idle", []), prober.rtts.get("loaded", [])
+    result = {
+        "down_mbit": down, "up_mbit": up,
+        "rtt_idle_ms": percentile(idle, 0.5),
+        "rtt_loaded_ms": percentile(loaded, 0.5),
+        "rtt_loaded_p95_ms": percentile(loaded, 0.95),
+        "loss": prober.loss("loaded"),
+        "detail": {"client": "native", "streams": args.streams, "idle_loss": prober.loss("idle")},
+    }
+    print(json.dumps(result, indent=2))
+    api(base, "POST", f"/speedtest/sessions/{sid}/result", result)
+
+
+if __name__ == "__main__":
+    main()
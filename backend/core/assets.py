@@ -0,0 +1,175 @@
+# backend/core/assets.py
+# Module: ODOCO Backend — Fingerprinted, precompressed static asset pipeline
+
+import gzip
+import hashlib
+import json
+import mimetypes
+from pathlib import Path
+from typing import Optional
+
+from backend.core import config
+from backend.core.logging import get_logger
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:  # pragma: no cover - depends on the host
+    brotli = None
+
+logger = get_logger("odoco.assets")
+
+ASSET_PREFIX = "/assets"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map"}
+# Tiny files are not worth the extra variant (headers dominate).
+MIN_COMPRESS_BYTES = 512
+
+_SUFFIX_BY_ENCODING = {"br": ".br", "gzip": ".gz"}
+
+
+def _compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        # mtime=0 keeps output byte-identical across rebuilds.
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def precompress(data: bytes) -> dict[str, bytes]:
+    """Return {"identity": data, "gzip": ..., "br": ...} keeping only variants that are smaller."""
+    variants = {"identity": data}
+    if len(data) < MIN_COMPRESS_BYTES:
+        return variants
+    for encoding in ("br", "gzip"):
+        packed = _compress(data, encoding)
+        if packed is not None and len(packed) < len(data):
+            variants[encoding] = packed
+    return variants
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Pick the best precompressed variant the client accepts (br > gzip > identity)."""
+    accepted: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+class Asset:
+    __slots__ = ("logical", "fingerprinted", "media_type", "variants")
+
+    def __init__(self, logical: str, fingerprinted: str, media_type: str, variants: dict[str, Path]):
+        self.logical = logical
+        self.fingerprinted = fingerprinted
+        self.media_type = media_type
+        self.variants = variants
+
+
+class AssetPipeline:
+    def __init__(self, source_dir: Path, build_dir: Path, prefix: str = ASSET_PREFIX):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.prefix = prefix
+        self.manifest: dict[str, str] = {}
+        self._assets: dict[str, Asset] = {}
+
+    def build(self) -> dict[str, str]:
+        """Hash, copy and precompress every source file. Unchanged files are not rewritten."""
+        manifest: dict[str, str] = {}
+        assets: dict[str, Asset] = {}
+        if not self.source_dir.is_dir():
+            logger.warning("Asset source dir %s not found; serving without fingerprints", self.source_dir)
+            return manifest
+
+        for src in sorted(p for p in self.source_dir.rglob("*") if p.is_file()):
+            logical = src.relative_to(self.source_dir).as_posix()
+            data = src.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            rel = src.relative_to(self.source_dir)
+            fingerprinted = rel.with_name(f"{rel.stem}.{digest}{rel.suffix}").as_posix()
+            out = self.build_dir / fingerprinted
+
+            encoded = {"identity": data}
+            if src.suffix in COMPRESSIBLE_SUFFIXES:
+                encoded = precompress(data)
+
+            variants: dict[str, Path] = {}
+            for encoding, payload in encoded.items():
+                target = out if encoding == "identity" else out.with_name(out.name + _SUFFIX_BY_ENCODING[encoding])
+                if not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = target.with_name(target.name + ".tmp")
+                    tmp.write_bytes(payload)
+                    tmp.replace(target)
+                variants[encoding] = target
+
+            media_type = mimetypes.guess_type(src.name)[0] or "application/octet-stream"
+            manifest[logical] = fingerprinted
+            assets[fingerprinted] = Asset(logical, fingerprinted, media_type, variants)
+
+        # Drop outputs from previous builds so the SD card does not fill up with stale hashes.
+        keep = {path for asset in assets.values() for path in asset.variants.values()}
+        for stale in self.build_dir.rglob("*") if self.build_dir.is_dir() else ():
+            if stale.is_file() and stale.name != "manifest.json" and stale not in keep:
+                stale.unlink()
+
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        (self.build_dir / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        self.manifest = manifest
+        self._assets = assets
+        logger.info("Built %d assets into %s (brotli=%s)", len(assets), self.build_dir, brotli is not None)
+        return manifest
+
+    def url(self, logical: str) -> str:
+        """URL for a source path like "js/app.js"; falls back to the plain /frontend mount."""
+        fingerprinted = self.manifest.get(logical)
+        if fingerprinted is None:
+            return f"/frontend/{logical}"
+        return f"{self.prefix}/{fingerprinted}"
+
+    def lookup(self, fingerprinted: str) -> Optional[Asset]:
+        return self._assets.get(fingerprinted)
+
+
+class PrecompressedPage:
+    """A rendered page kept in memory with its compressed variants and one strong ETag per variant."""
+
+    _ETAG_SUFFIX = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+    def __init__(self, body: bytes, media_type: str = "text/html; charset=utf-8"):
+        self.media_type = media_type
+        self.variants = precompress(body)
+        # Strong ETags promise byte-identical bodies, so each encoding needs its own.
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        self.etags = {encoding: f'"{digest}{self._ETAG_SUFFIX[encoding]}"' for encoding in self.variants}
+
+    def not_modified(self, if_none_match: Optional[str], encoding: str) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or self.etags[encoding] in tags
+
+
+pipeline = AssetPipeline(Path(config.ASSET_SOURCE_DIR), Path(config.ASSET_BUILD_DIR))
+
+
+if __name__ == "__main__":
+    # Build ahead of time (e.g. from the install script): python -m backend.core.assets
+    for logical, fingerprinted in pipeline.build().items():
+        print(f"{logical} -> {fingerprinted}")
@@ -1,2 +1,131 @@
 # backend/core/config.py
-# Module: ODOCO Backend — Configuration placeholder
+# Module: ODOCO Backend — Configuration (environment-driven defaults)
+
+import os
+import tempfile
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_list(name: str, default: list[str]) -> list[str]:
+    raw = os.getenv(name)
+    if raw is None:
+        return list(default)
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+def env_int_map(name: str) -> dict[str, int]:
+    """"network=2,db=4" -> {"network": 2, "db": 4}; malformed entries are ignored."""
+    result = {}
+    for item in env_list(name, []):
+        key, sep, value = item.partition("=")
+        if sep and value.strip().isdigit() and int(value) > 0:
+            result[key.strip()] = int(value)
+    return result
+
+
+# Request tracing (Server-Timing header). Can be flipped at runtime via /api/debug/tracing.
+TRACE_ENABLED = env_bool("ODOCO_TRACE", False)
+
+# Requests slower than this are written to the slow-request log (0 disables it).
+SLOW_REQUEST_MS = env_float("ODOCO_SLOW_REQUEST_MS", 1500.0)
+
+# Optional subsystems to load at startup (see backend/core/lifecycle.py). Anything not
+# listed here is never imported.
+ENABLED_SUBSYSTEMS = env_list("ODOCO_SUBSYSTEMS", ["modes"])
+
+# Static asset pipeline: sources are fingerprinted and precompressed into the build dir.
+ASSET_SOURCE_DIR = os.getenv("ODOCO_ASSET_SOURCE_DIR", "frontend")
+ASSET_BUILD_DIR = os.getenv("ODOCO_ASSET_BUILD_DIR", "build/assets")
+
+# Fleet aggregator (subsystem "fleet"): comma-separated "name=http://ip:8000" or bare URLs.
+FLEET_NODES = env_list("ODOCO_FLEET_NODES", [])
+FLEET_POLL_INTERVAL_S = env_float("ODOCO_FLEET_POLL_INTERVAL_S", 10.0)
+FLEET_NODE_TIMEOUT_S = env_float("ODOCO_FLEET_NODE_TIMEOUT_S", 4.0)
+
+# hostapd control interface (subsystem "hostapd"). Interface defaults to hostapd.conf's.
+HOSTAPD_IFACE = os.getenv("ODOCO_HOSTAPD_IFACE", "")
+HOSTAPD_CTRL_DIR = os.getenv("ODOCO_HOSTAPD_CTRL_DIR", "/var/run/hostapd")
+
+# WAN supervisor (subsystem "wan_supervisor"): auto-reconnect to saved Wi-Fi networks.
+WAN_IFACE = os.getenv("ODOCO_WAN_IFACE", "wlan0")
+WAN_GRACE_S = env_float("ODOCO_WAN_GRACE_S", 5.0)
+WAN_BACKOFF_MAX_S = env_float("ODOCO_WAN_BACKOFF_MAX_S", 300.0)
+
+# Worker threads per workload pool (backend/core/executors.py), e.g. "network=2,db=4".
+POOL_WORKERS = env_int_map("ODOCO_POOL_WORKERS")
+
+# Privileged helper (python -m backend.helper). When its socket exists the API sends nmcli,
+# ping, getent, nft and systemctl operations there instead of forking `sudo -n`.
+HELPER_SOCKET = os.getenv("ODOCO_HELPER_SOCKET", "/run/odoco/helper.sock")
+HELPER_GROUP = os.getenv("ODOCO_HELPER_GROUP", "odoco")
+
+# Shared summary snapshot (subsystem "snapshot") for multi-worker uvicorn: one worker runs the
+# collectors and publishes into this memory-mapped file, the others read it.
+SNAPSHOT_PATH = os.getenv(
+    "ODOCO_SNAPSHOT_PATH",
+    "/dev/shm/odoco-summary" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "odoco-summary"),
+)
+SNAPSHOT_INTERVAL_S = env_float("ODOCO_SNAPSHOT_INTERVAL_S", 2.0)
+# flock files for subsystems that must run once per host (lifecycle.SINGLETON_SUBSYSTEMS).
+LOCK_DIR = os.getenv("ODOCO_LOCK_DIR", os.path.dirname(SNAPSHOT_PATH))
+
+# Captive portal (subsystem "captive"): HTTP on the LAN interface is redirected to this port
+# until a client is authorized. Interface defaults to hostapd's AP interface.
+CAPTIVE_PORT = int(env_float("ODOCO_CAPTIVE_PORT", 8081))
+CAPTIVE_IFACE = os.getenv("ODOCO_CAPTIVE_IFACE", "")
+CAPTIVE_PORTAL_URL = os.getenv("ODOCO_CAPTIVE_PORTAL_URL", "")
+CAPTIVE_AUTH_TTL_S = int(env_float("ODOCO_CAPTIVE_AUTH_TTL_S", 12 * 3600))
+
+# Traffic shaping (subsystem "shaping"): per-mode profiles and per-client limits from SQLite.
+SHAPING_AP_IFACE = os.getenv("ODOCO_SHAPING_AP_IFACE", "")
+SHAPING_WAN_IFACE = os.getenv("ODOCO_SHAPING_WAN_IFACE", WAN_IFACE)
+SHAPING_INTERVAL_S = env_float("ODOCO_SHAPING_INTERVAL_S", 10.0)
+
+# Caching forward proxy (subsystem "proxy"): LAN clients set it as their HTTP proxy. Only
+# clients in ODOCO_PROXY_ALLOW are served; stale copies are served when WAN is down in the
+# listed modes (by title or title prefix), or always with ODOCO_PROXY_STALE_IF_ERROR.
+PROXY_LISTEN = os.getenv("ODOCO_PROXY_LISTEN", "0.0.0.0")
+PROXY_PORT = int(env_float("ODOCO_PROXY_PORT", 3128))
+PROXY_ALLOW = env_list("ODOCO_PROXY_ALLOW", ["127.0.0.0/8", "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"])
+PROXY_CACHE_DIR = os.getenv("ODOCO_PROXY_CACHE_DIR", "/var/cache/odoco/proxy")
+PROXY_CACHE_MAX_MB = env_float("ODOCO_PROXY_CACHE_MAX_MB", 1024.0)
+PROXY_MAX_OBJECT_MB = env_float("ODOCO_PROXY_MAX_OBJECT_MB", 256.0)
+PROXY_STALE_MODES = env_list("ODOCO_PROXY_STALE_MODES", ["Offline LAN"])
+PROXY_STALE_IF_ERROR = env_bool("ODOCO_PROXY_STALE_IF_ERROR", False)
+
+# DNS query analytics (subsystem "dns_log"): dnsmasq must run with log-queries and
+# log-facility=<this path>. Without a saved offset only the last BACKFILL_MB are read.
+DNS_LOG_PATH = os.getenv("ODOCO_DNS_LOG_PATH", "/var/log/dnsmasq.log")
+DNS_LOG_POLL_S = env_float("ODOCO_DNS_LOG_POLL_S", 2.0)
+DNS_LOG_BACKFILL_MB = env_float("ODOCO_DNS_LOG_BACKFILL_MB", 32.0)
+
+# Throughput tests (subsystem "speedtest"): TCP/UDP port for native clients, hard caps for
+# every session, and an optional large file to download for the router-side WAN test.
+SPEEDTEST_PORT = int(env_float("ODOCO_SPEEDTEST_PORT", 5201))
+SPEEDTEST_MAX_MBIT = env_float("ODOCO_SPEEDTEST_MAX_MBIT", 100.0)
+SPEEDTEST_MAX_DURATION_S = env_float("ODOCO_SPEEDTEST_MAX_DURATION_S", 30.0)
+SPEEDTEST_WAN_URL = os.getenv("ODOCO_SPEEDTEST_WAN_URL", "")
+
+# AP channel planning (subsystem "channels"): wlan0 scan cadence (any scan counts), how long
+# neighbours are remembered, candidate channels per band, and the score drop needed before
+# recommending a move. Auto-apply uses hostapd CSA and needs the "hostapd" subsystem.
+CHANNEL_SCAN_INTERVAL_S = env_float("ODOCO_CHANNEL_SCAN_INTERVAL_S", 600.0)
+CHANNEL_WINDOW_S = env_float("ODOCO_CHANNEL_WINDOW_S", 86400.0)
+CHANNEL_CANDIDATES_2G = [int(c) for c in env_list("ODOCO_CHANNEL_CANDIDATES_2G", ["1", "6", "11"]) if c.isdigit()]
+CHANNEL_CANDIDATES_5G = [int(c) for c in env_list("ODOCO_CHANNEL_CANDIDATES_5G", ["36", "40", "44", "48"]) if c.isdigit()]
+CHANNEL_MIN_GAIN = env_float("ODOCO_CHANNEL_MIN_GAIN", 0.3)
+CHANNEL_AUTO_APPLY = env_bool("ODOCO_CHANNEL_AUTO_APPLY", False)
+CHANNEL_SWITCH_MIN_INTERVAL_S = env_float("ODOCO_CHANNEL_SWITCH_MIN_INTERVAL_S", 21600.0)
@@ -0,0 +1,111 @@
+# backend/core/encoding.py
+# Module: ODOCO Backend — Fast response encoding (orjson, optional MessagePack) and pre-encoded fragments
+
+import json
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import orjson  # optional: pip install orjson
+except ImportError:  # pragma: no cover - depends on the host
+    orjson = None
+
+try:
+    import msgpack  # optional: pip install msgpack
+except ImportError:  # pragma: no cover - depends on the host
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+
+# ---- encoders ----
+def dumps_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def dumps_msgpack(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=str, use_bin_type=True)
+
+
+def encode(obj: Any, fmt: str = JSON) -> bytes:
+    return dumps_msgpack(obj) if fmt == MSGPACK else dumps_json(obj)
+
+
+def encode_member(key: str, value: Any, fmt: str = JSON) -> bytes:
+    """One encoded `key: value` pair, to be cached and later spliced by join_members()."""
+    if fmt == MSGPACK:
+        return dumps_msgpack(key) + dumps_msgpack(value)
+    return dumps_json(key) + b":" + dumps_json(value)
+
+
+def join_members(members: list[bytes], fmt: str = JSON) -> bytes:
+    if fmt == MSGPACK:
+        return msgpack.Packer().pack_map_header(len(members)) + b"".join(members)
+    return b"{" + b",".join(members) + b"}"
+
+
+def row_serializer(fields: Iterable[str]) -> Callable[[Any], dict]:
+    """ORM row -> plain dict of `fields`, without a pydantic round trip per row."""
+    fields = tuple(fields)
+    get = attrgetter(*fields)
+    if len(fields) == 1:
+        return lambda row: {fields[0]: get(row)}
+    return lambda row: dict(zip(fields, get(row)))
+
+
+# ---- responses ----
+class FastJSONResponse(Response):
+    media_type = JSON
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def _quality(param: str) -> float:
+    for p in param.split(";")[1:]:
+        name, _, value = p.strip().partition("=")
+        if name == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """MessagePack only when the client asks for it at least as strongly as for JSON."""
+    if msgpack is None or not accept or "msgpack" not in accept:
+        return JSON
+    best_msgpack = best_json = 0.0
+    for item in accept.split(","):
+        mime = item.split(";", 1)[0].strip().lower()
+        q = _quality(item)
+        if mime in _MSGPACK_TYPES:
+            best_msgpack = max(best_msgpack, q)
+        elif mime in (JSON, "application/*", "*/*"):
+            best_json = max(best_json, q)
+    return MSGPACK if best_msgpack > 0 and best_msgpack >= best_json else JSON
+
+
+def respond(request: Request, content: Any = None, body: Optional[bytes] = None, fmt: Optional[str] = None,
+            headers: Optional[dict] = None) -> Response:
+    """Encode `content` (or send an already encoded `body`) in the format the client accepts.
+    Returning a Response also skips FastAPI's jsonable_encoder/response_model pass."""
+    fmt = fmt or negotiate(request.headers.get("accept"))
+    if body is None:
+        body = encode(content, fmt)
+    return Response(body, media_type=fmt, headers={"Vary": "Accept", **(headers or {})})
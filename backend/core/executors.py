@@ -0,0 +1,187 @@
+# backend/core/executors.py
+# Module: ODOCO Backend — Bounded thread pools per workload class with admission control
+
+import asyncio
+import contextvars
+import functools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from backend.core import config, metrics, tracing
+
+POOL_QUEUE_DEPTH = metrics.Gauge(
+    "odoco_pool_queue_depth",
+    "Calls waiting for a worker, by workload pool.",
+    ("pool",),
+)
+POOL_IN_FLIGHT = metrics.Gauge(
+    "odoco_pool_in_flight",
+    "Calls currently running on a worker, by workload pool.",
+    ("pool",),
+)
+POOL_WAIT_SECONDS = metrics.Histogram(
+    "odoco_pool_wait_seconds",
+    "Time spent queued before a worker picked the call up.",
+    ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+POOL_REJECTED_TOTAL = metrics.Counter(
+    "odoco_pool_rejected_total",
+    "Calls refused because a pool was saturated (reason=queue_full|deadline).",
+    ("pool", "reason"),
+)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool cannot take the call; main.py maps it to 429 + Retry-After."""
+
+    def __init__(self, pool: str, reason: str, retry_after_s: float):
+        super().__init__(f"{pool} pool saturated ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class WorkloadPool:
+    """A dedicated executor plus an admission queue in front of it.
+
+    At most `workers` calls run at once and at most `max_queue` wait; a waiting call gives up
+    after `queue_timeout_s`. Slots are handed over FIFO, so the executor's own (unbounded)
+    queue is never used and one class cannot borrow another's threads.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, queue_timeout_s: float):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"odoco-{self.name}")
+        return self._executor
+
+    def _publish(self) -> None:
+        POOL_QUEUE_DEPTH.set(len(self._waiters), pool=self.name)
+        POOL_IN_FLIGHT.set(self.active, pool=self.name)
+
+    def _reject(self, reason: str):
+        POOL_REJECTED_TOTAL.inc(pool=self.name, reason=reason)
+        raise PoolSaturated(self.name, reason, self.queue_timeout_s)
+
+    async def _acquire(self) -> None:
+        if self.active < self.workers and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._publish()
+        acquired = False
+        try:
+            # A slot handed over by _release() arrives as the future's result (active unchanged).
+            await asyncio.wait_for(fut, timeout=self.queue_timeout_s)
+            acquired = True
+        except asyncio.TimeoutError:
+            self._reject("deadline")
+        finally:
+            if not fut.done() or fut.cancelled():
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            elif not acquired:
+                # The slot was handed over, but we are leaving with an exception anyway (cancelled,
+                # or wait_for timing out right after the handoff on 3.12+): pass it on.
+                self._release()
+            self._publish()
+
+    def _release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        t0 = time.perf_counter()
+        await self._acquire()
+        waited = time.perf_counter() - t0
+        POOL_WAIT_SECONDS.observe(waited, pool=self.name)
+        tracing.record(f"queue:{self.name}", waited)
+        self._publish()
+        try:
+            ctx = contextvars.copy_context()
+            call = functools.partial(ctx.run, fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+        finally:
+            self._release()
+            self._publish()
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.active,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout_s,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Workload classes. Slow network operations (wlan0 rescans, /wan/connect) get few threads and
+# a short queue so they cannot pile up; fast reads get the most room.
+POOL_DEFAULTS: dict[str, tuple[int, int, float]] = {
+    # name: (workers, max_queue, queue_timeout_s)
+    "network": (2, 4, 5.0),
+    "privileged": (2, 8, 10.0),
+    "db": (4, 32, 10.0),
+    "fast": (8, 64, 10.0),
+    # Proxy cache files: one queued call per streamed chunk, so a deep queue and a longer wait.
+    "disk": (2, 256, 30.0),
+}
+
+
+def _build_pools() -> dict[str, WorkloadPool]:
+    pools = {}
+    for name, (workers, max_queue, timeout_s) in POOL_DEFAULTS.items():
+        workers = config.POOL_WORKERS.get(name, workers)
+        pools[name] = WorkloadPool(name, workers, max_queue, timeout_s)
+    return pools
+
+
+pools = _build_pools()
+
+
+def offload(pool_name: str):
+    """Run a sync endpoint on its workload pool instead of Starlette's shared threadpool.
+
+    The wrapper keeps the original signature (FastAPI follows __wrapped__), so path/query
+    params and Depends() keep working.
+    """
+    pool = pools[pool_name]
+
+    def decorator(fn: Callable):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await pool.run(fn, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def shutdown() -> None:
+    for pool in pools.values():
+        pool.shutdown()
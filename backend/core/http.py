@@ -0,0 +1,61 @@
+# backend/core/http.py
+# Module: ODOCO Backend — HTTP helpers (conditional GET support for JSON endpoints)
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+
+class ETagMiddleware:
+    """Adds a weak ETag to 200 GET responses on selected paths and answers If-None-Match with 304.
+
+    The body is still built, but unchanged payloads are not sent again — which is what
+    pollers such as the fleet aggregator care about on a slow link.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message = None
+        passthrough = False
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+
+            body = b"".join(chunks)
+            etag = 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            headers = MutableHeaders(scope=start_message)
+            headers["etag"] = etag
+            if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, capture)
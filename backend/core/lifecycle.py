@@ -0,0 +1,232 @@
+# backend/core/lifecycle.py
+# Module: ODOCO Backend — Startup report and lazily imported optional subsystems
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from backend.core import config, metrics
+from backend.core.logging import get_logger, log_event
+from backend.core.snapshot import LeaderLock
+
+logger = get_logger("odoco.startup")
+
+# name -> module path. A subsystem module may expose `router` (mounted on the app) and
+# `async def start(app)` / `async def stop(app)` hooks. Modules are imported only when
+# their name is listed in ODOCO_SUBSYSTEMS.
+OPTIONAL_SUBSYSTEMS: dict[str, str] = {
+    "modes": "backend.routers.modes",
+    "fleet": "backend.routers.fleet",
+    "lease_history": "backend.routers.client_history",
+    "hostapd": "backend.routers.wifi",
+    "wan_supervisor": "backend.routers.wan_supervisor",
+    "snapshot": "backend.routers.snapshot",
+    "captive": "backend.routers.captive",
+    "shaping": "backend.routers.shaping",
+    "proxy": "backend.routers.proxy",
+    "dns_log": "backend.routers.dns",
+    "speedtest": "backend.routers.speedtest",
+    "channels": "backend.routers.channels",
+}
+
+# Subsystems that own host-wide state (tc tree, NetworkManager, the AP channel, SQLite
+# writers, the dnsmasq log, a listening port, in-memory sessions). With several uvicorn
+# workers only the one holding their lock in config.LOCK_DIR runs them; the others mount the
+# router, answer 503 + Retry-After, and keep retrying the lock to take over.
+SINGLETON_SUBSYSTEMS = {"lease_history", "wan_supervisor", "shaping", "dns_log", "channels", "speedtest"}
+LEADER_RETRY_S = 5.0
+
+STARTUP_SECONDS = metrics.Gauge(
+    "odoco_startup_seconds",
+    "Startup phase durations; phase=\"first_response\" is process start to first response.",
+    ("phase",),
+    max_series=32,
+)
+
+
+def process_age_seconds() -> Optional[float]:
+    """Seconds since this process was exec'd (Linux /proc), or None if unavailable."""
+    try:
+        with open("/proc/self/stat") as fh:
+            # Field 22 (starttime) comes after the parenthesised command name.
+            fields = fh.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupReport:
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        # Time already spent before this module was imported (interpreter + imports).
+        self.pre_import_s = process_age_seconds()
+        self.phases: list[dict] = []
+        self.ready_s: Optional[float] = None
+        self.first_response_s: Optional[float] = None
+
+    def _since_exec(self) -> float:
+        return (self.pre_import_s or 0.0) + (time.perf_counter() - self._t0)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup step. Failures are logged and recorded instead of aborting startup."""
+        t0 = time.perf_counter()
+        entry = {"name": name, "ok": True, "seconds": 0.0}
+        try:
+            yield entry
+        except Exception as e:
+            entry["ok"] = False
+            entry["error"] = str(e)
+            logger.exception("Startup phase %s failed", name)
+        finally:
+            entry["seconds"] = round(time.perf_counter() - t0, 4)
+            self.phases.append(entry)
+            STARTUP_SECONDS.set(entry["seconds"], phase=name)
+
+    def mark_ready(self) -> None:
+        self.ready_s = round(self._since_exec(), 4)
+        STARTUP_SECONDS.set(self.ready_s, phase="ready")
+
+    def mark_first_response(self) -> None:
+        if self.first_response_s is not None:
+            return
+        self.first_response_s = round(self._since_exec(), 4)
+        STARTUP_SECONDS.set(self.first_response_s, phase="first_response")
+        log_event(logger, logging.INFO, "startup_report", **self.as_dict())
+
+    def as_dict(self) -> dict:
+        return {
+            "pre_import_s": round(self.pre_import_s, 4) if self.pre_import_s is not None else None,
+            "phases": self.phases,
+            "ready_s": self.ready_s,
+            "first_response_s": self.first_response_s,
+        }
+
+
+report = StartupReport()
+
+
+class ServedElsewhere(Exception):
+    """A singleton subsystem runs in another worker; main.py maps it to 503 + Retry-After."""
+
+    def __init__(self, name: str, pid: Optional[int]):
+        super().__init__(f"{name} runs in another worker" + (f" (pid {pid})" if pid else ""))
+        self.name = name
+        self.pid = pid
+        self.retry_after_s = 1
+
+
+class SingletonRunner:
+    """Calls a subsystem's start/stop hooks only while this process holds its LeaderLock."""
+
+    def __init__(self, name: str, module, app):
+        self.name = name
+        self.__name__ = module.__name__
+        self.module = module
+        self.app = app
+        self.running = False
+        self._lock = LeaderLock(os.path.join(config.LOCK_DIR, f"odoco-{name}.lock"))
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        # First attempt inline, so a single worker starts exactly as before.
+        await self._try_start()
+        if not self.running:
+            logger.info("Subsystem %s runs in another worker; standing by", self.name)
+            self._task = asyncio.create_task(self._standby(), name=f"standby:{self.name}")
+
+    async def _try_start(self) -> None:
+        if not self._lock.try_acquire():
+            return
+        try:
+            await self.module.start(self.app)
+        except Exception:
+            self._lock.release()
+            raise
+        self.running = True
+
+    async def _standby(self) -> None:
+        while not self.running:
+            await asyncio.sleep(LEADER_RETRY_S)
+            try:
+                await self._try_start()
+            except Exception:
+                logger.exception("Subsystem %s failed to take over", self.name)
+        logger.info("Subsystem %s taken over by pid %d", self.name, os.getpid())
+
+    def holder_pid(self) -> Optional[int]:
+        try:
+            with open(self._lock.path) as fh:
+                return int(fh.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    async def stop(self, app) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.running:
+            stop = getattr(self.module, "stop", None)
+            try:
+                if stop is not None:
+                    await stop(app)
+            finally:
+                self.running = False
+                self._lock.release()
+
+
+_runners: dict[str, SingletonRunner] = {}
+
+
+def check_standby(name: str) -> None:
+    """For routers whose subsystem state is missing: raise ServedElsewhere if another worker
+    runs it, so the caller can retry instead of getting "not running"."""
+    runner = _runners.get(name)
+    if runner is not None and not runner.running:
+        raise ServedElsewhere(name, runner.holder_pid())
+
+
+async def start_subsystems(app) -> list:
+    """Import and start enabled optional subsystems in ODOCO_SUBSYSTEMS order."""
+    started = []
+    for name in config.ENABLED_SUBSYSTEMS:
+        path = OPTIONAL_SUBSYSTEMS.get(name)
+        if not path:
+            logger.warning("Unknown subsystem %s (ignored)", name)
+            continue
+        with report.phase(f"subsystem.{name}") as entry:
+            module = importlib.import_module(path)
+            router = getattr(module, "router", None)
+            if router is not None:
+                app.include_router(router)
+            start = getattr(module, "start", None)
+            if start is not None and name in SINGLETON_SUBSYSTEMS:
+                runner = _runners[name] = SingletonRunner(name, module, app)
+                started.append(runner)
+                await runner.start()
+            else:
+                if start is not None:
+                    await start(app)
+                started.append(module)
+        if not entry["ok"]:
+            continue
+        logger.info("Subsystem %s started", name)
+    return started
+
+
+async def stop_subsystems(app, started: list) -> None:
+    for module in reversed(started):
+        stop = getattr(module, "stop", None)
+        if stop is None:
+            continue
+        try:
+            await stop(app)
+        except Exception:
+            logger.exception("Subsystem %s failed to stop", module.__name__)
@@ -1,2 +1,28 @@
 # backend/core/logging.py
-# Module: ODOCO Backend — Logging setup placeholder
+# Module: ODOCO Backend — Logging setup and structured event helpers
+
+import json
+import logging
+
+_configured = False
+
+
+def get_logger(name: str = "odoco") -> logging.Logger:
+    global _configured
+    if not _configured:
+        root = logging.getLogger("odoco")
+        if not root.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+            root.addHandler(handler)
+            root.setLevel(logging.INFO)
+            root.propagate = False
+        _configured = True
+    return logging.getLogger(name if name.startswith("odoco") else f"odoco.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields) -> None:
+    """Write one JSON object per line so slow/failed operations can be grepped and parsed."""
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, json.dumps({"event": event, **fields}, default=str, separators=(",", ":")))
@@ -0,0 +1,295 @@
+# backend/core/metrics.py
+# Module: ODOCO Backend — In-process metrics registry (Prometheus text format)
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable, Optional
+
+from backend.core import tracing
+
+# Latency buckets (seconds) tuned for a Pi: fast file reads up to slow nmcli rescans.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Every family keeps at most this many label sets; extra ones are folded into "__other__"
+# so memory stays fixed no matter what paths or commands show up.
+DEFAULT_MAX_SERIES = 64
+OVERFLOW_LABEL = "__other__"
+
+_registry: list["_Family"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 max_series: int = DEFAULT_MAX_SERIES, register: bool = True):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        if register:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _slot(self, key: tuple[str, ...]) -> list:
+        # Caller holds self._lock.
+        slot = self._series.get(key)
+        if slot is None:
+            if len(self._series) >= self.max_series:
+                key = tuple(OVERFLOW_LABEL for _ in self.labelnames)
+                slot = self._series.get(key)
+                if slot is not None:
+                    return slot
+            slot = self._new_slot()
+            self._series[key] = slot
+        return slot
+
+    def _new_slot(self) -> list:
+        return [0.0]
+
+    def _snapshot(self) -> list[tuple[tuple[str, ...], list]]:
+        with self._lock:
+            return [(k, list(v)) for k, v in self._series.items()]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, slot in sorted(self._snapshot()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(slot[0])}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._slot(key)[0] += amount
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._slot(key)[0] = float(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames, **kwargs)
+
+    def _new_slot(self) -> list:
+        # [bucket_0 .. bucket_n, +Inf bucket, sum, count] — buckets stored non-cumulative.
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, **labels) -> None:
+        idx = bisect_left(self.buckets, value)
+        key = self._key(labels)
+        with self._lock:
+            slot = self._slot(key)
+            slot[idx] += 1
+            slot[-2] += value
+            slot[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        bounds = [*self.buckets, float("inf")]
+        for key, slot in sorted(self._snapshot()):
+            cumulative = 0
+            for bound, n in zip(bounds, slot):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(slot[-2])}")
+            lines.append(f"{self.name}_count{labels} {slot[-1]}")
+        return lines
+
+
+class CollectorAges(_Family):
+    """Tracks the last run of each collector; exposed as age in seconds at scrape time."""
+
+    kind = "gauge"
+
+    def mark(self, collector: str) -> None:
+        with self._lock:
+            self._slot((collector,))[0] = time.monotonic()
+
+    def render(self) -> list[str]:
+        now = time.monotonic()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, slot in sorted(self._snapshot()):
+            age = round(now - slot[0], 3)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(age)}")
+        return lines
+
+
+# =========================
+# Built-in families
+# =========================
+HTTP_REQUEST_SECONDS = Histogram(
+    "odoco_http_request_duration_seconds",
+    "HTTP request latency by route template and method.",
+    ("route", "method"),
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "odoco_http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ("route", "method", "status"),
+    max_series=128,
+)
+SUBPROCESS_SECONDS = Histogram(
+    "odoco_subprocess_duration_seconds",
+    "Wall time of external commands by command name.",
+    ("command",),
+)
+SUBPROCESS_FAILURES_TOTAL = Counter(
+    "odoco_subprocess_failures_total",
+    "External commands that exited non-zero, timed out or failed to start.",
+    ("command",),
+)
+DB_QUERY_SECONDS = Histogram(
+    "odoco_db_query_duration_seconds",
+    "SQLite statement execution time by statement type.",
+    ("operation",),
+    max_series=16,
+)
+COLLECTOR_AGE_SECONDS = CollectorAges(
+    "odoco_collector_age_seconds",
+    "Seconds since each state collector last ran.",
+    ("collector",),
+)
+
+
+# =========================
+# Helpers
+# =========================
+def command_name(args) -> str:
+    """Binary name of a command line, skipping a leading `sudo -n`."""
+    if isinstance(args, str):
+        args = args.split()
+    args = list(args)
+    if args and args[0] == "sudo":
+        args = args[1:]
+        while args and args[0].startswith("-"):
+            args = args[1:]
+    if not args:
+        return "unknown"
+    return args[0].rsplit("/", 1)[-1]
+
+
+@contextmanager
+def track_subprocess(name: str):
+    """Time an external command; set `.failed = True` on the yielded handle for non-zero exits."""
+    handle = _SubprocessHandle()
+    t0 = time.perf_counter()
+    try:
+        yield handle
+    except Exception:
+        handle.failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        SUBPROCESS_SECONDS.observe(elapsed, command=name)
+        tracing.record(f"cmd.{name}", elapsed)
+        if handle.failed:
+            SUBPROCESS_FAILURES_TOTAL.inc(command=name)
+
+
+class _SubprocessHandle:
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+def collector(fn: Callable) -> Callable:
+    """Mark a state collector so its age shows up in /metrics and its time in Server-Timing."""
+    name = fn.__name__
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            tracing.record(name, time.perf_counter() - t0)
+            COLLECTOR_AGE_SECONDS.mark(name)
+
+    return wrapper
+
+
+def install_sqlalchemy_timing() -> None:
+    """Hook every SQLAlchemy engine so statement timings land in DB_QUERY_SECONDS."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("odoco_query_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("odoco_query_t0")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    DB_QUERY_SECONDS.observe(elapsed, operation=op)
+    tracing.record("db", elapsed)
+
+
+def render(extra: Optional[Iterable[_Family]] = None) -> str:
+    lines: list[str] = []
+    for fam in [*_registry, *(extra or ())]:
+        lines.extend(fam.render())
+    return "\n".join(lines) + "\n"
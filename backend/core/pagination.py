@@ -0,0 +1,30 @@
+# backend/core/pagination.py
+# Module: ODOCO Backend — Opaque keyset cursors for paginated list endpoints
+
+import base64
+import json
+from typing import Optional
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def encode_cursor(sort: str, order: str, key: list) -> str:
+    """Cursor = the sort key of the last row returned (plus the query's sort/order, so a
+    cursor cannot be replayed against a different ordering)."""
+    raw = json.dumps({"s": sort, "o": order, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort: str, order: str) -> Optional[list]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key = data["k"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if data.get("s") != sort or data.get("o") != order or not isinstance(key, list):
+        raise ValueError("Cursor does not match sort/order of this query")
+    return key
@@ -0,0 +1,288 @@
+# backend/core/privhelper.py
+# Module: ODOCO Backend — Privileged helper protocol: allow-listed operations and argv builders
+
+import ipaddress
+import json
+import re
+from typing import Callable, Optional
+
+# Wire format: one JSON object per line in both directions.
+#   request:  {"id": 7, "op": "wifi_scan", "args": {"rescan": true}}
+#   response: {"id": 7, "rc": 0, "stdout": "...", "stderr": ""}
+# Requests may be pipelined; responses carry the request id and can arrive out of order.
+MAX_LINE_BYTES = 1 << 20
+
+ALLOWED_SERVICES = ("hostapd", "dnsmasq", "nftables")
+
+_IFACE_RE = re.compile(r"^[A-Za-z0-9_.-]{1,15}$")
+_HOSTNAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.-]{0,252}$")
+
+
+class OpError(ValueError):
+    """Unknown operation or invalid arguments; nothing is executed."""
+
+
+class Command:
+    __slots__ = ("argv", "timeout", "stdin")
+
+    def __init__(self, argv: list[str], timeout: float, stdin: Optional[str] = None):
+        self.argv = argv
+        self.timeout = timeout
+        self.stdin = stdin
+
+
+# ---- argument validation ----
+def _str(args: dict, key: str, max_len: int, required: bool = True) -> Optional[str]:
+    value = args.get(key)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or not value or len(value) > max_len or "\x00" in value or "\n" in value:
+        raise OpError(f"invalid {key}")
+    return value
+
+
+def _int(args: dict, key: str, default: int, lo: int, hi: int) -> int:
+    value = args.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or not lo <= value <= hi:
+        raise OpError(f"{key} must be an integer in [{lo}, {hi}]")
+    return value
+
+
+def _iface(args: dict) -> str:
+    iface = args.get("iface", "wlan0")
+    if not isinstance(iface, str) or not _IFACE_RE.match(iface):
+        raise OpError("invalid iface")
+    return iface
+
+
+def _host(args: dict, key: str) -> str:
+    host = _str(args, key, 253)
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    # Leading "-" would be parsed as an option by ping/getent.
+    if not _HOSTNAME_RE.match(host):
+        raise OpError(f"invalid {key}")
+    return host
+
+
+# ---- operations ----
+def _wifi_scan(args: dict) -> Command:
+    rescan = "yes" if args.get("rescan", True) else "no"
+    return Command(["nmcli", "-t", "-f", "IN-USE,SSID,SIGNAL,SECURITY,BSSID,CHAN,FREQ", "dev", "wifi", "list",
+                    "ifname", _iface(args), "--rescan", rescan], timeout=30)
+
+
+def _wifi_connect(args: dict) -> Command:
+    argv = ["nmcli", "dev", "wifi", "connect", _str(args, "ssid", 64), "ifname", _iface(args)]
+    password = _str(args, "password", 128, required=False)
+    if password and password.strip():
+        argv += ["password", password]
+    return Command(argv, timeout=40)
+
+
+def _device_status(args: dict) -> Command:
+    return Command(["nmcli", "-t", "-f", "DEVICE,STATE,CONNECTION", "dev", "status"], timeout=10)
+
+
+def _saved_connections(args: dict) -> Command:
+    return Command(["nmcli", "-t", "-f", "NAME,TYPE", "con", "show"], timeout=10)
+
+
+def _connection_ssid(args: dict) -> Command:
+    # A profile's name is free text; the network it joins is 802-11-wireless.ssid.
+    return Command(["nmcli", "-g", "802-11-wireless.ssid", "con", "show", "id", _str(args, "name", 255)], timeout=10)
+
+
+def _connection_up(args: dict) -> Command:
+    return Command(["nmcli", "con", "up", "id", _str(args, "name", 255), "ifname", _iface(args)], timeout=40)
+
+
+def _ping(args: dict) -> Command:
+    count = _int(args, "count", 1, 1, 5)
+    wait = _int(args, "timeout", 2, 1, 10)
+    return Command(["ping", "-c", str(count), "-W", str(wait), _host(args, "host")], timeout=count * wait + 2)
+
+
+def _dns_resolve(args: dict) -> Command:
+    return Command(["getent", "hosts", _host(args, "hostname")], timeout=3)
+
+
+_NFT_FAMILIES = ("ip", "ip6", "inet", "arp", "bridge", "netdev")
+_NFT_VERBS = ("add", "create", "insert", "replace", "delete", "destroy", "flush", "reset")
+
+
+def _nft_table_of(tokens: list[str]) -> Optional[str]:
+    """Table name a top-level nft statement targets ("table inet odoco_x {", "add rule ip odoco_x ..")."""
+    if tokens[0] in _NFT_VERBS:
+        tokens = tokens[1:]
+    if len(tokens) < 2 or tokens[0] in ("ruleset", "list"):
+        return None
+    rest = tokens[1:]
+    if rest[0] in _NFT_FAMILIES:
+        rest = rest[1:]
+    return rest[0].rstrip("{").strip() if rest else None
+
+
+def _nft_top_level(ruleset: str) -> list[str]:
+    """Top-level statements, each cut at ";", newline or the "{" that opens its block."""
+    stmts, buf, depth = [], [], 0
+    for line in ruleset.splitlines():
+        for ch in line.split("#", 1)[0] + "\n":
+            if depth == 0:
+                if ch in ";\n{":
+                    if "".join(buf).strip():
+                        stmts.append("".join(buf).strip())
+                    buf = []
+                    depth += ch == "{"
+                elif ch == "}":
+                    raise OpError("unbalanced braces in ruleset")
+                else:
+                    buf.append(ch)
+            else:
+                depth += (ch == "{") - (ch == "}")
+    if depth:
+        raise OpError("unbalanced braces in ruleset")
+    return stmts
+
+
+def _nft_apply(args: dict) -> Command:
+    ruleset = args.get("ruleset")
+    if not isinstance(ruleset, str) or not ruleset.strip() or len(ruleset) > MAX_LINE_BYTES // 2:
+        raise OpError("invalid ruleset")
+    # Every top-level statement must target one of ODOCO's tables (odoco_nat, ...); what is
+    # nested inside a table block cannot reach other tables.
+    for stmt in _nft_top_level(ruleset):
+        table = _nft_table_of(stmt.split())
+        if not table or not table.startswith("odoco"):
+            raise OpError(f"statement not allowed outside odoco* tables: {stmt[:60]}")
+    return Command(["nft", "-f", "-"], timeout=10, stdin=ruleset)
+
+
+_TC_OBJECTS = ("qdisc", "class", "filter")
+_TC_VERBS = ("add", "replace", "change", "del", "delete")
+# Only what shaping_service.build_plan/off_batch emit: anything else (bpf, mirred, pedit, ...)
+# is rejected by default.
+TC_QDISCS = ("htb", "cake", "fq_codel", "pfifo", "ingress")
+TC_CLASSES = ("htb",)
+TC_CLASSIFIERS = ("u32",)
+TC_ACTIONS = ("police",)
+# Keywords (and their one-token argument) that come before the kind on each object.
+_TC_SELECTORS = {
+    "qdisc": {"dev", "parent", "handle"},
+    "class": {"dev", "parent", "classid"},
+    "filter": {"dev", "parent", "protocol", "prio", "handle"},
+}
+# u32 arguments: keywords from this set, or values (addresses, handles, rates, numbers).
+_TC_U32_WORDS = {"match", "ip", "src", "dst", "flowid", "classid", "action", "rate", "burst", "drop"}
+_TC_VALUE_RE = re.compile(r"^([0-9a-f]*:[0-9a-f]*|\d{1,3}(\.\d{1,3}){3}(/\d{1,2})?|\d+([kmg]?bit)?)$")
+# Interfaces tc_batch may touch (the shaping AP and WAN interfaces); the helper fills it at startup.
+TC_DEVICES: set[str] = set()
+
+
+def _tc_statement(tokens: list[str]) -> None:
+    obj, verb, rest = tokens[0], tokens[1], tokens[2:]
+    if obj not in _TC_OBJECTS or verb not in _TC_VERBS:
+        raise OpError("tc statement not allowed")
+    kind, i, has_dev = None, 0, False
+    while i < len(rest):
+        tok = rest[i]
+        if tok in _TC_SELECTORS[obj]:
+            if i + 1 >= len(rest):
+                raise OpError(f"{tok} needs a value")
+            if tok == "dev":
+                if rest[i + 1] not in TC_DEVICES:
+                    raise OpError(f"dev must be one of {', '.join(sorted(TC_DEVICES)) or '(none configured)'}")
+                has_dev = True
+            i += 2
+        elif tok == "root":
+            i += 1
+        else:
+            kind = tok
+            break
+    if not has_dev:
+        raise OpError("tc statement needs dev")
+    if kind is None:
+        return  # a bare delete ("qdisc del dev X root", "filter del dev X parent ffff:")
+    allowed = {"qdisc": TC_QDISCS, "class": TC_CLASSES, "filter": TC_CLASSIFIERS}[obj]
+    if kind not in allowed:
+        raise OpError(f"tc {obj} kind must be one of {', '.join(allowed)}")
+    if obj == "filter":
+        args = rest[i + 1:]
+        for j, tok in enumerate(args):
+            if tok in TC_ACTIONS:
+                continue
+            if tok == "action" and (j + 1 >= len(args) or args[j + 1] not in TC_ACTIONS):
+                raise OpError(f"tc action must be one of {', '.join(TC_ACTIONS)}")
+            if tok not in _TC_U32_WORDS and not _TC_VALUE_RE.match(tok):
+                raise OpError(f"tc filter argument not allowed: {tok[:30]}")
+
+
+def _tc_batch(args: dict) -> Command:
+    batch = args.get("batch")
+    if not isinstance(batch, str) or not batch.strip() or len(batch) > MAX_LINE_BYTES // 2:
+        raise OpError("invalid batch")
+    for line in batch.splitlines():
+        tokens = line.split()
+        if not tokens or tokens[0].startswith("#"):
+            continue
+        if len(tokens) < 4:
+            raise OpError(f"tc statement not allowed: {line[:60]}")
+        try:
+            _tc_statement(tokens)
+        except OpError as e:
+            raise OpError(f"{e}: {line[:60]}") from None
+    # -force keeps going past failed deletes (e.g. removing a root qdisc that is not there).
+    argv = ["tc", "-force", "-batch", "-"] if args.get("force") else ["tc", "-batch", "-"]
+    return Command(argv, timeout=10, stdin=batch)
+
+
+def _tc_stats(args: dict) -> Command:
+    kind = args.get("kind", "qdisc")
+    if kind not in ("qdisc", "class"):
+        raise OpError("kind must be qdisc or class")
+    return Command(["tc", "-s", "-j", kind, "show", "dev", _iface(args)], timeout=5)
+
+
+def _conntrack_list(args: dict) -> Command:
+    # Same line format as /proc/net/nf_conntrack, for kernels without procfs support.
+    return Command(["conntrack", "-L", "-o", "extended"], timeout=15)
+
+
+def _service_reload(args: dict) -> Command:
+    service = args.get("service")
+    if service not in ALLOWED_SERVICES:
+        raise OpError(f"service must be one of {', '.join(ALLOWED_SERVICES)}")
+    return Command(["systemctl", "reload-or-restart", service], timeout=30)
+
+
+OPS: dict[str, Callable[[dict], Command]] = {
+    "wifi_scan": _wifi_scan,
+    "wifi_connect": _wifi_connect,
+    "device_status": _device_status,
+    "saved_connections": _saved_connections,
+    "connection_ssid": _connection_ssid,
+    "connection_up": _connection_up,
+    "ping": _ping,
+    "dns_resolve": _dns_resolve,
+    "nft_apply": _nft_apply,
+    "tc_batch": _tc_batch,
+    "tc_stats": _tc_stats,
+    "conntrack_list": _conntrack_list,
+    "service_reload": _service_reload,
+}
+
+
+def build(op: str, args: Optional[dict] = None) -> Command:
+    builder = OPS.get(op)
+    if builder is None:
+        raise OpError(f"unknown op: {op}")
+    if args is not None and not isinstance(args, dict):
+        raise OpError("args must be an object")
+    return builder(args or {})
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
@@ -0,0 +1,101 @@
+# backend/core/singleflight.py
+# Module: ODOCO Backend — Single-flight call coalescing with a short result TTL
+
+import threading
+import time
+from functools import wraps
+from typing import Callable, Hashable, Optional
+
+from backend.core import metrics, tracing
+
+SINGLEFLIGHT_CALLS_TOTAL = metrics.Counter(
+    "odoco_singleflight_calls_total",
+    "Coalesced calls by operation and outcome (run=executed, shared=joined an in-flight call, cached=TTL hit).",
+    ("op", "outcome"),
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """Concurrent callers with the same key share one execution and its result.
+
+    A finished result is reused for `ttl_s` seconds; errors are shared with the callers that
+    were already waiting but never cached. Works from any thread (endpoints run on worker pools).
+    Results are shared objects: callers must treat them as read-only.
+    """
+
+    def __init__(self, name: str, ttl_s: float = 0.0):
+        self.name = name
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                if call.error is None and time.monotonic() - call.finished_at < self.ttl_s:
+                    SINGLEFLIGHT_CALLS_TOTAL.inc(op=self.name, outcome="cached")
+                    return call.result
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            t0 = time.perf_counter()
+            call.done.wait()
+            tracing.record(f"{self.name}:shared", time.perf_counter() - t0)
+            SINGLEFLIGHT_CALLS_TOTAL.inc(op=self.name, outcome="shared")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLEFLIGHT_CALLS_TOTAL.inc(op=self.name, outcome="run")
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            with self._lock:
+                if call.error is not None or self.ttl_s <= 0:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self) -> None:
+        """Drop cached results (in-flight calls still complete for their waiters)."""
+        with self._lock:
+            for key in [k for k, c in self._calls.items() if c.done.is_set()]:
+                del self._calls[key]
+
+
+def coalesce(ttl_s: float = 0.0) -> Callable:
+    """Decorator: key = positional + keyword arguments. `fn.cache_clear()` drops cached results
+    (e.g. after /wan/connect changes what a rescan would return)."""
+
+    def decorator(fn: Callable) -> Callable:
+        flight = SingleFlight(fn.__name__, ttl_s)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            return flight.do(key, fn, *args, **kwargs)
+
+        wrapper.cache_clear = flight.forget
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
@@ -0,0 +1,192 @@
+# backend/core/sketch.py
+# Module: ODOCO Backend — Fixed-memory streaming counters (count-min sketch, heavy hitters, rolling windows)
+
+import hashlib
+import heapq
+from array import array
+from typing import Callable, Optional
+
+
+def _hash64(key: str) -> int:
+    # Stable across processes (unlike hash()), so persisted sketches stay valid.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class CountMinSketch:
+    """depth x width uint32 counters. Estimates never undercount; with width w the overcount
+    is at most 2N/w (N = total added) with probability 1 - 2^-depth. Plain (not conservative)
+    updates keep the sketch linear, so a bucket can be subtracted from a window total."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.counts = array("I", bytes(4 * width * depth))
+
+    def cells(self, key: str) -> list[int]:
+        """Counter indexes of `key`; sketches of the same shape share them, so callers
+        updating several can hash once."""
+        h = _hash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        w = self.width
+        return [row * w + (h1 + row * h2) % w for row in range(self.depth)]
+
+    def add(self, cells: list[int], count: int = 1) -> None:
+        counts = self.counts
+        for cell in cells:
+            counts[cell] += count
+
+    def estimate(self, key: str) -> int:
+        counts = self.counts
+        return min(counts[cell] for cell in self.cells(key))
+
+    def add_estimate(self, cells: list[int], count: int = 1) -> int:
+        counts = self.counts
+        for cell in cells:
+            counts[cell] += count
+        return min(counts[cell] for cell in cells)
+
+    def subtract(self, other: "CountMinSketch") -> None:
+        counts = self.counts
+        for i, v in enumerate(other.counts):
+            if v:
+                counts[i] -= v
+
+    def clear(self) -> None:
+        self.counts = array("I", bytes(4 * self.width * self.depth))
+
+
+class HeavyHitters:
+    """Up to `capacity` candidate keys with their latest estimates; a new key replaces the
+    smallest candidate only if its estimate is larger. The min-heap is lazy: entries whose
+    count no longer matches are skipped when popped."""
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def offer(self, key: str, estimate: int) -> None:
+        counts = self.counts
+        if key in counts or len(counts) < self.capacity:
+            counts[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        else:
+            smallest, victim = self._min()
+            if estimate <= smallest:
+                return
+            del counts[victim]
+            heapq.heappop(self._heap)
+            counts[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild()
+
+    def _min(self) -> tuple[int, str]:
+        heap, counts = self._heap, self.counts
+        while heap[0][0] != counts.get(heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _rebuild(self) -> None:
+        self._heap = [(c, k) for k, c in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def refresh(self, estimate: Callable[[str], int]) -> None:
+        """Re-estimate every candidate (counts can drop when a window slides); zeros are dropped."""
+        self.counts = {k: c for k in self.counts if (c := estimate(k)) > 0}
+        self._rebuild()
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self._heap.clear()
+
+
+class RollingTopK:
+    """Count-min sketch plus heavy hitters over a sliding window of `buckets` time buckets.
+    Each bucket has its own sketch; the window total is their sum, kept incrementally: an
+    expiring bucket is subtracted once instead of re-summing the ring per query."""
+
+    def __init__(self, window_s: int, buckets: int, width: int, depth: int, capacity: int):
+        self.window_s = window_s
+        self.bucket_s = window_s // buckets
+        self.total = CountMinSketch(width, depth)
+        self.ring = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.ring_ids = [-1] * buckets
+        self.ring_events = [0] * buckets
+        self.heavy = HeavyHitters(capacity)
+        self.head = -1
+
+    def _advance(self, bucket: int) -> None:
+        n = len(self.ring)
+        if bucket <= self.head:
+            return
+        expired = False
+        # Buckets still in the window before the move that fall out of it after.
+        for old in range(self.head - n + 1, min(self.head, bucket - n) + 1):
+            slot = old % n
+            if self.ring_ids[slot] == old:
+                self.total.subtract(self.ring[slot])
+                self.ring[slot].clear()
+                self.ring_ids[slot] = -1
+                self.ring_events[slot] = 0
+                expired = True
+        self.head = bucket
+        if expired:
+            self.heavy.refresh(self.total.estimate)
+
+    def add(self, key: str, ts: float, count: int = 1, cells: Optional[list[int]] = None) -> bool:
+        """False if `ts` is already outside the window. `cells` = self.total.cells(key), if known."""
+        bucket = int(ts // self.bucket_s)
+        self._advance(bucket)
+        n = len(self.ring)
+        if bucket <= self.head - n:
+            return False
+        slot = bucket % n
+        self.ring_ids[slot] = bucket
+        self.ring_events[slot] += count
+        if cells is None:
+            cells = self.total.cells(key)
+        self.ring[slot].add(cells, count)
+        self.heavy.offer(key, self.total.add_estimate(cells, count))
+        return True
+
+    def expire(self, now: float) -> None:
+        self._advance(int(now // self.bucket_s))
+
+    @property
+    def events(self) -> int:
+        return sum(self.ring_events)
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        return self.heavy.top(k)
+
+    def estimate(self, key: str) -> int:
+        return self.total.estimate(key)
+
+    # -- persistence: raw counters, so a restart resumes the same windows --
+    def dump(self) -> tuple[dict, bytes]:
+        meta = {
+            "window_s": self.window_s, "head": self.head, "ring_ids": self.ring_ids,
+            "ring_events": self.ring_events, "heavy": self.heavy.counts,
+            "width": self.total.width, "depth": self.total.depth,
+        }
+        return meta, b"".join(s.counts.tobytes() for s in [self.total, *self.ring])
+
+    def restore(self, meta: dict, blob: bytes) -> bool:
+        size = 4 * self.total.width * self.total.depth
+        if (meta.get("window_s"), meta.get("width"), meta.get("depth")) != (
+                self.window_s, self.total.width, self.total.depth) or len(blob) != size * (len(self.ring) + 1):
+            return False
+        for i, sketch in enumerate([self.total, *self.ring]):
+            sketch.counts = array("I")
+            sketch.counts.frombytes(blob[i * size:(i + 1) * size])
+        self.head = meta["head"]
+        self.ring_ids = list(meta["ring_ids"])
+        self.ring_events = list(meta["ring_events"])
+        self.heavy.counts = dict(meta["heavy"])
+        self.heavy._rebuild()
+        return True
+
@@ -0,0 +1,154 @@
+# backend/core/snapshot.py
+# Module: ODOCO Backend — Seqlock-protected, memory-mapped snapshot shared by uvicorn workers
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Optional
+
+# Header, then the JSON body at BODY_OFFSET:
+#   magic | layout | seq (odd while a write is in progress) | version | published_at | length | crc32
+_HEADER = struct.Struct("<4sIQQdII")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+MAGIC = b"ODSS"
+LAYOUT = 1
+BODY_OFFSET = 64
+DEFAULT_CAPACITY = 1 << 20
+
+
+class SnapshotTooLarge(ValueError):
+    pass
+
+
+class SnapshotWriter:
+    """Single writer. The seq counter is bumped to odd before touching the body and to even
+    after; the crc32 lets readers reject a torn read even on weakly ordered CPUs (ARM)."""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            size = BODY_OFFSET + capacity
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, layout, seq, version, *_ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or layout != LAYOUT:
+            seq, version = 0, 0
+        # A writer that died mid-publish leaves seq odd; round up so readers are not stuck.
+        self._seq = seq + (seq & 1)
+        self.version = version
+
+    def publish(self, payload: dict) -> int:
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        if len(body) > self.capacity:
+            raise SnapshotTooLarge(f"snapshot is {len(body)} bytes, capacity {self.capacity}")
+        self.version += 1
+        self._seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+        self._mm[BODY_OFFSET:BODY_OFFSET + len(body)] = body
+        _HEADER.pack_into(self._mm, 0, MAGIC, LAYOUT, self._seq, self.version, time.time(),
+                          len(body), zlib.crc32(body))
+        self._seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+        return self.version
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class SnapshotReader:
+    """Lock-free reader. While the version is unchanged a read is two header loads; a new
+    version costs one copy of the body and one json parse, shared by every later request."""
+
+    def __init__(self, path: str, retries: int = 64):
+        self.path = path
+        self.retries = retries
+        self._mm: Optional[mmap.mmap] = None
+        self._version = 0
+        self._published_at = 0.0
+        self._data: Optional[dict] = None
+
+    def _map(self) -> Optional[mmap.mmap]:
+        if self._mm is None:
+            try:
+                fd = os.open(self.path, os.O_RDONLY)
+            except OSError:
+                return None
+            try:
+                if os.fstat(fd).st_size <= BODY_OFFSET:
+                    return None
+                self._mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            finally:
+                os.close(fd)
+        return self._mm
+
+    def read(self) -> tuple[int, float, Optional[dict]]:
+        """(version, published_at, data); data is None until a writer has published."""
+        mm = self._map()
+        if mm is None:
+            return 0, 0.0, None
+        for _ in range(self.retries):
+            magic, layout, seq1, version, published_at, length, crc = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or layout != LAYOUT or version == 0:
+                return 0, 0.0, None
+            if seq1 & 1:
+                time.sleep(0)
+                continue
+            if version == self._version:
+                return self._version, self._published_at, self._data
+            body = mm[BODY_OFFSET:BODY_OFFSET + length]
+            if _SEQ.unpack_from(mm, _SEQ_OFFSET)[0] != seq1 or zlib.crc32(body) != crc:
+                continue
+            self._data = json.loads(body)
+            self._version = version
+            self._published_at = published_at
+            return version, published_at, self._data
+        # Writer kept overwriting under us: serve the previous version rather than spin.
+        return self._version, self._published_at, self._data
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+class LeaderLock:
+    """Non-blocking flock: exactly one process per host holds it; it is released on exit or
+    crash, so another worker can take over publishing."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,62 @@
+# backend/core/tracing.py
+# Module: ODOCO Backend — Per-request phase tracing (Server-Timing + slow-request log)
+
+import re
+from contextvars import ContextVar
+from typing import Optional
+
+from backend.core import config
+
+# Phases recorded for the current request, or None when tracing is off for it.
+_spans: ContextVar[Optional[list]] = ContextVar("odoco_trace_spans", default=None)
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_.\-]")
+
+
+class TraceSettings:
+    def __init__(self):
+        self.enabled = config.TRACE_ENABLED
+        self.slow_request_ms = config.SLOW_REQUEST_MS
+
+    def as_dict(self) -> dict:
+        return {"enabled": self.enabled, "slow_request_ms": self.slow_request_ms}
+
+
+settings = TraceSettings()
+
+
+def start_request() -> Optional[list]:
+    """Begin collecting phases for this request; returns the span list (None when disabled)."""
+    if not settings.enabled:
+        return None
+    spans: list = []
+    _spans.set(spans)
+    return spans
+
+
+def record(name: str, seconds: float) -> None:
+    # Hot path: a single ContextVar lookup when tracing is off.
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def summarize(spans: list) -> list[tuple[str, float, int]]:
+    """Aggregate spans by name, preserving first-seen order: (name, total_ms, count)."""
+    totals: dict[str, list] = {}
+    for name, seconds in spans:
+        agg = totals.setdefault(name, [0.0, 0])
+        agg[0] += seconds * 1000.0
+        agg[1] += 1
+    return [(name, round(ms, 2), n) for name, (ms, n) in totals.items()]
+
+
+def server_timing_header(phases: list[tuple[str, float, int]], total_ms: float) -> str:
+    parts = []
+    for name, ms, n in phases:
+        entry = f"{_TOKEN_RE.sub('_', name)};dur={ms}"
+        if n > 1:
+            entry += f';desc="x{n}"'
+        parts.append(entry)
+    parts.append(f"total;dur={round(total_ms, 2)}")
+    return ", ".join(parts)
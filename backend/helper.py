@@ -0,0 +1,169 @@
+# backend/helper.py
+# Module: ODOCO privileged helper — root daemon that runs allow-listed operations for the API
+
+"""Run as root (systemd), next to an unprivileged API process:
+
+    python -m backend.helper --socket /run/odoco/helper.sock --group odoco
+
+Only operations from backend.core.privhelper.OPS are accepted; each one validates its
+arguments and builds a fixed argv, so the API never sends a command line. No sudo, no shell.
+"""
+
+import argparse
+import asyncio
+import grp
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import time
+
+from backend.core import config, privhelper
+from backend.core.logging import get_logger, log_event
+from backend.services.network_service import get_hostapd_iface_and_ssid
+
+logger = get_logger("odoco.helper")
+
+# Concurrent commands per daemon; extra pipelined requests wait their turn.
+MAX_CONCURRENT = 8
+# Operations that change system state are always logged; read-only ones only when they fail.
+MUTATING_OPS = {"wifi_connect", "connection_up", "nft_apply", "tc_batch", "service_reload"}
+
+
+def peer_uid(writer: asyncio.StreamWriter) -> int:
+    sock = writer.get_extra_info("socket")
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    except (AttributeError, OSError):
+        return -1
+
+
+async def execute(cmd: privhelper.Command) -> dict:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd.argv,
+            stdin=asyncio.subprocess.PIPE if cmd.stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={"PATH": "/usr/sbin:/usr/bin:/sbin:/bin", "LANG": "C"},
+        )
+    except OSError as e:
+        return {"rc": 99, "stdout": "", "stderr": str(e)}
+    try:
+        stdin = cmd.stdin.encode() if cmd.stdin is not None else None
+        out, err = await asyncio.wait_for(proc.communicate(stdin), timeout=cmd.timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return {"rc": 124, "stdout": "", "stderr": f"timeout after {cmd.timeout}s"}
+    return {
+        "rc": proc.returncode,
+        "stdout": out.decode(errors="replace").strip(),
+        "stderr": err.decode(errors="replace").strip(),
+    }
+
+
+class HelperServer:
+    def __init__(self, path: str, group: str = ""):
+        self.path = path
+        self.group = group
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT)
+        self._server = None
+
+    async def start(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path,
+                                                       limit=privhelper.MAX_LINE_BYTES)
+        # Access control is the socket file: root plus the API's group.
+        gid = grp.getgrnam(self.group).gr_gid if self.group else -1
+        os.chown(self.path, -1, gid)
+        os.chmod(self.path, 0o660 if self.group else 0o600)
+        logger.info("Privileged helper listening on %s (group=%s)", self.path, self.group or "root only")
+
+    async def serve_forever(self) -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            logger.info("Privileged helper stopped")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        uid = peer_uid(writer)
+        write_lock = asyncio.Lock()
+        tasks: set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    logger.warning("Helper client uid=%s sent an oversized line; closing", uid)
+                    break
+                if not line:
+                    break
+                # Pipelining: every request runs in its own task, replies go out as they finish.
+                task = asyncio.create_task(self._process(line, uid, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _process(self, line: bytes, uid: int, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        req_id = None
+        op = ""
+        t0 = time.perf_counter()
+        try:
+            req = json.loads(line)
+            req_id = req.get("id")
+            op = str(req.get("op", ""))
+            cmd = privhelper.build(op, req.get("args"))
+        except (ValueError, AttributeError) as e:
+            # OpError is a ValueError: nothing was executed.
+            result = {"rc": 2, "stdout": "", "stderr": str(e), "error": "rejected"}
+        else:
+            async with self._slots:
+                result = await execute(cmd)
+        result["id"] = req_id
+        level = logging.INFO if op in MUTATING_OPS or result["rc"] != 0 else logging.DEBUG
+        log_event(logger, level, "helper_op", uid=uid, op=op, rc=result["rc"],
+                  ms=round((time.perf_counter() - t0) * 1000.0, 1))
+        async with write_lock:
+            try:
+                writer.write(privhelper.encode(result))
+                await writer.drain()
+            except (ConnectionError, RuntimeError):
+                pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ODOCO privileged helper")
+    parser.add_argument("--socket", default=config.HELPER_SOCKET)
+    parser.add_argument("--group", default=config.HELPER_GROUP)
+    args = parser.parse_args()
+    # tc_batch may only touch the interfaces the shaping subsystem manages.
+    ap_iface = config.SHAPING_AP_IFACE or get_hostapd_iface_and_ssid().get("ap_iface") or "wlan1"
+    privhelper.TC_DEVICES.update({ap_iface, config.SHAPING_WAN_IFACE})
+
+    async def run():
+        server = HelperServer(args.socket, args.group)
+        await server.start()
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,482 +3,199 @@
 
 
 from fastapi import FastAPI
-import platform
-import shutil
-import subprocess
-import re
 import time
-from pathlib import Path
 
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi import Request, Response
-from fastapi.templating import Jinja2Templates
+from fastapi import HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 
-from backend.db.init_db import init_db
+from backend.routers.conntrack import router as conntrack_router
 from backend.routers.servers import router as servers_router
 from backend.routers.targets import router as targets_router
-from backend.routers.modes import router as modes_router
 
-from sqlalchemy import select
-from backend.db.session import SessionLocal
-from backend.db.models import Server, SystemTarget
-
-import shlex
+from backend.core import assets, executors, lifecycle, metrics, pagination, tracing
+from backend.core.encoding import FastJSONResponse, negotiate, respond
+from backend.core.executors import offload
+from backend.core.http import ETagMiddleware
+from backend.core.logging import get_logger, log_event
+from backend.services.network_service import (
+    check_internet,
+    connect_and_verify,
+    get_default_route,
+    get_dnsmasq_dhcp_info,
+    get_hostapd_iface_and_ssid,
+    nmcli_wlan0_state,
+    wifi_scan_wlan0,
+)
+from backend.services import clients_service
+from backend.services.snapshot_service import encode_summary
+from backend.services.summary_service import SUMMARY_SECTIONS
+from backend.services.system_service import (
+    get_system_summary,
+    read_cpu_model,
+    read_os_info,
+)
+
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pydantic import BaseModel, Field
 from typing import Optional
 
 
-app = FastAPI(title="ODOCO Control Panel", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Order matters: DB first (everything else may read it), then collectors and caches,
+    # then optional subsystems. A failing phase is logged and startup continues.
+    with lifecycle.report.phase("db"):
+        from backend.db.init_db import init_db
+        metrics.install_sqlalchemy_timing()
+        init_db()
+        from backend.services.servers_service import init_indexes
+        init_indexes()
+    with lifecycle.report.phase("collectors"):
+        await run_in_threadpool(warm_collectors)
+    with lifecycle.report.phase("assets"):
+        await run_in_threadpool(assets.pipeline.build)
+    with lifecycle.report.phase("templates"):
+        get_index_page.cache_clear()
+        await run_in_threadpool(get_index_page)
+    started = await lifecycle.start_subsystems(app)
+    lifecycle.report.mark_ready()
+    yield
+    await lifecycle.stop_subsystems(app, started)
+    executors.shutdown()
+
+
+app = FastAPI(title="ODOCO Control Panel", version="0.1.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
 
-init_db()
 app.include_router(servers_router)
 app.include_router(targets_router)
-app.include_router(modes_router)
-
-templates = Jinja2Templates(directory="templates")
-
-def parse_kv_from_file(path: str, key: str) -> str:
-    p = Path(path)
-    if not p.exists():
-        return ""
-    for ln in p.read_text(errors="ignore").splitlines():
-        ln = ln.strip()
-        if ln.startswith(f"{key}="):
-            return ln.split("=", 1)[1].strip()
-    return ""
-
-def get_hostapd_iface_and_ssid():
-    hostapd_paths = ["/etc/hostapd/hostapd.conf", "/etc/hostapd.conf"]
-    for hp in hostapd_paths:
-        if Path(hp).exists():
-            return {
-                "path": hp,
-                "ap_iface": parse_kv_from_file(hp, "interface"),
-                "ssid": parse_kv_from_file(hp, "ssid"),
-            }
-    return {"path": "", "ap_iface": "", "ssid": ""}
-
-def get_dnsmasq_dhcp_info():
-    # We read only /etc/dnsmasq.conf for now (your config is there).
-    p = "/etc/dnsmasq.conf"
-    iface = parse_kv_from_file(p, "interface")
-    dhcp_range = parse_kv_from_file(p, "dhcp-range")
-    return {"path": p, "dhcp_iface": iface, "dhcp_range": dhcp_range}
-
-def ip_addr_brief(iface: str) -> str:
-    try:
-        out = subprocess.check_output(["ip", "-4", "-br", "addr", "show", iface], stderr=subprocess.DEVNULL)
-        return out.decode().strip()
-    except Exception:
-        return ""
-
-
-
-def run_cmd(args: list[str], timeout: int = 20) -> dict:
+app.include_router(conntrack_router)
+# Lets pollers (fleet aggregator, dashboards) revalidate instead of re-downloading.
+app.add_middleware(ETagMiddleware, paths=("/api/summary", "/clients", "/servers"))
+
+logger = get_logger("odoco.http")
+
+
+@app.exception_handler(executors.PoolSaturated)
+async def pool_saturated(request: Request, exc: executors.PoolSaturated):
+    # A saturated workload class fails fast instead of stealing threads from the others.
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "pool": exc.pool, "reason": exc.reason},
+        headers={"Retry-After": str(int(exc.retry_after_s))},
+    )
+
+
+@app.exception_handler(lifecycle.ServedElsewhere)
+async def served_elsewhere(request: Request, exc: lifecycle.ServedElsewhere):
+    # Singleton subsystem owned by another worker: the retry may land on the owner.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "subsystem": exc.name, "pid": exc.pid},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+@lru_cache(maxsize=1)
+def get_templates():
+    # Deferred so jinja2 is only imported once the first template is needed.
+    from fastapi.templating import Jinja2Templates
+    templates = Jinja2Templates(directory="templates")
+    templates.env.globals["asset_url"] = assets.pipeline.url
+    return templates
+
+
+@lru_cache(maxsize=1)
+def get_index_page() -> assets.PrecompressedPage:
+    # index.html has no per-request data: render once, compress once, serve from memory.
+    html = get_templates().get_template("index.html").render()
+    return assets.PrecompressedPage(html.encode("utf-8"))
+
+
+def warm_collectors():
+    # Static host facts are cached for the process lifetime; prime them before serving.
+    read_os_info()
+    read_cpu_model()
+    get_hostapd_iface_and_ssid()
+    get_dnsmasq_dhcp_info()
+
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    t0 = time.perf_counter()
+    spans = tracing.start_request()
+    status = 500
+    response = None
     try:
-        res = subprocess.run(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=timeout,
-            check=False
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - t0
+        # Label by route template (e.g. /servers/{server_id}) to keep cardinality bounded.
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "__unmatched__"
+        metrics.HTTP_REQUEST_SECONDS.observe(elapsed, route=route_path, method=request.method)
+        metrics.HTTP_REQUESTS_TOTAL.inc(route=route_path, method=request.method, status=status)
+
+        phases = tracing.summarize(spans) if spans else []
+        if response is not None and spans is not None:
+            response.headers["Server-Timing"] = tracing.server_timing_header(phases, elapsed * 1000.0)
+
+        slow_ms = tracing.settings.slow_request_ms
+        if slow_ms and elapsed * 1000.0 >= slow_ms:
+            log_event(
+                logger, logging.WARNING, "slow_request",
+                method=request.method,
+                path=request.url.path,
+                route=route_path,
+                status=status,
+                duration_ms=round(elapsed * 1000.0, 1),
+                phases=[{"name": n, "ms": ms, "count": c} for n, ms, c in phases],
+            )
+
+        if lifecycle.report.first_response_s is None:
+            lifecycle.report.mark_first_response()
+
+
+def system_metric_families(summary: dict) -> list:
+    def gauge(name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        return metrics.Gauge(name, help_text, labelnames, register=False)
+
+    temp = gauge("odoco_system_temperature_celsius", "CPU temperature.")
+    ram = gauge("odoco_system_memory_megabytes", "RAM usage by kind (total/used/free).", ("kind",))
+    storage = gauge("odoco_system_storage_gigabytes", "Root filesystem usage by kind (total/used/free).", ("kind",))
+    iface_up = gauge("odoco_network_interface_up", "1 when the interface operstate is up.", ("iface",))
+
+    if summary.get("temperature_c") is not None:
+        temp.set(summary["temperature_c"])
+    for kind in ("total", "used", "free"):
+        ram.set(summary["ram"].get(f"{kind}_mb", 0), kind=kind)
+        storage.set(summary["storage"].get(f"{kind}_gb", 0), kind=kind)
+    for iface in summary.get("network_interfaces", []):
+        iface_up.set(1 if iface.get("state") == "up" else 0, iface=iface["name"])
+    return [temp, ram, storage, iface_up]
+
+def parse_summary_fields(fields: Optional[str]) -> set[str]:
+    if not fields:
+        return set(SUMMARY_SECTIONS)
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - set(SUMMARY_SECTIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown summary fields: {', '.join(sorted(unknown))}. Valid: {', '.join(SUMMARY_SECTIONS)}",
         )
-        return {
-            "rc": res.returncode,
-            "stdout": (res.stdout or "").strip(),
-            "stderr": (res.stderr or "").strip(),
-        }
-    except Exception as e:
-        return {"rc": 99, "stdout": "", "stderr": str(e)}
-
-
-def nmcli_args(args: list[str], timeout: int = 25) -> dict:
-    return run_cmd(["sudo", "-n", "nmcli", *args], timeout=timeout)
-
-
-def get_iface_ipv4(iface: str) -> str:
-    if not iface:
-        return ""
-    out = ip_addr_brief(iface)
-    # example: wlan1 UP 192.168.50.1/24
-    m = re.search(r"\b(\d+\.\d+\.\d+\.\d+/\d+)\b", out)
-    return m.group(1) if m else ""
-
-def sh(cmd: str) -> str:
-    """Run a shell command and return stdout (safe for read-only ops)."""
-    try:
-        return subprocess.check_output(cmd, shell=True, stderr=subprocess.DEVNULL).decode().strip()
-    except Exception:
-        return ""
-
-def wifi_scan_wlan0():
-    res = nmcli_args([
-        "-t", "-f", "IN-USE,SSID,SIGNAL,SECURITY",
-        "dev", "wifi", "list",
-        "ifname", "wlan0",
-        "--rescan", "yes"
-    ], timeout=30)
-
-    if res["rc"] != 0:
-        return []
-
-    out = res["stdout"]
-
-    best = {}
-    for ln in out.splitlines():
-        if not ln.strip():
-            continue
-        parts = ln.split(":")
-        inuse = (parts[0] == "*") if len(parts) >= 1 else False
-        ssid = parts[1] if len(parts) >= 2 else ""
-        signal = int(parts[2]) if len(parts) >= 3 and parts[2].isdigit() else 0
-        security = parts[3] if len(parts) >= 4 else ""
-
-        if not ssid or ssid == "ODOCO_SETUP":
-            continue
+    return selected
 
-        rec = {"in_use": inuse, "ssid": ssid, "signal": signal, "security": security}
-        if ssid not in best or signal > (best[ssid]["signal"] or 0) or inuse:
-            best[ssid] = rec
-
-    nets = list(best.values())
-    nets.sort(key=lambda x: (not x["in_use"], -(x["signal"] or 0), x["ssid"]))
-    return nets
-
-def nmcli_connect_wlan0(ssid: str, password: Optional[str]):
-    args = ["dev", "wifi", "connect", ssid, "ifname", "wlan0"]
-    if password and password.strip():
-        args += ["password", password]
-    return nmcli_args(args, timeout=40)
-
-
-def nmcli_wlan0_state():
-    res = nmcli_args(["-t", "-f", "DEVICE,STATE,CONNECTION", "dev", "status"], timeout=10)
-    out = res["stdout"]
-
-    for ln in out.splitlines():
-        if ln.startswith("wlan0:"):
-            parts = ln.split(":", 2)
-            return {
-                "raw": ln,
-                "state": parts[1] if len(parts) > 1 else "",
-                "connection": parts[2] if len(parts) > 2 else "",
-            }
-
-    return {"raw": out.strip(), "state": "", "connection": ""}
-
-
-
-
-def ping(ip: str, count: int = 1, timeout_sec: int = 2) -> bool:
-    if not ip:
-        return False
-    try:
-        rc = subprocess.run(
-            ["sudo", "-n", "ping", "-c", str(count), "-W", str(timeout_sec), ip],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=timeout_sec + 2,
-            check=False
-        ).returncode
-        return rc == 0
-    except Exception:
-        return False
-
-def dns_resolve(hostname: str) -> bool:
-    if not hostname:
-        return False
-    try:
-        rc = subprocess.run(
-            ["sudo", "-n", "getent", "hosts", hostname],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=3,
-            check=False
-        ).returncode
-        return rc == 0
-    except Exception:
-        return False
-
-
-def connect_and_verify(ssid: str, password: Optional[str], wait_sec: int = 20):
-    connect_output = nmcli_connect_wlan0(ssid, password)
-
-    # wait for NM state to become connected
-    t0 = time.time()
-    state = nmcli_wlan0_state()
-    while time.time() - t0 < wait_sec:
-        state = nmcli_wlan0_state()
-        if state["state"] == "connected":
-            break
-        time.sleep(1)
-
-    route = get_default_route()
-    default_route = route["raw"]
-    gw = route["gateway"]
-
-    # Connectivity checks
-    gw_ok = ping(gw) if gw else False
-    internet_ip_ok = ping("1.1.1.1") or ping("8.8.8.8")
-    dns_ok = dns_resolve("one.one.one.one") or dns_resolve("google.com")
-
-    ok = (state["state"] == "connected") and gw_ok and internet_ip_ok and dns_ok
-
-    return {
-        "ok": ok,
-        "ssid_requested": ssid,
-        "nmcli_connect": connect_output,
-        "wlan0_state": state,
-        "default_route": default_route,
-        "gateway": gw,
-        "checks": {
-            "gateway_ping": gw_ok,
-            "internet_ping": internet_ip_ok,
-            "dns_resolve": dns_ok
-        }
-    }
-
-
-def get_default_route():
-    out = sh("ip route show default")
-    # example: default via 172.16.1.1 dev wlan0 proto dhcp src 172.16.1.212 metric 600
-    m_dev = re.search(r"\bdev\s+(\S+)", out)
-    m_gw  = re.search(r"\bvia\s+(\S+)", out)
-    m_src = re.search(r"\bsrc\s+(\S+)", out)
-    return {
-        "raw": out,
-        "wan_iface": m_dev.group(1) if m_dev else "",
-        "gateway": m_gw.group(1) if m_gw else "",
-        "wan_ip": m_src.group(1) if m_src else "",
-    }
-
-def guess_lan_from_leases(clients):
-    # If we have clients like 192.168.50.153, return "192.168.50.0/24"
-    if not clients:
-        return ""
-    ip = clients[0].get("ip", "")
-    parts = ip.split(".")
-    if len(parts) == 4:
-        return f"{parts[0]}.{parts[1]}.{parts[2]}.0/24"
-    return ""
-
-
-def read_dnsmasq_leases():
-    leases_paths = [
-        "/var/lib/misc/dnsmasq.leases",
-        "/var/lib/dnsmasq/dnsmasq.leases",
-    ]
-    for p in leases_paths:
-        fp = Path(p)
-        if fp.exists():
-            rows = []
-            for ln in fp.read_text(errors="ignore").splitlines():
-                if not ln.strip():
-                    continue
-                # format: expiry epoch, mac, ip, hostname, clientid
-                parts = ln.split()
-                if len(parts) >= 5:
-                    expiry, mac, ip, hostname, clientid = parts[:5]
-                    now = int(time.time())
-                    expiry_int = int(expiry) if expiry.isdigit() else None
-                    expires_in = (expiry_int - now) if expiry_int else None
-
-                    rows.append({
-                        "ip": ip,
-                        "mac": mac,
-                        "hostname": "" if hostname == "*" else hostname,
-                        "expiry_epoch": expiry_int,
-                        "expires_in_seconds": expires_in,
-                        "expires_in_minutes": (expires_in // 60) if expires_in is not None else None,
-                        "clientid": "" if clientid == "*" else clientid,
-                    })
-            return rows
-    return []
-
-
-def get_ssid() -> str:
-    # Try common hostapd paths. We don't change anything; read-only.
-    candidates = [
-        "/etc/hostapd/hostapd.conf",
-        "/etc/hostapd.conf",
-    ]
-    for p in candidates:
-        if Path(p).exists():
-            line = sh(f"grep -E '^\\s*ssid=' {p} | tail -n 1")
-            if line and "=" in line:
-                return line.split("=", 1)[1].strip()
-    return "Unknown"
-
-
-def get_dns_resolv_conf():
-    p = Path("/etc/resolv.conf")
-    if not p.exists():
-        return []
-    # Return only nameserver lines
-    lines = [ln.strip() for ln in p.read_text(errors="ignore").splitlines()]
-    return [ln for ln in lines if ln.startswith("nameserver")]
-
-
-def get_clients_count() -> int:
-    # dnsmasq leases file (common path)
-    leases_paths = [
-        "/var/lib/misc/dnsmasq.leases",
-        "/var/lib/dnsmasq/dnsmasq.leases",
-    ]
-    for p in leases_paths:
-        fp = Path(p)
-        if fp.exists():
-            content = fp.read_text(errors="ignore").strip()
-            if not content:
-                return 0
-            return len([ln for ln in content.splitlines() if ln.strip()])
-    return 0
-
-
-def get_service_active(service: str) -> bool:
-    out = sh(f"systemctl is-active {service}")
-    return out.strip() == "active"
-
-def read_os_info() -> str:
-    p = Path("/etc/os-release")
-    if p.exists():
-        for ln in p.read_text(errors="ignore").splitlines():
-            if ln.startswith("PRETTY_NAME="):
-                return ln.split("=", 1)[1].strip().strip('"')
-    return platform.platform()
-
-def read_cpu_model() -> str:
-    p = Path("/proc/cpuinfo")
-    if p.exists():
-        lines = p.read_text(errors="ignore").splitlines()
-
-        # x86 typically exposes "model name", Raspberry Pi often exposes "Model".
-        preferred_keys = ("model name", "model", "hardware", "cpu part")
-        for key in preferred_keys:
-            for ln in lines:
-                if ":" not in ln:
-                    continue
-                k, v = ln.split(":", 1)
-                if k.strip().lower() == key and v.strip():
-                    return v.strip()
-
-        # Last-resort fallback for environments with sparse cpuinfo.
-        for ln in lines:
-            if ":" not in ln:
-                continue
-            k, v = ln.split(":", 1)
-            if k.strip().lower() == "processor" and v.strip():
-                return f"CPU {v.strip()}"
-
-    return platform.processor() or "Unknown"
-
-def read_cpu_temperature_c() -> Optional[float]:
-    candidates = [
-        "/sys/class/thermal/thermal_zone0/temp",
-        "/sys/devices/virtual/thermal/thermal_zone0/temp",
-    ]
-    for p in candidates:
-        fp = Path(p)
-        if not fp.exists():
-            continue
-        raw = fp.read_text(errors="ignore").strip()
-        if not raw:
-            continue
-        try:
-            val = float(raw)
-            # Typical Linux thermal files report milli-degrees C.
-            return round((val / 1000.0) if val > 300 else val, 1)
-        except ValueError:
-            continue
-    return None
-
-def read_ram_info() -> dict:
-    p = Path("/proc/meminfo")
-    if not p.exists():
-        return {"total_mb": 0, "used_mb": 0, "free_mb": 0}
-
-    total_kb = 0
-    available_kb = 0
-    for ln in p.read_text(errors="ignore").splitlines():
-        if ln.startswith("MemTotal:"):
-            parts = ln.split()
-            if len(parts) >= 2 and parts[1].isdigit():
-                total_kb = int(parts[1])
-        elif ln.startswith("MemAvailable:"):
-            parts = ln.split()
-            if len(parts) >= 2 and parts[1].isdigit():
-                available_kb = int(parts[1])
-
-    used_kb = max(total_kb - available_kb, 0)
-    return {
-        "total_mb": round(total_kb / 1024, 1),
-        "used_mb": round(used_kb / 1024, 1),
-        "free_mb": round(available_kb / 1024, 1),
-    }
-
-def read_storage_info() -> dict:
-    try:
-        total, used, free = shutil.disk_usage("/")
-    except Exception:
-        return {"total_gb": 0, "used_gb": 0, "free_gb": 0}
-
-    gb = 1024 * 1024 * 1024
-    return {
-        "total_gb": round(total / gb, 1),
-        "used_gb": round(used / gb, 1),
-        "free_gb": round(free / gb, 1),
-    }
-
-def read_network_interfaces() -> list[dict]:
-    net_dir = Path("/sys/class/net")
-    if not net_dir.exists():
-        return []
-
-    result = []
-    for iface_path in sorted(net_dir.iterdir()):
-        iface = iface_path.name
-        if iface == "lo":
-            continue
-        mac = (iface_path / "address").read_text(errors="ignore").strip() if (iface_path / "address").exists() else ""
-        state = (iface_path / "operstate").read_text(errors="ignore").strip() if (iface_path / "operstate").exists() else ""
-        result.append({
-            "name": iface,
-            "mac": mac,
-            "state": state,
-            "ipv4": get_iface_ipv4(iface),
-        })
-    return result
-
-def get_system_summary() -> dict:
-    return {
-        "os": read_os_info(),
-        "kernel": platform.release(),
-        "cpu": read_cpu_model(),
-        "temperature_c": read_cpu_temperature_c(),
-        "ram": read_ram_info(),
-        "storage": read_storage_info(),
-        "network_interfaces": read_network_interfaces(),
-    }
-
-def read_float_target(db, key: str, fallback: float) -> float:
-    row = db.get(SystemTarget, key)
-    if not row:
-        return fallback
-    try:
-        return float(row.value)
-    except (TypeError, ValueError):
-        return fallback
-
-def get_temp_thresholds(db) -> dict:
-    warn = read_float_target(db, "cpu_temp_warn_c", 60.0)
-    critical = read_float_target(db, "cpu_temp_critical_c", 75.0)
-    # Keep deterministic ordering even if DB values are inverted.
-    if warn >= critical:
-        warn, critical = 60.0, 75.0
-    return {"warn_c": warn, "critical_c": critical}
+class TracingUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    slow_request_ms: Optional[float] = Field(default=None, ge=0)
 
 class WanConnectReq(BaseModel):
     ssid: str = Field(min_length=1, max_length=64)
@@ -486,66 +203,112 @@ class WanConnectReq(BaseModel):
     wait_sec: int = Field(default=20, ge=5, le=60)
 
 @app.get("/", response_class=HTMLResponse)
+@offload("fast")
 def dashboard_ui(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    page = get_index_page()
+    # Not fingerprinted, so revalidate every load; the ETag turns repeat loads into 304s.
+    encoding = assets.choose_encoding(request.headers.get("accept-encoding", ""), page.variants)
+    headers = {"ETag": page.etags[encoding], "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if page.not_modified(request.headers.get("if-none-match"), encoding):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(page.variants[encoding], media_type=page.media_type, headers=headers)
+
+
+@app.get(assets.ASSET_PREFIX + "/{path:path}")
+@offload("fast")
+def fingerprinted_asset(path: str, request: Request):
+    asset = assets.pipeline.lookup(path)
+    if asset is None:
+        return Response(status_code=404)
+    encoding = assets.choose_encoding(request.headers.get("accept-encoding", ""), asset.variants)
+    headers = {"Cache-Control": assets.IMMUTABLE_CACHE, "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return FileResponse(asset.variants[encoding], media_type=asset.media_type, headers=headers)
 
 
 @app.get("/api/summary")
-def dashboard():
-
-    db = SessionLocal()
-    try:
-        active = db.execute(select(Server).where(Server.is_active == True)).scalars().first()
-        temp_thresholds = get_temp_thresholds(db)
-    finally:
-        db.close()
-
-    clients = read_dnsmasq_leases()
-    named = [c for c in clients if c.get("hostname")]
-    route = get_default_route()
-
-    ap = get_hostapd_iface_and_ssid()
-    dhcp = get_dnsmasq_dhcp_info()
-
-    ap_iface = ap.get("ap_iface") or dhcp.get("dhcp_iface")
-    ap_ip_cidr = get_iface_ipv4(ap_iface)
-
-    return {
-        "ssid": ap.get("ssid") or get_ssid(),
-        "network": {
-            "wan_iface": route["wan_iface"],
-            "wan_ip": route["wan_ip"],
-            "gateway": route["gateway"],
-            "ap_iface": ap_iface,
-            "ap_ip": ap_ip_cidr,
-            "dhcp_range": dhcp.get("dhcp_range", ""),
-        },
-        "clients": {
-            "connected": len(clients),
-            "named": len(named),
-            "hostnames": [c["hostname"] for c in named][:10],
-        },
-        "dns": get_dns_resolv_conf(),
-        "system": {
-            **get_system_summary(),
-            "temperature_thresholds": temp_thresholds,
-        },
-        "services": {
-            "hostapd": get_service_active("hostapd"),
-            "dnsmasq": get_service_active("dnsmasq"),
-        },
-        "active_server": None if not active else {
-            "id": active.id,
-            "name": active.name,
-            "host": active.host,
-            "port": active.port,
-            "edition": active.edition,
-        },
-    }
+@offload("fast")
+def dashboard(request: Request, fields: Optional[str] = None):
+    # ?fields=active_server,clients runs only the collectors those sections need.
+    selected = parse_summary_fields(fields)
+    # With the snapshot subsystem, probing sections come from the shared copy (multi-worker)
+    # and are encoded once per snapshot version; Accept: application/msgpack gets MessagePack.
+    fmt = negotiate(request.headers.get("accept"))
+    return respond(request, body=encode_summary(getattr(request.app.state, "snapshot", None), selected, fmt), fmt=fmt)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+@offload("fast")
+def prometheus_metrics(request: Request):
+    # System gauges are sampled at scrape time from the same collector the dashboard uses.
+    snapshot = getattr(request.app.state, "snapshot", None)
+    data = snapshot.current() if snapshot is not None else None
+    system = data["system"] if data and "system" in data else get_system_summary()
+    body = metrics.render(extra=system_metric_families(system))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/debug/tracing")
+def get_tracing():
+    return tracing.settings.as_dict()
+
+@app.put("/api/debug/tracing")
+def set_tracing(payload: TracingUpdate):
+    if payload.enabled is not None:
+        tracing.settings.enabled = payload.enabled
+    if payload.slow_request_ms is not None:
+        tracing.settings.slow_request_ms = payload.slow_request_ms
+    logger.info("Tracing updated: %s", tracing.settings.as_dict())
+    return tracing.settings.as_dict()
+
+@app.get("/api/debug/startup")
+def get_startup_report():
+    return lifecycle.report.as_dict()
+
+@app.get("/api/debug/pools")
+def get_pools():
+    return {name: pool.status() for name, pool in executors.pools.items()}
 
 @app.get("/clients")
-def clients():
-    return {"clients": read_dnsmasq_leases()}
+async def clients(
+    request: Request,
+    hostname: str = "",
+    mac: str = "",
+    sort: str = "ip",
+    order: str = "asc",
+    limit: int = Query(default=pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+):
+    # ?hostname=/?mac= are prefix filters; pages continue with ?cursor=<next_cursor>.
+    if sort not in clients_service.SORT_FIELDS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(clients_service.SORT_FIELDS)}; order asc|desc")
+    try:
+        after = pagination.decode_cursor(cursor, sort, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if after is not None and not clients_service.valid_cursor_key(sort, after):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    index = clients_service.lease_index
+    page, next_key = await executors.pools["fast"].run(
+        index.page, sort, order, limit, after, hostname, mac
+    )
+    now = int(time.time())
+    rows = [clients_service.present(r, now) for r in page]
+    hostapd = getattr(request.app.state, "hostapd", None)
+    if hostapd is not None:
+        # Per-station radio stats from the hostapd subsystem, merged by MAC. Stations without
+        # a lease only show up once, on the last page of an unfiltered listing.
+        from backend.services.hostapd_service import merge_stations
+        last_unfiltered = next_key is None and not hostname and not mac
+        leased = await executors.pools["fast"].run(index.leased_macs) if last_unfiltered else None
+        rows = merge_stations(rows, await hostapd.get_stations(), include_unleased=last_unfiltered,
+                              leased_macs=leased)
+    return respond(request, {
+        "clients": rows,
+        "next_cursor": pagination.encode_cursor(sort, order, next_key) if next_key else None,
+    })
 
 
 @app.get("/ui")
@@ -557,10 +320,12 @@ def favicon():
     return Response(status_code=204)
 
 @app.get("/wan/networks")
+@offload("network")
 def wan_networks():
     return {"networks": wifi_scan_wlan0()}
 
 @app.get("/wan/status")
+@offload("network")
 def wan_status():
     route = get_default_route()
     return {
@@ -571,6 +336,7 @@ def wan_status():
 
 
 @app.post("/wan/connect")
+@offload("network")
 def wan_connect(req: WanConnectReq):
     # ⚠️ Usa el panel por LAN (192.168.50.1) para no perder sesión
     return connect_and_verify(req.ssid, req.password, wait_sec=req.wait_sec)
@@ -578,17 +344,6 @@ def wan_connect(req: WanConnectReq):
 
 
 @app.get("/wan/internet")
+@offload("network")
 def wan_internet():
-    # Usa tus helpers existentes (ping/dns_resolve)
-    internet_ip_ok = ping("1.1.1.1") or ping("8.8.8.8")
-    dns_ok = dns_resolve("one.one.one.one") or dns_resolve("google.com")
-    gw = get_default_route()["gateway"]
-    gw_ok = ping(gw) if gw else False
-
-    return {
-        "ok": bool(gw_ok and internet_ip_ok and dns_ok),
-        "gateway": gw,
-        "ping_ok": bool(internet_ip_ok),
-        "dns_ok": bool(dns_ok),
-        "gateway_ping_ok": bool(gw_ok),
-    }
+    return check_internet()
@@ -0,0 +1,123 @@
+# backend/routers/captive.py
+# Module: API Router for the captive portal (optional subsystem "captive")
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import HTMLResponse
+from pydantic import BaseModel, Field
+
+from backend.core import config
+from backend.core.executors import offload
+from backend.core.logging import get_logger
+from backend.services.captive_service import CaptivePortal
+from backend.services.network_service import get_hostapd_iface_and_ssid, get_iface_ipv4
+
+logger = get_logger("odoco.captive")
+
+router = APIRouter(tags=["captive"])
+
+PORTAL_PAGE = """<!doctype html>
+<html lang="es"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>ODOCO</title></head>
+<body style="font-family:sans-serif;text-align:center;padding:3em 1em">
+<h1>ODOCO</h1><p>Para usar internet en esta red, acepta y conecta.</p>
+<form method="post" action="/portal/accept"><button style="font-size:1.2em;padding:.6em 2em">Conectar</button></form>
+</body></html>"""
+
+ACCEPTED_PAGE = """<!doctype html>
+<html lang="es"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<title>ODOCO</title></head>
+<body style="font-family:sans-serif;text-align:center;padding:3em 1em">
+<h1>Conectado</h1><p>Ya puedes cerrar esta ventana.</p></body></html>"""
+
+
+async def start(app) -> None:
+    iface = config.CAPTIVE_IFACE or get_hostapd_iface_and_ssid().get("ap_iface") or "wlan1"
+    portal_url = config.CAPTIVE_PORTAL_URL
+    if not portal_url:
+        ap_ip = get_iface_ipv4(iface)
+        if not ap_ip:
+            logger.warning("Captive portal: no IPv4 on %s; set ODOCO_CAPTIVE_PORTAL_URL", iface)
+        portal_url = f"http://{ap_ip or '192.168.50.1'}:8000/portal"
+    app.state.captive = CaptivePortal(portal_url, iface, config.CAPTIVE_PORT, config.CAPTIVE_AUTH_TTL_S)
+    await app.state.captive.start()
+
+
+async def stop(app) -> None:
+    portal = getattr(app.state, "captive", None)
+    if portal is not None:
+        await portal.stop()
+
+
+def _portal(request: Request) -> CaptivePortal:
+    portal = getattr(request.app.state, "captive", None)
+    if portal is None:
+        raise HTTPException(status_code=503, detail="Captive portal not running")
+    return portal
+
+
+def _authorize(portal: CaptivePortal, ip: Optional[str], mac: Optional[str], ttl_s: Optional[int]) -> dict:
+    try:
+        return portal.authorize(ip, mac, ttl_s)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=f"nft: {e}")
+
+
+# =========================
+# GET /portal (page shown by the OS captive sheet)
+# =========================
+@router.get("/portal", response_class=HTMLResponse)
+def portal_page():
+    return HTMLResponse(PORTAL_PAGE, headers={"Cache-Control": "no-store"})
+
+
+# =========================
+# POST /portal/accept (the client authorizes itself)
+# =========================
+@router.post("/portal/accept", response_class=HTMLResponse)
+@offload("privileged")
+def portal_accept(request: Request):
+    _authorize(_portal(request), request.client.host if request.client else None, None, None)
+    return HTMLResponse(ACCEPTED_PAGE, headers={"Cache-Control": "no-store"})
+
+
+# =========================
+# GET /captive
+# =========================
+@router.get("/captive")
+@offload("db")
+def captive_status(request: Request):
+    return _portal(request).status()
+
+
+# =========================
+# POST /captive/authorize
+# =========================
+class CaptiveAuthorize(BaseModel):
+    ip: Optional[str] = None
+    mac: Optional[str] = None
+    ttl_s: Optional[int] = Field(default=None, ge=60, le=30 * 86400)
+
+
+@router.post("/captive/authorize")
+@offload("privileged")
+def captive_authorize(request: Request, payload: CaptiveAuthorize):
+    return _authorize(_portal(request), payload.ip, payload.mac, payload.ttl_s)
+
+
+# =========================
+# DELETE /captive/authorize/{key} (key = MAC or IP)
+# =========================
+@router.delete("/captive/authorize/{key}")
+@offload("privileged")
+def captive_revoke(request: Request, key: str):
+    try:
+        deleted = _portal(request).revoke(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Not authorized")
+    return {"revoked": key}
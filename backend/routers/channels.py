@@ -0,0 +1,76 @@
+# backend/routers/channels.py
+# Module: API Router for AP channel congestion scores and switching (optional subsystem "channels")
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from backend.core import config, lifecycle
+from backend.services.channel_service import ChannelPlanner
+
+router = APIRouter(prefix="/wan/channels", tags=["wan"])
+
+
+async def start(app) -> None:
+    app.state.channels = ChannelPlanner(
+        scan_interval_s=config.CHANNEL_SCAN_INTERVAL_S,
+        window_s=config.CHANNEL_WINDOW_S,
+        candidates={"2.4": config.CHANNEL_CANDIDATES_2G, "5": config.CHANNEL_CANDIDATES_5G},
+        min_gain=config.CHANNEL_MIN_GAIN,
+        auto_apply=config.CHANNEL_AUTO_APPLY,
+        switch_min_interval_s=config.CHANNEL_SWITCH_MIN_INTERVAL_S,
+        # Switching and the live channel come from the "hostapd" subsystem's control socket.
+        hostapd=lambda: getattr(app.state, "hostapd", None),
+    )
+    await app.state.channels.start()
+
+
+async def stop(app) -> None:
+    planner = getattr(app.state, "channels", None)
+    if planner is not None:
+        await planner.stop()
+
+
+def _planner(request: Request) -> ChannelPlanner:
+    planner = getattr(request.app.state, "channels", None)
+    if planner is None:
+        lifecycle.check_standby("channels")
+        raise HTTPException(status_code=503, detail="Channel planner not running")
+    return planner
+
+
+# =========================
+# GET /wan/channels (?rescan=true forces a wlan0 scan first)
+# =========================
+@router.get("")
+async def wan_channels(request: Request, rescan: bool = False):
+    planner = _planner(request)
+    if rescan or not planner.report:
+        await planner.refresh(rescan=rescan)
+    return planner.report
+
+
+# =========================
+# POST /wan/channels/apply (CSA; defaults to the recommended channel)
+# =========================
+class ChannelApply(BaseModel):
+    channel: Optional[int] = Field(default=None, ge=1, le=233)
+
+
+@router.post("/apply")
+async def wan_channels_apply(request: Request, payload: ChannelApply):
+    planner = _planner(request)
+    channel = payload.channel
+    if channel is None:
+        rec = (planner.report or await planner.refresh()).get("recommendation")
+        if not rec:
+            raise HTTPException(status_code=409, detail="No recommendation yet")
+        channel = rec["channel"]
+    try:
+        switched = await planner.switch(channel)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"switch": switched, "channels": await planner.refresh()}
@@ -0,0 +1,67 @@
+# backend/routers/client_history.py
+# Module: API Router for client join/leave history (optional subsystem "lease_history")
+
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.core.executors import offload
+from backend.core.logging import get_logger
+from backend.services import lease_history_service
+from backend.services.lease_history_service import LeaseHistory
+
+logger = get_logger("odoco.lease_history")
+
+router = APIRouter(prefix="/clients/history", tags=["clients"])
+
+MAX_BUCKETS = 2000
+
+
+async def start(app) -> None:
+    app.state.lease_history = LeaseHistory()
+    await app.state.lease_history.start()
+
+
+async def stop(app) -> None:
+    history = getattr(app.state, "lease_history", None)
+    if history is not None:
+        await history.stop()
+
+
+# =========================
+# GET /clients/history
+# =========================
+@router.get("")
+@offload("db")
+def client_history(
+    mac: Optional[str] = None,
+    since: Optional[int] = Query(default=None, description="epoch seconds"),
+    until: Optional[int] = Query(default=None, description="epoch seconds"),
+    limit: int = Query(default=200, ge=1, le=5000),
+):
+    try:
+        events = lease_history_service.query_history(mac, since, until, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"events": events}
+
+
+# =========================
+# GET /clients/history/concurrency
+# =========================
+@router.get("/concurrency")
+@offload("db")
+def client_concurrency(
+    since: Optional[int] = Query(default=None, description="epoch seconds (default: 24h ago)"),
+    until: Optional[int] = Query(default=None, description="epoch seconds (default: now)"),
+    bucket: int = Query(default=3600, ge=60, description="bucket size in seconds"),
+):
+    now = int(time.time())
+    until = until or now
+    since = since if since is not None else until - 86400
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if (until - since) // bucket > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Too many buckets (max {MAX_BUCKETS}); use a larger bucket")
+    return lease_history_service.query_concurrency(since, until, bucket)
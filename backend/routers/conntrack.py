@@ -0,0 +1,36 @@
+# backend/routers/conntrack.py
+# Module: API Router for live client connections and top talkers (conntrack)
+
+import ipaddress
+
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.core.executors import offload
+from backend.services import conntrack_service
+
+router = APIRouter(tags=["conntrack"])
+
+
+# =========================
+# GET /clients/{ip}/connections
+# =========================
+@router.get("/clients/{ip}/connections")
+@offload("privileged")
+def client_connections(ip: str, limit: int = Query(default=50, ge=1, le=500)):
+    try:
+        ipaddress.ip_address(ip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid IP address: {ip}")
+    return conntrack_service.client_connections(ip, limit=limit)
+
+
+# =========================
+# GET /network/top-talkers
+# =========================
+@router.get("/network/top-talkers")
+@offload("privileged")
+def top_talkers(
+    limit: int = Query(default=10, ge=1, le=100),
+    flows: int = Query(default=10, ge=0, le=100),
+):
+    return conntrack_service.top_talkers(limit=limit, flows_limit=flows)
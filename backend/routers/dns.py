@@ -0,0 +1,59 @@
+# backend/routers/dns.py
+# Module: API Router for DNS query analytics (optional subsystem "dns_log")
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from backend.core import config, lifecycle
+from backend.core.executors import offload
+from backend.services.dns_log_service import WINDOWS, DnsLogAnalytics
+from backend.services.network_service import read_dnsmasq_leases
+
+router = APIRouter(prefix="/dns", tags=["dns"])
+
+
+async def start(app) -> None:
+    app.state.dns_log = DnsLogAnalytics(config.DNS_LOG_PATH, config.DNS_LOG_POLL_S,
+                                        int(config.DNS_LOG_BACKFILL_MB * 1024 * 1024))
+    await app.state.dns_log.start()
+
+
+async def stop(app) -> None:
+    analytics = getattr(app.state, "dns_log", None)
+    if analytics is not None:
+        await analytics.stop()
+
+
+def _analytics(request: Request) -> DnsLogAnalytics:
+    analytics = getattr(request.app.state, "dns_log", None)
+    if analytics is None:
+        lifecycle.check_standby("dns_log")
+        raise HTTPException(status_code=503, detail="DNS log analytics not running")
+    return analytics
+
+
+# =========================
+# GET /dns/top?window=1h
+# =========================
+@router.get("/top")
+@offload("fast")
+def dns_top(
+    request: Request,
+    window: str = Query(default="1h", description=", ".join(WINDOWS)),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    try:
+        result = _analytics(request).top(window, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    hostnames = {lease.get("ip"): lease.get("hostname") for lease in read_dnsmasq_leases()}
+    for client in result["clients"]:
+        client["hostname"] = hostnames.get(client["ip"]) or ""
+    return result
+
+
+# =========================
+# GET /dns/status
+# =========================
+@router.get("/status")
+def dns_status(request: Request):
+    return _analytics(request).status()
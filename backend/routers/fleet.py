@@ -0,0 +1,50 @@
+# backend/routers/fleet.py
+# Module: API Router for the fleet aggregator (optional subsystem "fleet")
+
+from fastapi import APIRouter, HTTPException, Request
+
+from backend.core import config
+from backend.core.logging import get_logger
+from backend.services.fleet_service import FleetAggregator, parse_node_specs
+
+logger = get_logger("odoco.fleet")
+
+router = APIRouter(prefix="/fleet", tags=["fleet"])
+
+
+async def start(app) -> None:
+    nodes = parse_node_specs(config.FLEET_NODES)
+    if not nodes:
+        logger.warning("Fleet subsystem enabled but ODOCO_FLEET_NODES is empty")
+    app.state.fleet = FleetAggregator(
+        nodes,
+        interval_s=config.FLEET_POLL_INTERVAL_S,
+        node_timeout_s=config.FLEET_NODE_TIMEOUT_S,
+    )
+    await app.state.fleet.start()
+    logger.info("Fleet aggregator polling %d nodes", len(nodes))
+
+
+async def stop(app) -> None:
+    fleet = getattr(app.state, "fleet", None)
+    if fleet is not None:
+        await fleet.stop()
+
+
+def get_fleet(request: Request) -> FleetAggregator:
+    fleet = getattr(request.app.state, "fleet", None)
+    if fleet is None:
+        raise HTTPException(status_code=503, detail="Fleet aggregator not running")
+    return fleet
+
+
+# =========================
+# GET /fleet/summary
+# =========================
+@router.get("/summary")
+async def fleet_summary(request: Request, refresh: bool = False):
+    fleet = get_fleet(request)
+    if refresh:
+        # Bounded by the per-node timeout; dead nodes are skipped by their open circuit.
+        await fleet.poll_all()
+    return fleet.view()
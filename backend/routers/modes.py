@@ -4,6 +4,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import select, update
+from backend.core.executors import offload
 from backend.db.session import SessionLocal
 from backend.db.models import Mode
 from typing import List
@@ -15,6 +16,7 @@ router = APIRouter(prefix="/api", tags=["modes"])
 # GET /api/modes
 # =========================
 @router.get("/modes")
+@offload("db")
 def get_modes():
     with SessionLocal() as db:
         modes = db.execute(select(Mode)).scalars().all()
@@ -34,6 +36,7 @@ def get_modes():
 # GET /api/mode (modo actual)
 # =========================
 @router.get("/mode")
+@offload("db")
 def get_current_mode():
     with SessionLocal() as db:
         mode = db.execute(
@@ -62,6 +65,7 @@ class ModeUpdate(BaseModel):
 
 
 @router.post("/mode")
+@offload("db")
 def set_current_mode(payload: ModeUpdate):
     with SessionLocal() as db:
 
@@ -0,0 +1,51 @@
+# backend/routers/proxy.py
+# Module: API Router for the caching forward proxy (optional subsystem "proxy")
+
+from fastapi import APIRouter, HTTPException, Request
+
+from backend.core import config, executors
+from backend.services.proxy_cache import DiskCache
+from backend.services.proxy_service import ForwardProxy
+
+router = APIRouter(tags=["proxy"])
+
+
+async def start(app) -> None:
+    cache = DiskCache(config.PROXY_CACHE_DIR, int(config.PROXY_CACHE_MAX_MB * 1024 * 1024),
+                      int(config.PROXY_MAX_OBJECT_MB * 1024 * 1024))
+    app.state.proxy = ForwardProxy(cache, config.PROXY_LISTEN, config.PROXY_PORT, config.PROXY_ALLOW,
+                                   config.PROXY_STALE_MODES, config.PROXY_STALE_IF_ERROR)
+    await app.state.proxy.start()
+
+
+async def stop(app) -> None:
+    proxy = getattr(app.state, "proxy", None)
+    if proxy is not None:
+        await proxy.stop()
+
+
+def _proxy(request: Request) -> ForwardProxy:
+    proxy = getattr(request.app.state, "proxy", None)
+    if proxy is None:
+        raise HTTPException(status_code=503, detail="Proxy not running")
+    return proxy
+
+
+# =========================
+# GET /proxy
+# =========================
+@router.get("/proxy")
+async def proxy_status(request: Request):
+    return _proxy(request).status()
+
+
+# =========================
+# DELETE /proxy/cache
+# =========================
+@router.delete("/proxy/cache")
+async def proxy_purge(request: Request):
+    proxy = _proxy(request)
+    if proxy.role != "server":
+        # The cache index lives in the worker that serves; retry until the request lands there.
+        raise HTTPException(status_code=409, detail="Proxy is served by another worker")
+    return {"purged": await executors.pools["disk"].run(proxy.cache.purge)}
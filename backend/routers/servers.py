@@ -1,26 +1,62 @@
 # backend/routers/servers.py
 # Module: API Router for Server management
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, update
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
+from ..core import pagination
+from ..core.encoding import respond, row_serializer
+from ..core.executors import offload
 from ..db.deps import get_db
 from ..db.models import Server
+from ..schemas.common import Edition
 from ..schemas.servers import ServerCreate, ServerUpdate, ServerOut  # ✅ aquí
+from ..services import servers_service
 
 router = APIRouter(prefix="/servers", tags=["servers"])
 
+server_row = row_serializer(ServerOut.model_fields)
+
 
 @router.get("", response_model=list[ServerOut])
-def list_servers(db: Session = Depends(get_db)):
-    rows = db.execute(
-        select(Server).order_by(Server.is_active.desc(), Server.id.asc())
-    ).scalars().all()
-    return rows
+@offload("db")
+def list_servers(
+    request: Request,
+    edition: Optional[Edition] = None,
+    active: Optional[bool] = None,
+    name: Optional[str] = Query(default=None, description="name prefix"),
+    sort: str = "active",
+    order: Optional[str] = None,
+    limit: int = Query(default=pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # The body stays a plain list; the next page's cursor travels in X-Next-Cursor.
+    if sort not in servers_service.SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(servers_service.SORT_COLUMNS)}")
+    order = order or servers_service.default_order(sort)
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    try:
+        after = pagination.decode_cursor(cursor, sort, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if after is not None and (len(after) != 2 or not isinstance(after[0], (str, int))
+                              or not isinstance(after[1], int)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows, next_key = servers_service.list_page(db, sort, order, limit, after, edition, active, name)
+    headers = {"X-Next-Cursor": pagination.encode_cursor(sort, order, next_key)} if next_key is not None else None
+    # Rows come straight from SQLite: serialize them directly instead of re-validating
+    # every one through ServerOut (still the documented response_model).
+    return respond(request, [server_row(s) for s in rows], headers=headers)
 
 
 @router.post("", response_model=ServerOut)
+@offload("db")
 def create_server(payload: ServerCreate, db: Session = Depends(get_db)):
     s = Server(**payload.model_dump())
     db.add(s)
@@ -30,6 +66,7 @@ def create_server(payload: ServerCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/{server_id}", response_model=ServerOut)
+@offload("db")
 def update_server(server_id: int, payload: ServerUpdate, db: Session = Depends(get_db)):
     s = db.get(Server, server_id)
     if not s:
@@ -45,6 +82,7 @@ def update_server(server_id: int, payload: ServerUpdate, db: Session = Depends(g
 
 
 @router.delete("/{server_id}")
+@offload("db")
 def delete_server(server_id: int, db: Session = Depends(get_db)):
     s = db.get(Server, server_id)
     if not s:
@@ -55,6 +93,7 @@ def delete_server(server_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{server_id}/activate", response_model=ServerOut)
+@offload("db")
 def activate_server(server_id: int, db: Session = Depends(get_db)):
     s = db.get(Server, server_id)
     if not s:
@@ -0,0 +1,151 @@
+# backend/routers/shaping.py
+# Module: API Router for per-client bandwidth shaping (optional subsystem "shaping")
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from backend.core import config, lifecycle, privhelper
+from backend.core.executors import offload
+from backend.services import shaping_service
+from backend.services.network_service import get_hostapd_iface_and_ssid
+from backend.services.shaping_service import ShapingManager
+
+router = APIRouter(prefix="/shaping", tags=["shaping"])
+
+
+async def start(app) -> None:
+    ap_iface = config.SHAPING_AP_IFACE or get_hostapd_iface_and_ssid().get("ap_iface") or "wlan1"
+    # The sudo fallback validates tc_batch in this process, against the same interfaces.
+    privhelper.TC_DEVICES.update({ap_iface, config.SHAPING_WAN_IFACE})
+    app.state.shaping = ShapingManager(ap_iface, config.SHAPING_WAN_IFACE, interval_s=config.SHAPING_INTERVAL_S)
+    await app.state.shaping.start()
+
+
+async def stop(app) -> None:
+    manager = getattr(app.state, "shaping", None)
+    if manager is not None:
+        await manager.stop()
+
+
+def _manager(request: Request) -> ShapingManager:
+    manager = getattr(request.app.state, "shaping", None)
+    if manager is None:
+        lifecycle.check_standby("shaping")
+        raise HTTPException(status_code=503, detail="Shaping not running")
+    return manager
+
+
+# =========================
+# GET /shaping
+# =========================
+@router.get("")
+def shaping_status(request: Request):
+    return _manager(request).status()
+
+
+# =========================
+# PUT /shaping/override (benchmark mode: force on/off, null = follow the mode profile)
+# =========================
+class ShapingOverride(BaseModel):
+    enabled: Optional[bool] = None
+    # Required (> 0) when enabled is true.
+    wan_down_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    wan_up_kbit: int = Field(default=0, ge=0, le=10_000_000)
+
+
+@router.put("/override")
+def shaping_override(request: Request, payload: ShapingOverride):
+    manager = _manager(request)
+    try:
+        manager.set_override(payload.enabled, payload.wan_down_kbit, payload.wan_up_kbit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"override": manager.override, **manager.override_rates}
+
+
+# =========================
+# GET /shaping/stats (tc -s per interface)
+# =========================
+@router.get("/stats")
+@offload("privileged")
+def shaping_stats(request: Request):
+    return _manager(request).stats()
+
+
+# =========================
+# Profiles per mode
+# =========================
+class ShapingProfile(BaseModel):
+    enabled: bool = True
+    qdisc: str = "cake"
+    wan_down_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    wan_up_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    client_down_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    client_up_kbit: int = Field(default=0, ge=0, le=10_000_000)
+
+
+@router.get("/profiles")
+@offload("db")
+def shaping_profiles():
+    return {"profiles": shaping_service.list_profiles()}
+
+
+@router.put("/profiles/{mode_id}")
+@offload("db")
+def shaping_profile_update(request: Request, mode_id: int, payload: ShapingProfile):
+    try:
+        shaping_service.save_profile(mode_id, payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _manager(request).kick()
+    return {"mode_id": mode_id, **payload.model_dump()}
+
+
+@router.delete("/profiles/{mode_id}")
+@offload("db")
+def shaping_profile_delete(request: Request, mode_id: int):
+    if not shaping_service.delete_profile(mode_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    _manager(request).kick()
+    return {"deleted": mode_id}
+
+
+# =========================
+# Limits per client (MAC)
+# =========================
+class ClientLimit(BaseModel):
+    down_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    up_kbit: int = Field(default=0, ge=0, le=10_000_000)
+    note: str = Field(default="", max_length=120)
+
+
+@router.get("/limits")
+@offload("db")
+def shaping_limits():
+    return {"limits": shaping_service.list_limits()}
+
+
+@router.put("/limits/{mac}")
+@offload("db")
+def shaping_limit_update(request: Request, mac: str, payload: ClientLimit):
+    try:
+        mac = shaping_service.save_limit(mac, payload.down_kbit, payload.up_kbit, payload.note)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _manager(request).kick()
+    return {"mac": mac, **payload.model_dump()}
+
+
+@router.delete("/limits/{mac}")
+@offload("db")
+def shaping_limit_delete(request: Request, mac: str):
+    try:
+        deleted = shaping_service.delete_limit(mac)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Limit not found")
+    _manager(request).kick()
+    return {"deleted": mac}
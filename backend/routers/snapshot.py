@@ -0,0 +1,31 @@
+# backend/routers/snapshot.py
+# Module: API Router for the shared summary snapshot (optional subsystem "snapshot")
+
+from fastapi import APIRouter, HTTPException, Request
+
+from backend.core import config
+from backend.services.snapshot_service import SummarySnapshot
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+async def start(app) -> None:
+    app.state.snapshot = SummarySnapshot(config.SNAPSHOT_PATH, interval_s=config.SNAPSHOT_INTERVAL_S)
+    await app.state.snapshot.start()
+
+
+async def stop(app) -> None:
+    snap = getattr(app.state, "snapshot", None)
+    if snap is not None:
+        await snap.stop()
+
+
+# =========================
+# GET /api/debug/snapshot
+# =========================
+@router.get("/snapshot")
+def snapshot_status(request: Request):
+    snap = getattr(request.app.state, "snapshot", None)
+    if snap is None:
+        raise HTTPException(status_code=503, detail="snapshot subsystem not running")
+    return snap.status()
@@ -0,0 +1,169 @@
+# backend/routers/speedtest.py
+# Module: API Router for throughput/latency tests (optional subsystem "speedtest")
+
+import time
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from backend.core import assets, config, lifecycle
+from backend.core.executors import offload
+from backend.services import speedtest_service
+from backend.services.speedtest_service import KINDS, SpeedTestManager, TestSession
+
+router = APIRouter(prefix="/speedtest", tags=["speedtest"])
+
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+async def start(app) -> None:
+    app.state.speedtest = SpeedTestManager(config.SPEEDTEST_PORT, config.SPEEDTEST_MAX_MBIT,
+                                           config.SPEEDTEST_MAX_DURATION_S, config.SPEEDTEST_WAN_URL)
+    await app.state.speedtest.start()
+
+
+async def stop(app) -> None:
+    manager = getattr(app.state, "speedtest", None)
+    if manager is not None:
+        await manager.stop()
+
+
+def _manager(request: Request) -> SpeedTestManager:
+    manager = getattr(request.app.state, "speedtest", None)
+    if manager is None:
+        lifecycle.check_standby("speedtest")
+        raise HTTPException(status_code=503, detail="Speed test not running")
+    return manager
+
+
+def _session(request: Request, session_id: str, active: bool = False) -> TestSession:
+    session = _manager(request).get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown session")
+    if active and not session.active:
+        raise HTTPException(status_code=410, detail="Session finished")
+    return session
+
+
+@lru_cache(maxsize=1)
+def get_page() -> assets.PrecompressedPage:
+    from backend.main import get_templates
+    html = get_templates().get_template("speedtest.html").render()
+    return assets.PrecompressedPage(html.encode("utf-8"))
+
+
+# =========================
+# GET /speedtest (browser test page)
+# =========================
+@router.get("", response_class=HTMLResponse)
+@offload("fast")
+def speedtest_page(request: Request):
+    page = get_page()
+    encoding = assets.choose_encoding(request.headers.get("accept-encoding", ""), page.variants)
+    headers = {"ETag": page.etags[encoding], "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if page.not_modified(request.headers.get("if-none-match"), encoding):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(page.variants[encoding], media_type=page.media_type, headers=headers)
+
+
+# =========================
+# POST /speedtest/sessions
+# =========================
+class SessionCreate(BaseModel):
+    kind: str = Field(default="lan", description=", ".join(KINDS))
+    duration_s: Optional[float] = Field(default=None, ge=2, le=300)
+    max_mbit: Optional[float] = Field(default=None, gt=0)
+
+
+@router.post("/sessions", status_code=201)
+async def open_session(request: Request, payload: SessionCreate):
+    client_ip = request.client.host if request.client else ""
+    try:
+        session = _manager(request).open(payload.kind, payload.duration_s, payload.max_mbit, client_ip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**session.to_dict(), "port": _manager(request).port}
+
+
+# =========================
+# GET / DELETE /speedtest/sessions/{id}
+# =========================
+@router.get("/sessions/{session_id}")
+async def get_session(request: Request, session_id: str):
+    return _session(request, session_id).to_dict()
+
+
+@router.delete("/sessions/{session_id}")
+async def cancel_session(request: Request, session_id: str):
+    _session(request, session_id)
+    return _manager(request).cancel(session_id).to_dict()
+
+
+# =========================
+# POST /speedtest/sessions/{id}/result (what the client measured)
+# =========================
+class ResultIn(BaseModel):
+    down_mbit: Optional[float] = Field(default=None, ge=0)
+    up_mbit: Optional[float] = Field(default=None, ge=0)
+    rtt_idle_ms: Optional[float] = Field(default=None, ge=0)
+    rtt_loaded_ms: Optional[float] = Field(default=None, ge=0)
+    rtt_loaded_p95_ms: Optional[float] = Field(default=None, ge=0)
+    loss: Optional[float] = Field(default=None, ge=0, le=1)
+    detail: dict = Field(default_factory=dict)
+
+
+@router.post("/sessions/{session_id}/result")
+async def post_result(request: Request, session_id: str, payload: ResultIn):
+    session = _session(request, session_id)
+    if session.kind == "wan":
+        raise HTTPException(status_code=400, detail="WAN results are measured by the router")
+    measured = {**payload.detail, **payload.model_dump(exclude={"detail"})}
+    try:
+        return await _manager(request).finish(session, measured)
+    except ValueError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+
+# =========================
+# GET /speedtest/ping (RTT probe, never cached, never rate-capped)
+# =========================
+@router.get("/ping")
+async def ping():
+    return Response(str(time.time()), media_type="text/plain", headers=NO_STORE)
+
+
+# =========================
+# GET /speedtest/download?session=&bytes= (source)
+# =========================
+@router.get("/download")
+async def download(request: Request, session: str, bytes: int = Query(default=1 << 30, ge=1)):
+    test = _session(request, session, active=True)
+    return StreamingResponse(_manager(request).source(test, bytes), media_type="application/octet-stream",
+                             headers=NO_STORE)
+
+
+# =========================
+# POST /speedtest/upload?session= (sink)
+# =========================
+@router.post("/upload")
+async def upload(request: Request, session: str):
+    test = _session(request, session, active=True)
+    t0 = time.monotonic()
+    received = await _manager(request).sink(test, request.stream())
+    return {"bytes": received, "seconds": round(time.monotonic() - t0, 3)}
+
+
+# =========================
+# GET /speedtest/results
+# =========================
+@router.get("/results")
+@offload("db")
+def results(kind: Optional[str] = None, limit: int = Query(default=50, ge=1, le=500)):
+    return {"results": speedtest_service.list_results(kind, limit)}
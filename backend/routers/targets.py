@@ -4,6 +4,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from ..core.executors import offload
 from ..db.deps import get_db
 from ..db.models import SystemTarget
 from ..schemas.targets import TargetOut, TargetUpdate  # ✅ corregido
@@ -12,6 +13,7 @@ router = APIRouter(prefix="/targets", tags=["targets"])
 
 
 @router.get("/{key}", response_model=TargetOut)
+@offload("db")
 def get_target(key: str, db: Session = Depends(get_db)):
     t = db.get(SystemTarget, key)
     if not t:
@@ -20,6 +22,7 @@ def get_target(key: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{key}", response_model=TargetOut)
+@offload("db")
 def set_target(key: str, payload: TargetUpdate, db: Session = Depends(get_db)):
     t = db.get(SystemTarget, key)
     if not t:
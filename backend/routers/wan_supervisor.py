@@ -0,0 +1,55 @@
+# backend/routers/wan_supervisor.py
+# Module: API Router for the WAN auto-reconnect supervisor (optional subsystem "wan_supervisor")
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+
+from backend.core import config, lifecycle
+from backend.services.wan_supervisor_service import WanSupervisor
+
+router = APIRouter(prefix="/wan/supervisor", tags=["wan"])
+
+
+async def start(app) -> None:
+    app.state.wan_supervisor = WanSupervisor(
+        iface=config.WAN_IFACE,
+        grace_s=config.WAN_GRACE_S,
+        backoff_max_s=config.WAN_BACKOFF_MAX_S,
+    )
+    await app.state.wan_supervisor.start()
+
+
+async def stop(app) -> None:
+    sup = getattr(app.state, "wan_supervisor", None)
+    if sup is not None:
+        await sup.stop()
+
+
+def _supervisor(request: Request) -> WanSupervisor:
+    sup = getattr(request.app.state, "wan_supervisor", None)
+    if sup is None:
+        lifecycle.check_standby("wan_supervisor")
+        raise HTTPException(status_code=503, detail="WAN supervisor not running")
+    return sup
+
+
+# =========================
+# GET /wan/supervisor
+# =========================
+@router.get("")
+def wan_supervisor_status(request: Request):
+    return _supervisor(request).status()
+
+
+# =========================
+# PUT /wan/supervisor (auto-reconnect on/off)
+# =========================
+class SupervisorUpdate(BaseModel):
+    enabled: bool
+
+
+@router.put("")
+def wan_supervisor_update(request: Request, payload: SupervisorUpdate):
+    sup = _supervisor(request)
+    sup.set_enabled(payload.enabled)
+    return sup.status()
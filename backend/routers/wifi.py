@@ -0,0 +1,44 @@
+# backend/routers/wifi.py
+# Module: API Router for per-station Wi-Fi stats (optional subsystem "hostapd")
+
+from fastapi import APIRouter, HTTPException, Request
+
+from backend.core import config
+from backend.core.logging import get_logger
+from backend.services.hostapd_service import HostapdControl
+from backend.services.network_service import get_hostapd_iface_and_ssid
+
+logger = get_logger("odoco.hostapd")
+
+router = APIRouter(prefix="/wifi", tags=["wifi"])
+
+
+async def start(app) -> None:
+    iface = config.HOSTAPD_IFACE or get_hostapd_iface_and_ssid().get("ap_iface")
+    if not iface:
+        logger.warning("hostapd subsystem enabled but no AP interface found in hostapd.conf")
+        return
+    app.state.hostapd = HostapdControl(iface, ctrl_dir=config.HOSTAPD_CTRL_DIR)
+    await app.state.hostapd.start()
+
+
+async def stop(app) -> None:
+    ctrl = getattr(app.state, "hostapd", None)
+    if ctrl is not None:
+        await ctrl.stop()
+
+
+# =========================
+# GET /wifi/stations
+# =========================
+@router.get("/stations")
+async def wifi_stations(request: Request):
+    ctrl = getattr(request.app.state, "hostapd", None)
+    if ctrl is None:
+        raise HTTPException(status_code=503, detail="hostapd control client not running")
+    stations = await ctrl.get_stations()
+    return {
+        "iface": ctrl.iface,
+        "connected": ctrl.connected,
+        "stations": list(stations.values()),
+    }
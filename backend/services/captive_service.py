@@ -0,0 +1,369 @@
+# backend/services/captive_service.py
+# Module: Captive portal — precomputed HTTP responder plus nft-set based client authorization
+
+import asyncio
+import ipaddress
+import re
+import time
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.db.session import SessionLocal
+from backend.services.helper_client import run_privileged
+from backend.services.network_service import read_dnsmasq_leases
+
+logger = get_logger("odoco.captive")
+
+NFT_TABLE = "inet odoco_captive"
+MAX_HEADER_BYTES = 8192
+# Mirror of the nft sets is re-read from SQLite this often (other workers may authorize).
+MIRROR_REFRESH_S = 5.0
+
+_MAC_RE = re.compile(r"^[0-9a-f]{2}(:[0-9a-f]{2}){5}$")
+_IFACE_RE = re.compile(r"^[A-Za-z0-9_.-]{1,15}$")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS captive_auth (
+        key TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        ip TEXT NOT NULL DEFAULT '',
+        expires INTEGER NOT NULL
+    )
+    """,
+]
+
+CAPTIVE_REQUESTS_TOTAL = metrics.Counter(
+    "odoco_captive_requests_total",
+    "Requests answered by the captive responder (redirect, success, retry, bad).",
+    ("kind",),
+)
+CAPTIVE_AUTHORIZED = metrics.Gauge("odoco_captive_authorized", "Authorized captive portal entries.", ("kind",))
+
+# Connectivity-check URLs (host, path) -> what the OS expects once it is online. Unauthorized
+# clients get a redirect to the portal instead, which is what makes the OS open its portal sheet.
+_APPLE_SUCCESS = b"<HTML><HEAD><TITLE>Success</TITLE></HEAD><BODY>Success</BODY></HTML>"
+CHECK_URLS: dict[tuple[str, str], tuple[int, str, bytes]] = {
+    ("captive.apple.com", "/hotspot-detect.html"): (200, "text/html", _APPLE_SUCCESS),
+    ("captive.apple.com", "/"): (200, "text/html", _APPLE_SUCCESS),
+    ("www.apple.com", "/library/test/success.html"): (200, "text/html", _APPLE_SUCCESS),
+    ("connectivitycheck.gstatic.com", "/generate_204"): (204, "", b""),
+    ("connectivitycheck.android.com", "/generate_204"): (204, "", b""),
+    ("clients3.google.com", "/generate_204"): (204, "", b""),
+    ("www.google.com", "/gen_204"): (204, "", b""),
+    ("www.msftconnecttest.com", "/connecttest.txt"): (200, "text/plain", b"Microsoft Connect Test"),
+    ("www.msftncsi.com", "/ncsi.txt"): (200, "text/plain", b"Microsoft NCSI"),
+    ("detectportal.firefox.com", "/success.txt"): (200, "text/plain", b"success\n"),
+    ("nmcheck.gnome.org", "/check_network_status.txt"): (200, "text/plain", b"NetworkManager is online\n"),
+    ("connectivity-check.ubuntu.com", "/"): (204, "", b""),
+}
+
+_REASONS = {200: "OK", 204: "No Content", 302: "Found", 307: "Temporary Redirect", 400: "Bad Request"}
+
+
+def build_response(status: int, body: bytes = b"", content_type: str = "", keep_alive: bool = True,
+                   extra: Optional[dict] = None) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}", "Cache-Control: no-store"]
+    if content_type:
+        lines.append(f"Content-Type: {content_type}")
+    lines += [f"{k}: {v}" for k, v in (extra or {}).items()]
+    lines += [f"Content-Length: {len(body)}", "Connection: " + ("keep-alive" if keep_alive else "close")]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+# ---- authorization state (SQLite) ----
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+def load_authorized(now: Optional[int] = None) -> list[dict]:
+    now = int(time.time()) if now is None else now
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM captive_auth WHERE expires <= :now"), {"now": now})
+        db.commit()
+        rows = db.execute(text("SELECT key, kind, ip, expires FROM captive_auth ORDER BY expires")).all()
+    return [{"key": r.key, "kind": r.kind, "ip": r.ip, "expires": r.expires} for r in rows]
+
+
+def save_authorized(key: str, kind: str, ip: str, expires: int) -> None:
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT INTO captive_auth (key, kind, ip, expires) VALUES (:key, :kind, :ip, :expires) "
+            "ON CONFLICT(key) DO UPDATE SET ip = :ip, expires = :expires"
+        ), {"key": key, "kind": kind, "ip": ip, "expires": expires})
+        db.commit()
+
+
+def delete_authorized(key: str) -> bool:
+    with SessionLocal() as db:
+        deleted = db.execute(text("DELETE FROM captive_auth WHERE key = :key"), {"key": key}).rowcount
+        db.commit()
+    return bool(deleted)
+
+
+def normalize_client(ip: Optional[str] = None, mac: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
+    """Validated (ip, mac); these are interpolated into nft statements, so nothing else gets through."""
+    if ip:
+        addr = ipaddress.ip_address(ip.strip())  # ValueError on garbage
+        if addr.version != 4:
+            raise ValueError("only IPv4 clients are supported")
+        ip = str(addr)
+    if mac:
+        mac = mac.strip().lower().replace("-", ":")
+        if not _MAC_RE.match(mac):
+            raise ValueError("invalid MAC address")
+    return ip or None, mac or None
+
+
+def lease_for(ip: Optional[str] = None, mac: Optional[str] = None) -> Optional[dict]:
+    for lease in read_dnsmasq_leases():
+        if (ip and lease["ip"] == ip) or (mac and lease["mac"].lower() == mac):
+            return lease
+    return None
+
+
+# ---- nft ----
+def base_ruleset(lan_iface: str, port: int) -> str:
+    """Idempotent: `add` keeps existing sets and their elements, the chains are re-filled.
+    Authorized clients match a set (a hash lookup in the kernel) and leave the chain; the
+    rest get HTTP redirected to the responder and everything else forwarded is dropped."""
+    if not _IFACE_RE.match(lan_iface):
+        raise ValueError("invalid LAN interface")
+    t = NFT_TABLE
+    i = f'iifname "{lan_iface}"'
+    return "\n".join([
+        f"add table {t}",
+        f"add set {t} auth_mac {{ type ether_addr; flags timeout; }}",
+        f"add set {t} auth_ip {{ type ipv4_addr; flags timeout; }}",
+        f"add chain {t} prerouting {{ type nat hook prerouting priority -100; policy accept; }}",
+        f"add chain {t} forward {{ type filter hook forward priority 0; policy accept; }}",
+        f"flush chain {t} prerouting",
+        f"flush chain {t} forward",
+        f"add rule {t} prerouting {i} ether saddr @auth_mac accept",
+        f"add rule {t} prerouting {i} ip saddr @auth_ip accept",
+        f"add rule {t} prerouting {i} tcp dport 80 redirect to :{port}",
+        f"add rule {t} forward {i} ether saddr @auth_mac accept",
+        f"add rule {t} forward {i} ip saddr @auth_ip accept",
+        f"add rule {t} forward {i} drop",
+        "",
+    ])
+
+
+def element_statement(verb: str, kind: str, key: str, ttl_s: Optional[int] = None) -> str:
+    timeout = f" timeout {max(int(ttl_s), 1)}s" if ttl_s is not None else ""
+    return f"{verb} element {NFT_TABLE} auth_{kind} {{ {key}{timeout} }}\n"
+
+
+def nft_apply(ruleset: str) -> dict:
+    res = run_privileged("nft_apply", ruleset=ruleset)
+    if res["rc"] != 0:
+        logger.warning("nft apply failed (rc=%s): %s", res["rc"], res["stderr"])
+    return res
+
+
+# ---- responder ----
+class _ResponderProtocol(asyncio.Protocol):
+    __slots__ = ("portal", "transport", "peer_ip", "buf")
+
+    def __init__(self, portal: "CaptivePortal"):
+        self.portal = portal
+        self.transport = None
+        self.peer_ip = ""
+        self.buf = b""
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        peer = transport.get_extra_info("peername")
+        self.peer_ip = peer[0] if peer else ""
+
+    def data_received(self, data: bytes) -> None:
+        buf = self.buf + data if self.buf else data
+        # Requests may be pipelined on a keep-alive connection; answer each complete header block.
+        while True:
+            end = buf.find(b"\r\n\r\n")
+            if end < 0:
+                break
+            response, keep_alive = self.portal.respond(buf[:end], self.peer_ip)
+            self.transport.write(response)
+            buf = buf[end + 4:]
+            if not keep_alive:
+                self.transport.close()
+                return
+        if len(buf) > MAX_HEADER_BYTES:
+            self.transport.write(self.portal.bad_request)
+            CAPTIVE_REQUESTS_TOTAL.inc(kind="bad")
+            self.transport.close()
+            return
+        self.buf = buf
+
+
+class CaptivePortal:
+    """Connectivity checks from unauthorized clients get a precomputed 302 to the portal page.
+    A client that was just authorized can still hit the responder on an already-redirected
+    connection: it gets the success answer its OS expects (or a 307 back to the same URL)."""
+
+    def __init__(self, portal_url: str, lan_iface: str, port: int, auth_ttl_s: int, listen_host: str = "0.0.0.0"):
+        self.portal_url = portal_url
+        self.lan_iface = lan_iface
+        self.port = port
+        self.auth_ttl_s = auth_ttl_s
+        self.listen_host = listen_host
+        # ip -> expiry; authorized MACs are mirrored under their current lease IP.
+        self.authorized_ips: dict[str, int] = {}
+        self.nft_ok = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._precompute()
+
+    def _precompute(self) -> None:
+        location = {"Location": self.portal_url}
+        self.redirect = {ka: build_response(302, b"", "", ka, location) for ka in (True, False)}
+        self.success = {
+            key: {ka: build_response(status, body, ctype, ka) for ka in (True, False)}
+            for key, (status, ctype, body) in CHECK_URLS.items()
+        }
+        self.bad_request = build_response(400, b"", "", keep_alive=False)
+
+    # -- HTTP --
+    def respond(self, head: bytes, peer_ip: str) -> tuple[bytes, bool]:
+        lines = head.split(b"\r\n")
+        parts = lines[0].split(b" ")
+        if len(parts) != 3:
+            CAPTIVE_REQUESTS_TOTAL.inc(kind="bad")
+            return self.bad_request, False
+        method, target, version = parts
+        host = b""
+        keep_alive = version == b"HTTP/1.1"
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"host":
+                host = value.strip().lower()
+            elif name == b"connection":
+                value = value.strip().lower()
+                keep_alive = value == b"keep-alive" or (keep_alive and value != b"close")
+            elif name in (b"content-length", b"transfer-encoding"):
+                # Probes have no body; do not try to resync a stream that has one.
+                keep_alive = False
+        if target.startswith(b"http://"):
+            host, _, rest = target[7:].partition(b"/")
+            target = b"/" + rest
+        host_s = host.split(b":", 1)[0].decode("latin-1")
+        path = target.split(b"?", 1)[0].decode("latin-1")
+
+        expires = self.authorized_ips.get(peer_ip)
+        if expires is not None and expires > time.time():
+            answers = self.success.get((host_s, path))
+            if answers is not None:
+                response = answers[keep_alive]
+                kind = "success"
+            else:
+                # Retry the original URL on a new connection, which is no longer redirected.
+                url = f"http://{host_s}{target.decode('latin-1')}"
+                response = build_response(307, b"", "", keep_alive, {"Location": url})
+                kind = "retry"
+        else:
+            response = self.redirect[keep_alive]
+            kind = "redirect"
+        CAPTIVE_REQUESTS_TOTAL.inc(kind=kind)
+        if method == b"HEAD":
+            response = response[:response.index(b"\r\n\r\n") + 4]
+        return response, keep_alive
+
+    # -- lifecycle --
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await executors.pools["db"].run(init_schema)
+        # reuse_port: every uvicorn worker can run a responder on the same port.
+        self._server = await loop.create_server(lambda: _ResponderProtocol(self), self.listen_host, self.port,
+                                                reuse_port=True, backlog=1024)
+        await self.install()
+        self._task = asyncio.create_task(self._refresh_loop(), name="captive-mirror")
+        logger.info("Captive responder on %s:%d (lan=%s, portal=%s)", self.listen_host, self.port,
+                    self.lan_iface, self.portal_url)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # The nft table is left in place: other workers may still serve, and clients must not
+        # be let through just because the API restarted. Use disable() to remove it.
+
+    async def install(self) -> None:
+        """Base table/chains, then every persisted authorization with its remaining TTL."""
+        entries = await executors.pools["db"].run(load_authorized)
+        now = int(time.time())
+        ruleset = base_ruleset(self.lan_iface, self.port) + "".join(
+            element_statement("add", e["kind"], e["key"], e["expires"] - now) for e in entries
+        )
+        res = await executors.pools["privileged"].run(nft_apply, ruleset)
+        self.nft_ok = res["rc"] == 0
+        self._mirror(entries)
+
+    async def disable(self) -> None:
+        await executors.pools["privileged"].run(nft_apply, f"delete table {NFT_TABLE}\n")
+        self.nft_ok = False
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(MIRROR_REFRESH_S)
+            try:
+                self._mirror(await executors.pools["db"].run(load_authorized))
+            except Exception:
+                logger.exception("Captive mirror refresh failed")
+
+    def _mirror(self, entries: list[dict]) -> None:
+        ips = {e["ip"]: e["expires"] for e in entries if e["ip"]}
+        self.authorized_ips = ips
+        CAPTIVE_AUTHORIZED.set(sum(1 for e in entries if e["kind"] == "mac"), kind="mac")
+        CAPTIVE_AUTHORIZED.set(sum(1 for e in entries if e["kind"] == "ip"), kind="ip")
+
+    # -- authorization --
+    def authorize(self, ip: Optional[str] = None, mac: Optional[str] = None, ttl_s: Optional[int] = None) -> dict:
+        """Blocking (SQLite + nft); run on a pool. Prefers the MAC so a DHCP renumbering does
+        not log the client out; falls back to the IP when no lease is known."""
+        ip, mac = normalize_client(ip, mac)
+        if not ip and not mac:
+            raise ValueError("ip or mac is required")
+        lease = lease_for(ip, mac)
+        mac = mac or (lease["mac"].lower() if lease else None)
+        ip = ip or (lease["ip"] if lease else "")
+        kind, key = ("mac", mac) if mac else ("ip", ip)
+        ttl_s = ttl_s or self.auth_ttl_s
+        expires = int(time.time()) + ttl_s
+        # One element per call: the kernel set is updated in place, nothing is reloaded.
+        res = nft_apply(element_statement("add", kind, key, ttl_s))
+        if res["rc"] != 0:
+            raise RuntimeError(res["stderr"] or "nft apply failed")
+        save_authorized(key, kind, ip or "", expires)
+        self._mirror(load_authorized())
+        logger.info("Captive portal authorized %s=%s (ip=%s, ttl=%ss)", kind, key, ip, ttl_s)
+        return {"key": key, "kind": kind, "ip": ip, "expires": expires}
+
+    def revoke(self, key: str) -> bool:
+        ip, mac = normalize_client(None, key) if ":" in key or "-" in key else normalize_client(key, None)
+        key = mac or ip
+        kind = "mac" if mac else "ip"
+        # Fails harmlessly when the element already timed out in the kernel.
+        nft_apply(element_statement("delete", kind, key))
+        deleted = delete_authorized(key)
+        self._mirror(load_authorized())
+        return deleted
+
+    def status(self) -> dict:
+        return {
+            "port": self.port,
+            "lan_iface": self.lan_iface,
+            "portal_url": self.portal_url,
+            "nft_ok": self.nft_ok,
+            "authorized": load_authorized(),
+        }
@@ -0,0 +1,279 @@
+# backend/services/channel_service.py
+# Module: AP channel planning — scan-driven per-channel congestion scores and CSA channel switches
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.services import network_service
+from backend.services.hostapd_service import HostapdControl
+from backend.services.network_service import get_hostapd_iface_and_ssid, parse_kv_from_file, wifi_scan_wlan0
+
+logger = get_logger("odoco.channels")
+
+# 2.4 GHz channels are 5 MHz apart and 20 MHz wide: a neighbour up to 4 channels away
+# still shares part of the spectrum. Fraction of its airtime that reaches us, by distance.
+OVERLAP_2G = {0: 1.0, 1: 0.8, 2: 0.6, 3: 0.4, 4: 0.2}
+# nmcli SIGNAL (0-100) below this is under the carrier-sense threshold: it does not defer us.
+SIGNAL_FLOOR = 10
+SIGNAL_EWMA = 0.3
+# Scans needed in the window before a switch is recommended.
+MIN_SCANS = 3
+HISTORY_LEN = 288
+CS_COUNT = 5  # beacons announcing the switch before it happens
+
+CHANNEL_CONGESTION = metrics.Gauge(
+    "odoco_channel_congestion", "Weighted congestion score per Wi-Fi channel (scan-based).", ("band", "channel")
+)
+CHANNEL_SWITCHES_TOTAL = metrics.Counter(
+    "odoco_channel_switches_total", "AP channel switches requested through hostapd, by result.", ("result",)
+)
+
+
+def band_of(channel: int, freq_mhz: Optional[int] = None) -> str:
+    if freq_mhz:
+        return "2.4" if freq_mhz < 3000 else "6" if freq_mhz >= 5925 else "5"
+    return "2.4" if channel <= 14 else "5"
+
+
+def channel_freq(channel: int, band: str) -> int:
+    if band == "2.4":
+        return 2484 if channel == 14 else 2407 + 5 * channel
+    return (5950 if band == "6" else 5000) + 5 * channel
+
+
+def overlap(a: int, b: int, band: str) -> float:
+    # 5/6 GHz channel numbers are already 20 MHz apart: only co-channel neighbours count.
+    if band == "2.4":
+        return OVERLAP_2G.get(abs(a - b), 0.0)
+    return 1.0 if a == b else 0.0
+
+
+class _Bss:
+    __slots__ = ("bssid", "ssid", "channel", "freq_mhz", "band", "signal", "seen", "last_seen")
+
+    def __init__(self, row: dict, ts: float):
+        self.bssid = row["bssid"]
+        self.ssid = row.get("ssid", "")
+        self.channel = row["channel"]
+        self.freq_mhz = row.get("freq_mhz")
+        self.band = band_of(self.channel, self.freq_mhz)
+        self.signal = float(row.get("signal") or 0)
+        self.seen: deque[float] = deque()
+        self.last_seen = ts
+
+
+class ChannelPlanner:
+    """Keeps every BSSID heard by wlan0 scans over `window_s` and scores each channel of the
+    AP's band as the sum, over neighbours, of presence (share of scans it appeared in) x
+    signal x spectral overlap: roughly how many always-on, full-strength co-channel
+    networks we contend with for airtime. Any wlan0 scan feeds it (UI, WAN supervisor); it
+    only scans itself when none happened for `scan_interval_s`."""
+
+    def __init__(self, scan_interval_s: float, window_s: float, candidates: dict[str, list[int]],
+                 min_gain: float, auto_apply: bool = False, switch_min_interval_s: float = 21600.0,
+                 hostapd: Callable[[], Optional[HostapdControl]] = lambda: None):
+        self.scan_interval_s = scan_interval_s
+        self.window_s = window_s
+        self.candidates = candidates
+        self.min_gain = min_gain
+        self.auto_apply = auto_apply
+        self.switch_min_interval_s = switch_min_interval_s
+        self.hostapd = hostapd
+        self.bssids: dict[str, _Bss] = {}
+        self.scans: deque[float] = deque()
+        self.history: deque[dict] = deque(maxlen=HISTORY_LEN)
+        self.last_scan_ts = 0.0
+        self.last_switch: Optional[dict] = None
+        self.report: dict = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="channels")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                if self.auto_apply:
+                    await self._maybe_switch()
+            except Exception:
+                logger.exception("Channel planner pass failed")
+            # Wake often enough to pick up scans made by others while they are fresh.
+            await asyncio.sleep(min(self.scan_interval_s, 60.0))
+
+    async def refresh(self, rescan: bool = False) -> dict:
+        scan = network_service.LAST_SCAN
+        if rescan or time.time() - scan["ts"] >= self.scan_interval_s:
+            await executors.pools["network"].run(wifi_scan_wlan0)
+        ap = await self.ap_status()
+        if self.ingest(scan["ts"], scan.get("bssids", []), ap["own_bssids"], ap["ssid"]) or not self.report:
+            self.report = self.evaluate(ap)
+        return self.report
+
+    # ---- AP state ----
+    async def ap_status(self) -> dict:
+        """Current channel: hostapd STATUS when the control socket is up (it reflects earlier
+        switches), else hostapd.conf."""
+        conf = get_hostapd_iface_and_ssid()
+        ap = {"channel": None, "band": None, "ssid": conf["ssid"], "own_bssids": set(), "source": "none",
+              "ht": False}
+        ctrl = self.hostapd()
+        if ctrl is not None and ctrl.connected:
+            try:
+                st = await ctrl.status()
+                if st.get("channel", "").isdigit():
+                    freq = int(st["freq"]) if st.get("freq", "").isdigit() else None
+                    ap.update(channel=int(st["channel"]), band=band_of(int(st["channel"]), freq),
+                              source="hostapd", ht=st.get("ieee80211n") == "1",
+                              own_bssids={v.lower() for k, v in st.items() if k.startswith("bssid[")})
+                    return ap
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                logger.warning("hostapd STATUS failed: %s", e)
+        if conf["path"]:
+            channel = parse_kv_from_file(conf["path"], "channel")
+            if channel.isdigit() and int(channel) > 0:
+                hw_mode = parse_kv_from_file(conf["path"], "hw_mode")
+                ap.update(channel=int(channel), band="5" if hw_mode == "a" else "2.4", source="hostapd.conf")
+        return ap
+
+    # ---- observations ----
+    def ingest(self, scan_ts: float, rows: list[dict], own_bssids: set[str], own_ssid: str) -> bool:
+        """Adds one scan (once: scans are keyed by their timestamp). Our own AP is left out."""
+        if scan_ts <= self.last_scan_ts:
+            return False
+        self.last_scan_ts = scan_ts
+        self.scans.append(scan_ts)
+        for row in rows:
+            if row["bssid"] in own_bssids or (own_ssid and row.get("ssid") == own_ssid):
+                continue
+            bss = self.bssids.get(row["bssid"])
+            if bss is None or bss.channel != row["channel"]:
+                bss = self.bssids[row["bssid"]] = _Bss(row, scan_ts)
+            else:
+                bss.signal += SIGNAL_EWMA * (float(row.get("signal") or 0) - bss.signal)
+                bss.ssid = row.get("ssid", bss.ssid)
+            bss.seen.append(scan_ts)
+            bss.last_seen = scan_ts
+        self._expire(scan_ts)
+        return True
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_s
+        while self.scans and self.scans[0] < cutoff:
+            self.scans.popleft()
+        for key, bss in list(self.bssids.items()):
+            while bss.seen and bss.seen[0] < cutoff:
+                bss.seen.popleft()
+            if not bss.seen:
+                del self.bssids[key]
+
+    def scores(self, band: str) -> dict[int, dict]:
+        channels = set(self.candidates.get(band, []))
+        neighbours = [b for b in self.bssids.values() if b.band == band]
+        channels.update(b.channel for b in neighbours)
+        scans = max(len(self.scans), 1)
+        result = {}
+        for ch in sorted(channels):
+            score, co_channel, overlapping = 0.0, 0, 0
+            for b in neighbours:
+                weight = overlap(ch, b.channel, band)
+                if not weight or b.signal < SIGNAL_FLOOR:
+                    continue
+                score += weight * (len(b.seen) / scans) * (b.signal / 100.0)
+                if b.channel == ch:
+                    co_channel += 1
+                else:
+                    overlapping += 1
+            result[ch] = {"channel": ch, "score": round(score, 3), "co_channel": co_channel,
+                          "overlapping": overlapping, "candidate": ch in self.candidates.get(band, [])}
+        return result
+
+    def evaluate(self, ap: dict) -> dict:
+        band = ap["band"] or "2.4"
+        scores = self.scores(band)
+        for ch, row in scores.items():
+            CHANNEL_CONGESTION.set(row["score"], band=band, channel=str(ch))
+        candidates = [row for row in scores.values() if row["candidate"]]
+        current = scores.get(ap["channel"]) if ap["channel"] else None
+        # Ties go to the current channel, then to the lowest number.
+        best = min(candidates, key=lambda r: (r["score"], r["channel"] != ap["channel"], r["channel"]),
+                   default=None)
+        recommendation = None
+        if best is not None:
+            current_score = current["score"] if current else None
+            switch = (len(self.scans) >= MIN_SCANS and best["channel"] != ap["channel"]
+                      and (current_score is None or best["score"] <= current_score * (1 - self.min_gain)))
+            recommendation = {"channel": best["channel"], "score": best["score"], "switch": switch,
+                              "gain": round(1 - best["score"] / current_score, 3) if current_score else None}
+        now = time.time()
+        if current is not None and (not self.history or self.history[-1]["ts"] != int(self.last_scan_ts)):
+            self.history.append({"ts": int(self.last_scan_ts), "channel": ap["channel"], "score": current["score"],
+                                 "best_channel": best["channel"] if best else None,
+                                 "best_score": best["score"] if best else None})
+        return {
+            "ts": int(now),
+            "band": band,
+            "current": {"channel": ap["channel"], "source": ap["source"],
+                        "score": current["score"] if current else None},
+            "recommendation": recommendation,
+            "channels": list(scores.values()),
+            "scans": len(self.scans),
+            "window_s": self.window_s,
+            "last_scan_ts": int(self.last_scan_ts) or None,
+            "neighbours": sorted(
+                ({"bssid": b.bssid, "ssid": b.ssid, "channel": b.channel, "signal": round(b.signal),
+                  "presence": round(len(b.seen) / max(len(self.scans), 1), 2)}
+                 for b in self.bssids.values() if b.band == band),
+                key=lambda n: (n["channel"], -n["signal"])),
+            "history": list(self.history),
+            "last_switch": self.last_switch,
+        }
+
+    # ---- switching ----
+    async def switch(self, channel: int) -> dict:
+        """Channel Switch Announcement through hostapd: stations follow the AP without
+        reassociating. The switch is not written to hostapd.conf; a hostapd restart goes back
+        to the configured channel."""
+        ctrl = self.hostapd()
+        if ctrl is None or not ctrl.connected:
+            raise RuntimeError("hostapd control socket not available (enable the hostapd subsystem)")
+        ap = await self.ap_status()
+        band = ap["band"] or "2.4"
+        if channel not in self.candidates.get(band, []):
+            raise ValueError(f"channel {channel} is not a {band} GHz candidate")
+        previous = ap["channel"]
+        if channel == previous:
+            raise ValueError(f"already on channel {channel}")
+        command = f"CHAN_SWITCH {CS_COUNT} {channel_freq(channel, band)}" + (" ht" if ap["ht"] else "")
+        reply = (await ctrl.request(command, timeout=5.0)).strip()
+        ok = reply == "OK"
+        CHANNEL_SWITCHES_TOTAL.inc(result="ok" if ok else "failed")
+        self.last_switch = {"ts": int(time.time()), "from": previous, "to": channel, "ok": ok, "reply": reply}
+        if not ok:
+            # Typically a driver without CSA support.
+            raise RuntimeError(f"hostapd refused {command!r}: {reply}")
+        logger.info("AP channel switch %s -> %d requested", previous, channel)
+        self.report = {}
+        return self.last_switch
+
+    async def _maybe_switch(self) -> None:
+        rec = self.report.get("recommendation")
+        ctrl = self.hostapd()
+        if not rec or not rec["switch"] or ctrl is None or not ctrl.connected:
+            return
+        if self.last_switch and time.time() - self.last_switch["ts"] < self.switch_min_interval_s:
+            return
+        try:
+            await self.switch(rec["channel"])
+        except (RuntimeError, ValueError, ConnectionError, asyncio.TimeoutError) as e:
+            logger.warning("Automatic channel switch skipped: %s", e)
@@ -0,0 +1,143 @@
+# backend/services/clients_service.py
+# Module: In-memory DHCP lease index — filtered, sorted, cursor-paginated client listing
+
+import ipaddress
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Optional
+
+from backend.services.network_service import LEASES_PATHS, read_dnsmasq_leases
+
+SORT_FIELDS = ("ip", "hostname", "mac", "expiry")
+# A string prefix "ab" covers every key in ["ab", "ab" + _MAX_CHAR).
+_MAX_CHAR = "\U0010ffff"
+
+
+def _ip_key(ip: str) -> int:
+    try:
+        return int(ipaddress.ip_address(ip))
+    except ValueError:
+        return 0
+
+
+def _sort_value(row: dict, sort: str):
+    if sort == "ip":
+        return _ip_key(row["ip"])
+    if sort == "hostname":
+        return row["hostname"].lower()
+    if sort == "mac":
+        return row["mac"].lower()
+    return row["expiry_epoch"] or 0
+
+
+def valid_cursor_key(sort: str, key: list) -> bool:
+    """A decoded cursor must be a (value, mac, ip) key of the requested sort field, or bisect
+    would compare mismatched types (TypeError -> 500)."""
+    if len(key) != 3 or not all(isinstance(k, str) for k in key[1:]):
+        return False
+    value = key[0]
+    if sort in ("ip", "expiry"):
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, str)
+
+
+def normalize_mac_prefix(prefix: str) -> str:
+    return prefix.strip().lower().replace("-", ":")
+
+
+class LeaseIndex:
+    """Leases parsed once per change of the leases file, with one sorted key list per sort
+    field built on first use. A page is a bisect to the cursor plus a scan of `limit` rows
+    (prefix filters on the sort field narrow the range up front)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._rows: list[dict] = []
+        self._sorted: dict[str, tuple[list[tuple], list[dict]]] = {}
+
+    def _leases_mtime(self) -> Optional[float]:
+        for p in LEASES_PATHS:
+            try:
+                return Path(p).stat().st_mtime
+            except OSError:
+                continue
+        return None
+
+    def _refresh(self) -> None:
+        mtime = self._leases_mtime()
+        with self._lock:
+            if mtime == self._mtime and self._rows:
+                return
+        rows = read_dnsmasq_leases()
+        with self._lock:
+            self._mtime = mtime
+            self._rows = rows
+            self._sorted = {}
+
+    def leased_macs(self) -> set[str]:
+        self._refresh()
+        with self._lock:
+            return {r["mac"].lower() for r in self._rows}
+
+    def _sorted_for(self, sort: str) -> tuple[list[tuple], list[dict]]:
+        with self._lock:
+            index = self._sorted.get(sort)
+            if index is None:
+                # (value, mac, ip) is unique per lease, so keyset cursors never skip or repeat rows.
+                pairs = sorted(((_sort_value(r, sort), r["mac"].lower(), r["ip"]), r) for r in self._rows)
+                index = self._sorted[sort] = ([k for k, _ in pairs], [r for _, r in pairs])
+            return index
+
+    def page(self, sort: str = "ip", order: str = "asc", limit: int = 100, after: Optional[list] = None,
+             hostname: str = "", mac: str = "") -> tuple[list[dict], Optional[list]]:
+        """Return (rows, key of the last row if there are more matches)."""
+        self._refresh()
+        keys, rows = self._sorted_for(sort)
+        hostname = hostname.strip().lower()
+        mac = normalize_mac_prefix(mac) if mac else ""
+
+        lo, hi = 0, len(keys)
+        prefix = hostname if sort == "hostname" else mac if sort == "mac" else ""
+        if prefix:
+            lo = bisect_left(keys, (prefix,))
+            hi = bisect_left(keys, (prefix + _MAX_CHAR,))
+
+        if order == "asc":
+            start = max(lo, bisect_right(keys, tuple(after))) if after else lo
+            positions = range(start, hi)
+        else:
+            end = min(hi, bisect_left(keys, tuple(after))) if after else hi
+            positions = range(end - 1, lo - 1, -1)
+
+        out: list[dict] = []
+        last_key = None
+        for i in positions:
+            row = rows[i]
+            if hostname and not row["hostname"].lower().startswith(hostname):
+                continue
+            if mac and not row["mac"].lower().startswith(mac):
+                continue
+            if len(out) == limit:
+                # One more match exists: hand out a cursor to it.
+                return out, list(last_key)
+            out.append(row)
+            last_key = keys[i]
+        return out, None
+
+
+lease_index = LeaseIndex()
+
+
+def present(row: dict, now: Optional[int] = None) -> dict:
+    """Copy of an indexed lease with the relative expiry recomputed for this response."""
+    now = int(time.time()) if now is None else now
+    expiry = row.get("expiry_epoch")
+    expires_in = (expiry - now) if expiry else None
+    return {
+        **row,
+        "expires_in_seconds": expires_in,
+        "expires_in_minutes": (expires_in // 60) if expires_in is not None else None,
+    }
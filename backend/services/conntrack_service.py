@@ -0,0 +1,236 @@
+# backend/services/conntrack_service.py
+# Module: Streaming conntrack reader — per-client flows and top talkers
+
+import heapq
+import ipaddress
+from typing import Iterator, Optional
+
+from backend.core.logging import get_logger
+from backend.services.helper_client import run_privileged
+from backend.services.network_service import read_dnsmasq_leases
+
+logger = get_logger("odoco.conntrack")
+
+CONNTRACK_PROC = "/proc/net/nf_conntrack"
+
+
+class Flow:
+    __slots__ = ("proto", "state", "src", "dst", "sport", "dport", "packets", "bytes", "has_acct")
+
+    def __init__(self, proto, state, src, dst, sport, dport, packets, nbytes, has_acct):
+        self.proto = proto
+        self.state = state
+        self.src = src
+        self.dst = dst
+        self.sport = sport
+        self.dport = dport
+        self.packets = packets
+        self.bytes = nbytes
+        self.has_acct = has_acct
+
+
+def _counter(segment: str, key: str) -> int:
+    i = segment.find(key)
+    if i < 0:
+        return 0
+    i += len(key)
+    j = segment.find(" ", i)
+    return int(segment[i:j] if j >= 0 else segment[i:])
+
+
+def parse_line(line: str) -> Optional[Flow]:
+    """Parse one conntrack line; only the original-direction tuple is kept, counters are summed."""
+    # "ipv4 2 tcp 6 431999 ESTABLISHED src=.. dst=.. sport=.. dport=.. [packets=.. bytes=..]
+    #  src=.. (reply tuple) ..." — conntrack -L -o extended prints the same layout.
+    i = line.find("src=")
+    if i < 0:
+        return None
+    head = line[:i].split()
+    if len(head) < 3:
+        return None
+    j = line.find(" src=", i + 4)
+    orig = line[i:j] if j > 0 else line[i:]
+    reply = line[j:] if j > 0 else ""
+
+    fields = {}
+    for tok in orig.split():
+        key, sep, val = tok.partition("=")
+        if sep:
+            fields[key] = val
+    has_acct = "packets" in fields
+    packets = int(fields.get("packets", 0))
+    nbytes = int(fields.get("bytes", 0))
+    if has_acct and reply:
+        packets += _counter(reply, "packets=")
+        nbytes += _counter(reply, "bytes=")
+
+    return Flow(
+        head[2],
+        head[5] if len(head) > 5 else "",
+        fields.get("src", ""),
+        fields.get("dst", ""),
+        int(fields.get("sport", 0)),
+        int(fields.get("dport", 0)),
+        packets,
+        nbytes,
+        has_acct,
+    )
+
+
+def iter_conntrack_lines() -> Iterator[str]:
+    """Yield conntrack entries one line at a time; the proc table is never held in memory."""
+    try:
+        with open(CONNTRACK_PROC, "r", buffering=1 << 16) as fh:
+            yield from fh
+        return
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        # Root-only (0440) on most kernels; the API runs unprivileged.
+        pass
+
+    # Netlink dump through the privileged helper. Its replies are one message, so this path
+    # holds the whole listing; the proc file stays the streaming fast path.
+    res = run_privileged("conntrack_list")
+    if res["rc"] != 0:
+        logger.warning("conntrack not available: %s", res["stderr"] or f"rc={res['rc']}")
+        return
+    yield from res["stdout"].splitlines()
+
+
+def iter_flows(prefilter: Optional[str] = None) -> Iterator[Flow]:
+    for line in iter_conntrack_lines():
+        # Cheap substring test before tokenizing: most lines are skipped here.
+        if prefilter is not None and prefilter not in line:
+            continue
+        flow = parse_line(line)
+        if flow is not None:
+            yield flow
+
+
+def _lease_index() -> dict[str, dict]:
+    return {c["ip"]: c for c in read_dnsmasq_leases()}
+
+
+def _is_private(ip: str) -> bool:
+    try:
+        return ipaddress.ip_address(ip).is_private
+    except ValueError:
+        return False
+
+
+def _rank(flow_bytes: int, packets: int, flows: int) -> tuple:
+    # Order by bytes when accounting is on; packets/flows still break ties (or rank when it is off).
+    return (flow_bytes, packets, flows)
+
+
+def client_connections(ip: str, limit: int = 50) -> dict:
+    """Active flows for one client, aggregated by (protocol, destination, port), top-N by bytes."""
+    prefilter = f"src={ip} "
+    groups: dict[tuple, list] = {}
+    total_flows = 0
+    accounting = False
+    for flow in iter_flows(prefilter):
+        if flow.src != ip:
+            continue
+        total_flows += 1
+        accounting = accounting or flow.has_acct
+        key = (flow.proto, flow.dst, flow.dport)
+        agg = groups.get(key)
+        if agg is None:
+            groups[key] = [flow.bytes, flow.packets, 1, {flow.state} if flow.state else set()]
+        else:
+            agg[0] += flow.bytes
+            agg[1] += flow.packets
+            agg[2] += 1
+            if flow.state:
+                agg[3].add(flow.state)
+
+    top = heapq.nlargest(limit, groups.items(), key=lambda kv: _rank(kv[1][0], kv[1][1], kv[1][2]))
+    lease = _lease_index().get(ip, {})
+    return {
+        "ip": ip,
+        "hostname": lease.get("hostname", ""),
+        "mac": lease.get("mac", ""),
+        "accounting": accounting,
+        "total_flows": total_flows,
+        "destinations": len(groups),
+        "connections": [
+            {
+                "protocol": proto,
+                "destination": dst,
+                "port": dport,
+                "flows": agg[2],
+                "bytes": agg[0],
+                "packets": agg[1],
+                "states": sorted(agg[3]),
+            }
+            for (proto, dst, dport), agg in top
+        ],
+    }
+
+
+def top_talkers(limit: int = 10, flows_limit: int = 10) -> dict:
+    """Clients ranked by conntrack bytes, plus the heaviest individual flows (bounded heap)."""
+    leases = _lease_index()
+    lan_ips = set(leases)
+    clients: dict[str, list] = {}
+    heaviest: list[tuple] = []  # min-heap of (rank, seq, flow), size <= flows_limit
+    private: dict[str, bool] = {}  # memo: ipaddress parsing per line is the hot spot
+    accounting = False
+    seq = 0
+    for flow in iter_flows():
+        if lan_ips:
+            if flow.src not in lan_ips:
+                continue
+        else:
+            local = private.get(flow.src)
+            if local is None:
+                local = private[flow.src] = _is_private(flow.src)
+            if not local:
+                continue
+        accounting = accounting or flow.has_acct
+        agg = clients.get(flow.src)
+        if agg is None:
+            clients[flow.src] = [flow.bytes, flow.packets, 1]
+        else:
+            agg[0] += flow.bytes
+            agg[1] += flow.packets
+            agg[2] += 1
+
+        if not flows_limit:
+            continue
+        seq += 1
+        item = ((flow.bytes, flow.packets), seq, flow)
+        if len(heaviest) < flows_limit:
+            heapq.heappush(heaviest, item)
+        elif item[0] > heaviest[0][0]:
+            heapq.heapreplace(heaviest, item)
+
+    top = heapq.nlargest(limit, clients.items(), key=lambda kv: _rank(kv[1][0], kv[1][1], kv[1][2]))
+    return {
+        "accounting": accounting,
+        "clients": [
+            {
+                "ip": ip,
+                "hostname": leases.get(ip, {}).get("hostname", ""),
+                "mac": leases.get(ip, {}).get("mac", ""),
+                "flows": agg[2],
+                "bytes": agg[0],
+                "packets": agg[1],
+            }
+            for ip, agg in top
+        ],
+        "top_flows": [
+            {
+                "src": f.src,
+                "hostname": leases.get(f.src, {}).get("hostname", ""),
+                "protocol": f.proto,
+                "destination": f.dst,
+                "port": f.dport,
+                "bytes": f.bytes,
+                "packets": f.packets,
+            }
+            for _, _, f in sorted(heaviest, key=lambda it: it[0], reverse=True)
+        ],
+    }
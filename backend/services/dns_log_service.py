@@ -0,0 +1,341 @@
+# backend/services/dns_log_service.py
+# Module: DNS query analytics — incremental dnsmasq log tailer feeding fixed-memory rolling top-k
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.core.sketch import RollingTopK
+from backend.db.session import SessionLocal
+
+logger = get_logger("odoco.dns_log")
+
+# name -> (window seconds, buckets). The window slides one bucket at a time.
+WINDOWS: dict[str, tuple[int, int]] = {
+    "5m": (300, 10),
+    "1h": (3600, 12),
+    "24h": (86400, 24),
+}
+GRAIN_S = math.gcd(*(w // b for w, b in WINDOWS.values()))
+DOMAIN_WIDTH = 2048
+CLIENT_WIDTH = 256
+SKETCH_DEPTH = 4
+CANDIDATES = 200
+# Bounded work per tick; the rest of a large backlog is picked up on the next ones.
+MAX_READ_BYTES = 8 * 1024 * 1024
+SAVE_INTERVAL_S = 300.0
+
+# "Oct 19 01:02:03 host dnsmasq[812]: query[A] example.com from 192.168.50.10"
+# log-queries=extra adds "<serial> <ip>/<port> " before "query[".
+_QUERY_RE = re.compile(r"dnsmasq\[\d+\]: (?:\d+ \S+ )?query\[(\w+)\] (\S+) from (\S+)")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS dns_log_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        inode INTEGER NOT NULL,
+        read_offset INTEGER NOT NULL,
+        meta TEXT NOT NULL,
+        sketches BLOB NOT NULL
+    )
+    """,
+]
+
+DNS_LOG_LINES_TOTAL = metrics.Counter(
+    "odoco_dns_log_lines_total", "dnsmasq log lines read by the DNS analytics tailer.", ("kind",)
+)
+DNS_LOG_LAG_BYTES = metrics.Gauge("odoco_dns_log_lag_bytes", "Bytes of the dnsmasq log not yet processed.")
+
+
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+class _Timestamps:
+    """Line timestamp -> epoch. Consecutive lines share a prefix, so parsing is cached."""
+
+    def __init__(self):
+        self._prefix = ""
+        self._ts = 0.0
+
+    def parse(self, line: str, now: float) -> Optional[float]:
+        if line[:1].isdigit():
+            # rsyslog high-precision format: "2026-10-19T01:02:03.123456+00:00 host ..."
+            prefix = line.split(" ", 1)[0]
+        else:
+            prefix = line[:15]
+        if prefix == self._prefix:
+            return self._ts
+        try:
+            if line[:1].isdigit():
+                ts = datetime.fromisoformat(prefix).timestamp()
+            else:
+                # Classic syslog has no year: take the current one, or the previous one if
+                # that lands in the future (reading December lines in January).
+                year = datetime.fromtimestamp(now).year
+                ts = datetime.strptime(f"{year} {prefix}", "%Y %b %d %H:%M:%S").timestamp()
+                if ts > now + 86400:
+                    ts = datetime.strptime(f"{year - 1} {prefix}", "%Y %b %d %H:%M:%S").timestamp()
+        except ValueError:
+            return None
+        self._prefix, self._ts = prefix, ts
+        return ts
+
+
+def parse_query(line: str) -> Optional[tuple[str, str, str]]:
+    """(qtype, domain, client) of a query line, None for anything else."""
+    if "query[" not in line:
+        return None
+    m = _QUERY_RE.search(line)
+    if not m:
+        return None
+    qtype, domain, client = m.groups()
+    return qtype, domain.rstrip(".").lower(), client
+
+
+class DnsLogAnalytics:
+    """Follows the dnsmasq log (log-queries + log-facility) from the offset saved in SQLite,
+    so each byte is parsed once. Top domains and clients per window live in count-min
+    sketches with heavy-hitter candidates: memory is fixed however large the log grows, and
+    a query only ranks the candidates."""
+
+    def __init__(self, path: str, poll_interval_s: float = 2.0, backfill_bytes: int = 32 * 1024 * 1024):
+        self.path = path
+        self.poll_interval_s = poll_interval_s
+        self.backfill_bytes = backfill_bytes
+        self._reset_counters()
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self.size = 0
+        self._skip_partial = False
+        self.lines = {"query": 0, "other": 0}
+        self._timestamps = _Timestamps()
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        await executors.pools["db"].run(init_schema)
+        await executors.pools["db"].run(self.load_state)
+        self._task = asyncio.create_task(self._run(), name="dns-log")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await executors.pools["db"].run(self.save_state)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                caught_up = await executors.pools["disk"].run(self.tick)
+                if time.monotonic() - self._last_save >= SAVE_INTERVAL_S:
+                    await executors.pools["db"].run(self.save_state)
+            except Exception:
+                logger.exception("DNS log tick failed")
+                caught_up = True
+            if caught_up:
+                await asyncio.sleep(self.poll_interval_s)
+            else:
+                await asyncio.sleep(0)
+
+    def _reset_counters(self) -> None:
+        self.domains = {name: RollingTopK(w, b, DOMAIN_WIDTH, SKETCH_DEPTH, CANDIDATES)
+                        for name, (w, b) in WINDOWS.items()}
+        self.clients = {name: RollingTopK(w, b, CLIENT_WIDTH, SKETCH_DEPTH, CANDIDATES)
+                        for name, (w, b) in WINDOWS.items()}
+
+    def _structures(self) -> list[RollingTopK]:
+        return [*self.domains.values(), *self.clients.values()]
+
+    # ---- persistence ----
+    def load_state(self) -> None:
+        with SessionLocal() as db:
+            row = db.execute(text("SELECT inode, read_offset, meta, sketches FROM dns_log_state WHERE id = 1")).first()
+        if row is None:
+            return
+        metas = json.loads(row.meta)
+        structures = self._structures()
+        blob, pos, restored = bytes(row.sketches), 0, True
+        for meta, window in zip(metas, structures):
+            size = meta.pop("blob_len")
+            restored = window.restore(meta, blob[pos:pos + size]) and restored
+            pos += size
+        if not restored or len(metas) != len(structures):
+            # Window layout changed between versions: start the counters over, keep the offset.
+            logger.warning("DNS log analytics: saved sketches do not match this version; counters reset")
+            self._reset_counters()
+        self.inode, self.offset = row.inode, row.read_offset
+        logger.info("DNS log analytics resumed at offset %d of %s", self.offset, self.path)
+
+    def save_state(self) -> None:
+        self._last_save = time.monotonic()
+        if self.inode is None:
+            return
+        with self._lock:
+            metas, blobs = [], []
+            for window in self._structures():
+                meta, blob = window.dump()
+                metas.append({**meta, "blob_len": len(blob)})
+                blobs.append(blob)
+            params = {"inode": self.inode, "offset": self.offset, "meta": json.dumps(metas),
+                      "sketches": b"".join(blobs)}
+        with SessionLocal() as db:
+            db.execute(text(
+                "INSERT OR REPLACE INTO dns_log_state (id, inode, read_offset, meta, sketches) "
+                "VALUES (1, :inode, :offset, :meta, :sketches)"
+            ), params)
+            db.commit()
+
+    # ---- tailing ----
+    def tick(self) -> bool:
+        """Reads at most MAX_READ_BYTES of new log; True once it has caught up with the file."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        if st.st_ino != self.inode:
+            if self.inode is not None:
+                self._drain_rotated()
+            with self._lock:
+                first_run = self.inode is None
+                self.inode = st.st_ino
+                # No saved offset: start near the end instead of parsing a log of any size.
+                self.offset = max(st.st_size - self.backfill_bytes, 0) if first_run else 0
+            self._skip_partial = self.offset > 0
+        elif st.st_size < self.offset:
+            logger.info("DNS log %s truncated; reading from the start", self.path)
+            with self._lock:
+                self.offset = 0
+        self.size = st.st_size
+        progressed = False
+        if self.offset < st.st_size:
+            with open(self.path, "rb") as fh:
+                progressed = self._consume(fh, self.offset, self._skip_partial)
+        DNS_LOG_LAG_BYTES.set(self.size - self.offset)
+        # Only an unterminated last line left (dnsmasq mid-write): caught up until it ends.
+        return not progressed or self.offset >= self.size
+
+    def _drain_rotated(self) -> None:
+        """logrotate moved the file: finish the old one (same inode at <path>.1) before switching."""
+        rotated = self.path + ".1"
+        try:
+            if os.stat(rotated).st_ino != self.inode:
+                return
+            with open(rotated, "rb") as fh:
+                offset = -1
+                while offset != self.offset:
+                    offset = self.offset
+                    self._consume(fh, offset, False)
+        except OSError:
+            pass
+
+    def _consume(self, fh, offset: int, skip_partial: bool) -> bool:
+        """Processes the complete lines from `offset`; False if there was none to process."""
+        fh.seek(offset)
+        data = fh.read(MAX_READ_BYTES)
+        end = data.rfind(b"\n")
+        if end < 0:
+            if len(data) < MAX_READ_BYTES:
+                return False
+            # A single "line" longer than a whole read is not dnsmasq output: skip past it.
+            with self._lock:
+                self.offset = offset + len(data)
+            self._skip_partial = True
+            return True
+        data = data[:end + 1]
+        self._skip_partial = False
+        if skip_partial:
+            # Backfill started mid-line.
+            data = data[data.find(b"\n") + 1:]
+        self.process(data.decode("utf-8", errors="replace").splitlines(), time.time(), offset + end + 1)
+        return True
+
+    def process(self, lines: list[str], now: float, offset: Optional[int] = None) -> int:
+        """Counts the query lines; `offset` (where they end) is stored with the counters, so a
+        saved state never counts a line twice or skips one."""
+        parse_ts = self._timestamps.parse
+        oldest = now - max(w for w, _ in WINDOWS.values())
+        # Pre-aggregate by (grain, key): a repeated domain costs one sketch update per grain
+        # instead of one per line. The grain divides every bucket size, so counts are exact.
+        domain_counts: Counter = Counter()
+        client_counts: Counter = Counter()
+        for line in lines:
+            parsed = parse_query(line)
+            if parsed is None:
+                continue
+            ts = parse_ts(line, now)
+            if ts is None or ts < oldest:
+                continue
+            ts -= ts % GRAIN_S
+            _, domain, client = parsed
+            domain_counts[(ts, domain)] += 1
+            client_counts[(ts, client)] += 1
+        queries = sum(domain_counts.values())
+        with self._lock:
+            for structures, counts in ((self.domains, domain_counts), (self.clients, client_counts)):
+                windows = list(structures.values())
+                cells_of = windows[0].total.cells
+                for (ts, key), count in counts.items():
+                    cells = cells_of(key)
+                    for window in windows:
+                        window.add(key, ts, count, cells)
+            self.lines["query"] += queries
+            self.lines["other"] += len(lines) - queries
+            if offset is not None:
+                self.offset = offset
+        DNS_LOG_LINES_TOTAL.inc(queries, kind="query")
+        DNS_LOG_LINES_TOTAL.inc(len(lines) - queries, kind="other")
+        return queries
+
+    # ---- queries ----
+    def top(self, window: str, limit: int, now: Optional[float] = None) -> dict:
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(WINDOWS)}")
+        now = time.time() if now is None else now
+        with self._lock:
+            domains, clients = self.domains[window], self.clients[window]
+            domains.expire(now)
+            clients.expire(now)
+            queries = domains.events
+            top_domains = domains.top(limit)
+            top_clients = clients.top(limit)
+        return {
+            "window": window,
+            "queries": queries,
+            # Counts are estimates: never below the true count, above it by at most this much
+            # (with high probability).
+            "max_overcount": {
+                "domains": math.ceil(2 * queries / DOMAIN_WIDTH),
+                "clients": math.ceil(2 * queries / CLIENT_WIDTH),
+            },
+            "domains": [{"domain": d, "count": c} for d, c in top_domains],
+            "clients": [{"ip": ip, "count": c} for ip, c in top_clients],
+        }
+
+    def status(self) -> dict:
+        return {
+            "path": self.path,
+            "inode": self.inode,
+            "offset": self.offset,
+            "size": self.size,
+            "lag_bytes": max(self.size - self.offset, 0),
+            "lines": dict(self.lines),
+            "windows": list(WINDOWS),
+            "sketch_bytes": sum(4 * w.total.width * w.total.depth * (len(w.ring) + 1) for w in self._structures()),
+        }
@@ -0,0 +1,248 @@
+# backend/services/fleet_service.py
+# Module: Fleet aggregator — polls other ODOCO nodes concurrently and merges their state
+
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+
+from backend.core.logging import get_logger
+
+logger = get_logger("odoco.fleet")
+
+# Summary sections worth shipping across the fleet (system details stay on the node).
+SUMMARY_PATH = "/api/summary?fields=ssid,network,clients,services,active_server"
+POLL_PATHS = {
+    "summary": SUMMARY_PATH,
+    # Maximum page size (see pagination.MAX_LIMIT); further pages follow the cursor.
+    "clients": "/clients?limit=500",
+    "servers": "/servers?limit=500",
+}
+# Upper bound on pages per listing and poll (10k rows), in case a node keeps returning cursors.
+MAX_PAGES = 20
+
+# Circuit breaker: open after this many consecutive failed polls, then back off.
+BREAKER_THRESHOLD = 3
+BREAKER_BASE_COOLDOWN_S = 15.0
+BREAKER_MAX_COOLDOWN_S = 300.0
+
+
+def parse_node_specs(specs: list[str]) -> list[tuple[str, str]]:
+    """["pi-sala=http://10.0.0.2:8000", "http://10.0.0.3:8000"] -> [(name, base_url), ...]"""
+    nodes = []
+    for spec in specs:
+        name, sep, url = spec.partition("=")
+        if not sep:
+            name, url = spec, spec
+        url = url.strip().rstrip("/")
+        if not url.startswith(("http://", "https://")):
+            url = f"http://{url}"
+        nodes.append((name.strip(), url))
+    return nodes
+
+
+def _next_cursor(res: httpx.Response, payload) -> Optional[str]:
+    if isinstance(payload, dict):
+        return payload.get("next_cursor")
+    return res.headers.get("x-next-cursor")
+
+
+class FleetNode:
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url
+        self.data: dict[str, object] = {}
+        self.etags: dict[str, str] = {}
+        self.last_ok: Optional[float] = None
+        self.last_error: str = ""
+        self.latency_ms: Optional[float] = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.polls = 0
+        self.not_modified = 0
+
+    def circuit_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def record_success(self, latency_ms: float) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_ok = time.time()
+        self.last_error = ""
+        self.latency_ms = round(latency_ms, 1)
+
+    def record_failure(self, error: str) -> None:
+        self.failures += 1
+        self.last_error = error
+        if self.failures >= BREAKER_THRESHOLD:
+            trips = self.failures - BREAKER_THRESHOLD
+            cooldown = min(BREAKER_BASE_COOLDOWN_S * (2 ** trips), BREAKER_MAX_COOLDOWN_S)
+            self.open_until = time.monotonic() + cooldown
+            logger.warning("Fleet node %s circuit open for %.0fs: %s", self.name, cooldown, error)
+
+    def status(self, stale_after_s: float) -> str:
+        if self.circuit_open(time.monotonic()):
+            return "circuit_open"
+        if self.last_ok is None:
+            return "down" if self.failures else "pending"
+        if self.failures or time.time() - self.last_ok > stale_after_s:
+            return "stale"
+        return "ok"
+
+
+class FleetAggregator:
+    """One polling task per node, so a slow or dead node never delays the others.
+
+    `client` can be injected (e.g. httpx.AsyncClient(transport=httpx.ASGITransport(app)))
+    to run against local stand-in instances.
+    """
+
+    def __init__(self, nodes: list[tuple[str, str]], interval_s: float = 10.0,
+                 node_timeout_s: float = 4.0, client: Optional[httpx.AsyncClient] = None):
+        self.nodes = [FleetNode(name, url) for name, url in nodes]
+        self.interval_s = interval_s
+        self.node_timeout_s = node_timeout_s
+        self._own_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(node_timeout_s),
+            limits=httpx.Limits(max_connections=max(len(nodes) * len(POLL_PATHS), 10),
+                                max_keepalive_connections=max(len(nodes) * 2, 10)),
+            headers={"Accept": "application/json"},
+        )
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        for node in self.nodes:
+            self._tasks.append(asyncio.create_task(self._node_loop(node), name=f"fleet:{node.name}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._own_client:
+            await self.client.aclose()
+
+    async def _node_loop(self, node: FleetNode) -> None:
+        while True:
+            await self._poll_guarded(node)
+            await asyncio.sleep(self.interval_s)
+
+    async def poll_all(self) -> None:
+        """Poll every node once, concurrently (each bounded by its own timeout)."""
+        await asyncio.gather(*(self._poll_guarded(n) for n in self.nodes))
+
+    async def _poll_guarded(self, node: FleetNode) -> None:
+        try:
+            await self.poll_node(node)
+        except Exception as e:
+            # Anything poll_node did not expect (a payload of the wrong shape, ...) must not end
+            # the node's task: count it as a failed poll so the breaker still applies.
+            logger.exception("Fleet poll of %s failed", node.name)
+            node.record_failure(f"{type(e).__name__}: {e}")
+
+    async def poll_node(self, node: FleetNode) -> None:
+        if node.circuit_open(time.monotonic()):
+            return
+        t0 = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(self._fetch(node, key, path) for key, path in POLL_PATHS.items())),
+                timeout=self.node_timeout_s,
+            )
+        except asyncio.TimeoutError:
+            node.record_failure(f"timeout after {self.node_timeout_s}s")
+            return
+        except (httpx.HTTPError, ValueError) as e:
+            node.record_failure(f"{type(e).__name__}: {e}")
+            return
+        finally:
+            node.polls += 1
+
+        for key, payload in results:
+            node.data[key] = payload
+        node.record_success((time.perf_counter() - t0) * 1000.0)
+
+    async def _fetch(self, node: FleetNode, key: str, path: str):
+        headers = {}
+        etag = node.etags.get(key)
+        if etag and key in node.data:
+            headers["If-None-Match"] = etag
+        res = await self.client.get(node.base_url + path, headers=headers)
+        if res.status_code == 304:
+            node.not_modified += 1
+            return key, node.data[key]
+        res.raise_for_status()
+        payload = res.json()
+        cursor = _next_cursor(res, payload)
+        # The ETag covers only the first page, so multi-page listings are always refetched.
+        node.etags.pop(key, None)
+        if cursor is None and res.headers.get("etag"):
+            node.etags[key] = res.headers["etag"]
+        pages = 1
+        while cursor is not None:
+            if pages >= MAX_PAGES:
+                raise ValueError(f"{key}: more than {MAX_PAGES} pages")
+            res = await self.client.get(f"{node.base_url}{path}&cursor={cursor}")
+            res.raise_for_status()
+            page = res.json()
+            cursor = _next_cursor(res, page)
+            pages += 1
+            # /clients wraps its rows ({"clients": [...], "next_cursor"}); /servers is a plain list.
+            if isinstance(payload, dict):
+                payload[key] += page[key]
+            else:
+                payload += page
+        if isinstance(payload, dict) and "next_cursor" in payload:
+            payload["next_cursor"] = None
+        return key, payload
+
+    def view(self) -> dict:
+        """Merged fleet view built from the last good data of every node (never blocks on I/O)."""
+        stale_after = self.interval_s * 3
+        nodes = []
+        clients = []
+        servers: dict[tuple, dict] = {}
+        totals = {"nodes": len(self.nodes), "online": 0, "clients": 0}
+
+        for node in self.nodes:
+            status = node.status(stale_after)
+            summary = node.data.get("summary") or {}
+            node_clients = (node.data.get("clients") or {}).get("clients", [])
+            node_servers = node.data.get("servers") or []
+            if status == "ok":
+                totals["online"] += 1
+            totals["clients"] += len(node_clients)
+
+            nodes.append({
+                "name": node.name,
+                "url": node.base_url,
+                "status": status,
+                "age_s": round(time.time() - node.last_ok, 1) if node.last_ok else None,
+                "latency_ms": node.latency_ms,
+                "error": node.last_error,
+                "ssid": summary.get("ssid"),
+                "network": summary.get("network"),
+                "clients": summary.get("clients"),
+                "services": summary.get("services"),
+                "active_server": summary.get("active_server"),
+            })
+            for c in node_clients:
+                clients.append({**c, "node": node.name})
+            for s in node_servers:
+                key = (s.get("host"), s.get("port"), s.get("edition"))
+                entry = servers.setdefault(key, {
+                    "name": s.get("name"), "host": s.get("host"), "port": s.get("port"),
+                    "edition": s.get("edition"), "nodes": [], "active_on": [],
+                })
+                entry["nodes"].append(node.name)
+                if s.get("is_active"):
+                    entry["active_on"].append(node.name)
+
+        return {
+            "totals": totals,
+            "nodes": nodes,
+            "clients": clients,
+            "servers": list(servers.values()),
+        }
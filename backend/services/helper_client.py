@@ -0,0 +1,161 @@
+# backend/services/helper_client.py
+# Module: Client for the privileged helper — one persistent, pipelined UNIX socket connection
+
+import itertools
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from backend.core import config, privhelper
+from backend.core.logging import get_logger
+from backend.core.metrics import command_name, track_subprocess
+
+logger = get_logger("odoco.helper")
+
+# After a failed connect, use the sudo fallback for a while before trying the socket again.
+RECONNECT_COOLDOWN_S = 5.0
+
+
+class HelperUnavailable(ConnectionError):
+    pass
+
+
+class _Waiter:
+    __slots__ = ("event", "response")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response: Optional[dict] = None
+
+
+class HelperClient:
+    """Thread-safe: pool workers write requests on the shared socket and block on their own
+    waiter; a single reader thread matches responses to waiters by id, so any number of
+    requests can be in flight at once."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._pending: dict[int, _Waiter] = {}
+        self._ids = itertools.count(1)
+        self._retry_at = 0.0
+
+    def _connect(self) -> socket.socket:
+        # Caller holds self._lock.
+        if self._sock is not None:
+            return self._sock
+        if time.monotonic() < self._retry_at or not os.path.exists(self.path):
+            raise HelperUnavailable(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            self._retry_at = time.monotonic() + RECONNECT_COOLDOWN_S
+            logger.warning("Privileged helper unavailable at %s: %s", self.path, e)
+            raise HelperUnavailable(self.path) from e
+        self._sock = sock
+        threading.Thread(target=self._read_loop, args=(sock,), name="odoco-helper-reader", daemon=True).start()
+        logger.info("Connected to privileged helper at %s", self.path)
+        return sock
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        try:
+            with sock.makefile("rb") as fh:
+                for line in fh:
+                    try:
+                        msg = json.loads(line)
+                    except ValueError:
+                        continue
+                    with self._lock:
+                        waiter = self._pending.pop(msg.get("id"), None)
+                    if waiter is not None:
+                        waiter.response = msg
+                        waiter.event.set()
+        except OSError:
+            pass
+        finally:
+            self._disconnect(sock, "helper connection closed")
+
+    def _disconnect(self, sock: socket.socket, reason: str) -> None:
+        with self._lock:
+            if self._sock is not sock:
+                return
+            self._sock = None
+            pending, self._pending = self._pending, {}
+        try:
+            sock.close()
+        except OSError:
+            pass
+        # The helper may or may not have run these; report failure rather than retrying.
+        for waiter in pending.values():
+            waiter.response = {"rc": 99, "stdout": "", "stderr": reason}
+            waiter.event.set()
+
+    def call(self, op: str, args: dict, timeout: float) -> dict:
+        waiter = _Waiter()
+        with self._lock:
+            sock = self._connect()
+            req_id = next(self._ids)
+            self._pending[req_id] = waiter
+            try:
+                sock.sendall(privhelper.encode({"id": req_id, "op": op, "args": args}))
+            except OSError as e:
+                self._pending.pop(req_id, None)
+                sent = False
+                error = str(e)
+            else:
+                sent = True
+        if not sent:
+            self._disconnect(sock, error)
+            return {"rc": 99, "stdout": "", "stderr": error}
+
+        if not waiter.event.wait(timeout):
+            with self._lock:
+                self._pending.pop(req_id, None)
+            return {"rc": 124, "stdout": "", "stderr": f"helper timeout after {timeout}s"}
+        return waiter.response
+
+    def close(self) -> None:
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            self._disconnect(sock, "client closed")
+
+
+client = HelperClient(config.HELPER_SOCKET)
+
+
+def run_privileged(op: str, **args) -> dict:
+    """Run an allow-listed privileged operation: via the helper when its socket is up,
+    otherwise the same argv through `sudo -n`. Returns {"rc", "stdout", "stderr"}."""
+    # Validated here too, so a bad request fails the same way on both paths.
+    cmd = privhelper.build(op, args)
+    with track_subprocess(command_name(cmd.argv)) as t:
+        try:
+            res = client.call(op, args, timeout=cmd.timeout + 2)
+        except HelperUnavailable:
+            res = _run_sudo(cmd)
+        t.failed = res["rc"] != 0
+    return res
+
+
+def _run_sudo(cmd: privhelper.Command) -> dict:
+    try:
+        res = subprocess.run(
+            ["sudo", "-n", *cmd.argv],
+            input=cmd.stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=cmd.timeout,
+            check=False,
+        )
+    except Exception as e:
+        return {"rc": 99, "stdout": "", "stderr": str(e)}
+    return {"rc": res.returncode, "stdout": (res.stdout or "").strip(), "stderr": (res.stderr or "").strip()}
@@ -0,0 +1,264 @@
+# backend/services/hostapd_service.py
+# Module: hostapd control-interface client — live per-station Wi-Fi stats without hostapd_cli
+
+import asyncio
+import os
+import re
+import socket
+import time
+from typing import Optional
+
+from backend.core.logging import get_logger
+
+logger = get_logger("odoco.hostapd")
+
+HOSTAPD_CTRL_DIR = "/var/run/hostapd"
+_EVENT_RE = re.compile(r"^<\d>")
+
+
+def _rate_mbps(rate_info: str) -> Optional[float]:
+    # "650 mcs 7 shortGI" -> 65.0 (hostapd reports units of 100 kbit/s)
+    head = rate_info.split(" ", 1)[0]
+    return round(int(head) / 10.0, 1) if head.isdigit() else None
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_station(reply: str) -> Optional[dict]:
+    """Parse a STA-FIRST/STA-NEXT/STA reply: MAC on the first line, then key=value lines."""
+    lines = reply.strip().splitlines()
+    if not lines or lines[0].startswith("FAIL") or ":" not in lines[0]:
+        return None
+    raw = {}
+    for ln in lines[1:]:
+        key, sep, val = ln.partition("=")
+        if sep:
+            raw[key.strip()] = val.strip()
+    return {
+        "mac": lines[0].strip().lower(),
+        "signal_dbm": _int(raw.get("signal")),
+        "rx_bitrate_mbps": _rate_mbps(raw.get("rx_rate_info", "")),
+        "tx_bitrate_mbps": _rate_mbps(raw.get("tx_rate_info", "")),
+        "inactive_ms": _int(raw.get("inactive_msec")),
+        "connected_s": _int(raw.get("connected_time")),
+        "rx_bytes": _int(raw.get("rx_bytes")),
+        "tx_bytes": _int(raw.get("tx_bytes")),
+        "tx_retries": _int(raw.get("tx_retry_count")),
+        "tx_failed": _int(raw.get("tx_retry_failed")),
+        "flags": raw.get("flags", ""),
+    }
+
+
+class _CtrlProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner: "HostapdControl"):
+        self.owner = owner
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.owner._on_datagram(data.decode(errors="replace"))
+
+    def error_received(self, exc: Exception) -> None:
+        self.owner._on_lost(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.owner._on_lost(exc)
+
+
+class HostapdControl:
+    """One persistent, ATTACHed datagram socket to hostapd's control interface.
+
+    Replies and unsolicited events share the socket: events start with "<level>", anything
+    else answers the single in-flight request. Replies carry no request id, so a request that
+    times out drops the socket: its late reply can never be taken for the next one's. AP-STA-CONNECTED/DISCONNECTED keep the station
+    table current; radio counters are re-read over the same socket only when a caller asks for
+    them and the table is older than `refresh_after_s`.
+    """
+
+    def __init__(self, iface: str, ctrl_dir: str = HOSTAPD_CTRL_DIR,
+                 refresh_after_s: float = 2.0, ping_interval_s: float = 30.0):
+        self.iface = iface
+        self.ctrl_path = os.path.join(ctrl_dir, iface)
+        self.local_path = f"/tmp/odoco-hostapd-{os.getpid()}-{iface}"
+        self.refresh_after_s = refresh_after_s
+        self.ping_interval_s = ping_interval_s
+        self.stations: dict[str, dict] = {}
+        self.refreshed_at = 0.0
+        self.connected = False
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Optional[asyncio.Future] = None
+        self._request_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self._lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"hostapd:{self.iface}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self._close()
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self._connect()
+                backoff = 1.0
+                logger.info("hostapd control socket attached: %s", self.ctrl_path)
+                while not self._lost.is_set():
+                    try:
+                        await asyncio.wait_for(self._lost.wait(), timeout=self.ping_interval_s)
+                    except asyncio.TimeoutError:
+                        # Liveness check: a restarted hostapd forgets our ATTACH.
+                        if (await self.request("PING")).strip() != "PONG":
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("hostapd control socket %s unavailable: %s", self.ctrl_path, e)
+            await self._close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        if os.path.exists(self.local_path):
+            os.unlink(self.local_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(self.local_path)
+            sock.connect(self.ctrl_path)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        self._lost = asyncio.Event()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: _CtrlProtocol(self), sock=sock)
+        if (await self.request("ATTACH")).strip() != "OK":
+            raise RuntimeError("ATTACH rejected")
+        self.connected = True
+        await self.reload()
+
+    async def _close(self) -> None:
+        self.connected = False
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if os.path.exists(self.local_path):
+            try:
+                os.unlink(self.local_path)
+            except OSError:
+                pass
+
+    # ---- socket I/O ----
+    async def request(self, command: str, timeout: float = 2.0) -> str:
+        if self._transport is None:
+            raise ConnectionError("hostapd control socket not connected")
+        async with self._request_lock:
+            if self._transport is None:
+                raise ConnectionError("hostapd control socket not connected")
+            self._pending = asyncio.get_running_loop().create_future()
+            self._transport.sendto(command.encode())
+            try:
+                return await asyncio.wait_for(self._pending, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("hostapd %s timed out after %.1fs; reconnecting", command.split()[0], timeout)
+                self._drop()
+                raise
+            finally:
+                self._pending = None
+
+    def _drop(self) -> None:
+        """Close the socket now; _run notices (connection_lost) and reconnects with a new one."""
+        self.connected = False
+        transport, self._transport = self._transport, None
+        if transport is not None:
+            transport.close()
+
+    def _on_datagram(self, text: str) -> None:
+        if _EVENT_RE.match(text):
+            self._on_event(text[3:].strip())
+        elif self._pending is not None and not self._pending.done():
+            self._pending.set_result(text)
+
+    def _on_lost(self, exc: Optional[Exception]) -> None:
+        if self._pending is not None and not self._pending.done():
+            self._pending.set_exception(exc or ConnectionError("hostapd control socket closed"))
+        if self._lost is not None:
+            self._lost.set()
+
+    def _on_event(self, event: str) -> None:
+        parts = event.split()
+        if len(parts) < 2:
+            return
+        name, mac = parts[0], parts[1].lower()
+        if name == "AP-STA-CONNECTED":
+            self.stations.setdefault(mac, {"mac": mac})
+            asyncio.get_running_loop().create_task(self._refresh_station(mac))
+        elif name == "AP-STA-DISCONNECTED":
+            self.stations.pop(mac, None)
+
+    # ---- station table ----
+    async def _refresh_station(self, mac: str) -> None:
+        try:
+            sta = parse_station(await self.request(f"STA {mac}"))
+        except (ConnectionError, asyncio.TimeoutError):
+            return
+        if sta is not None and mac in self.stations:
+            self.stations[mac] = sta
+
+    async def reload(self) -> None:
+        """Walk the station list with STA-FIRST/STA-NEXT over the open socket."""
+        stations: dict[str, dict] = {}
+        sta = parse_station(await self.request("STA-FIRST"))
+        while sta is not None and sta["mac"] not in stations:
+            stations[sta["mac"]] = sta
+            sta = parse_station(await self.request(f"STA-NEXT {sta['mac']}"))
+        self.stations = stations
+        self.refreshed_at = time.monotonic()
+
+    async def status(self) -> dict[str, str]:
+        """STATUS reply as key=value pairs (channel, freq, bssid[0], ieee80211n, ...)."""
+        raw = {}
+        for ln in (await self.request("STATUS")).splitlines():
+            key, sep, val = ln.partition("=")
+            if sep:
+                raw[key.strip()] = val.strip()
+        return raw
+
+    async def get_stations(self) -> dict[str, dict]:
+        if self.connected and time.monotonic() - self.refreshed_at > self.refresh_after_s:
+            async with self._refresh_lock:
+                if time.monotonic() - self.refreshed_at > self.refresh_after_s:
+                    try:
+                        await self.reload()
+                    except (ConnectionError, asyncio.TimeoutError) as e:
+                        logger.warning("hostapd station refresh failed: %s", e)
+        return self.stations
+
+
+def merge_stations(leases: list[dict], stations: dict[str, dict], include_unleased: bool = True,
+                   leased_macs: Optional[set[str]] = None) -> list[dict]:
+    """Attach radio stats to DHCP leases by MAC; stations without a lease are appended
+    unless include_unleased is False. A paginated caller passes every leased MAC in
+    leased_macs, since `leases` is then only one page."""
+    merged = []
+    seen = set(leased_macs or ())
+    for lease in leases:
+        mac = (lease.get("mac") or "").lower()
+        sta = stations.get(mac)
+        seen.add(mac)
+        merged.append({**lease, "wifi": sta})
+    if not include_unleased:
+        return merged
+    for mac, sta in stations.items():
+        if mac not in seen:
+            merged.append({"ip": "", "mac": mac, "hostname": "", "wifi": sta})
+    return merged
@@ -0,0 +1,298 @@
+# backend/services/lease_history_service.py
+# Module: Client join/leave history — lease snapshot diffing and compact SQLite storage
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core import executors
+from backend.core.logging import get_logger
+from backend.db.session import SessionLocal
+from backend.services.network_service import LEASES_PATHS, read_dnsmasq_leases
+
+logger = get_logger("odoco.lease_history")
+
+EVENT_JOIN = 1
+EVENT_LEAVE = 2
+EVENT_RENEW = 3
+EVENT_NAMES = {EVENT_JOIN: "join", EVENT_LEAVE: "leave", EVENT_RENEW: "renew"}
+
+# MACs are stored as 48-bit integers and event kinds as small ints. The table is clustered
+# on (mac, ts) (WITHOUT ROWID), so per-device lookups are a single range scan.
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS client_events (
+        mac INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        kind INTEGER NOT NULL,
+        ip TEXT NOT NULL DEFAULT '',
+        hostname TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (mac, ts, kind)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_client_events_ts ON client_events (ts)",
+    # Change points of the connected-client count; ts is the rowid, so range scans are cheap.
+    """
+    CREATE TABLE IF NOT EXISTS client_concurrency (
+        ts INTEGER PRIMARY KEY,
+        connected INTEGER NOT NULL
+    )
+    """,
+    # Currently connected clients, so a restart does not replay everyone as a new join.
+    """
+    CREATE TABLE IF NOT EXISTS client_state (
+        mac INTEGER PRIMARY KEY,
+        ip TEXT NOT NULL DEFAULT '',
+        hostname TEXT NOT NULL DEFAULT '',
+        expiry INTEGER
+    )
+    """,
+]
+
+
+def mac_to_int(mac: str) -> Optional[int]:
+    digits = mac.replace(":", "").replace("-", "")
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def int_to_mac(value: int) -> str:
+    raw = f"{value:012x}"
+    return ":".join(raw[i:i + 2] for i in range(0, 12, 2))
+
+
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+def diff_snapshots(prev: dict[int, dict], current: dict[int, dict], now: int) -> list[dict]:
+    """Compare two {mac_int: lease} snapshots and return join/leave/renew event rows."""
+    events = []
+    for mac, lease in current.items():
+        old = prev.get(mac)
+        if old is None:
+            kind = EVENT_JOIN
+        elif lease["expiry"] != old["expiry"] or lease["ip"] != old["ip"]:
+            kind = EVENT_RENEW
+        else:
+            continue
+        events.append({"mac": mac, "ts": now, "kind": kind, "ip": lease["ip"], "hostname": lease["hostname"]})
+    for mac, old in prev.items():
+        if mac not in current:
+            events.append({"mac": mac, "ts": now, "kind": EVENT_LEAVE, "ip": old["ip"], "hostname": old["hostname"]})
+    return events
+
+
+class LeaseHistory:
+    """Polls the dnsmasq leases file (re-parsing only when it changes or a lease expires),
+    diffs snapshots into events and writes them to SQLite in batches."""
+
+    def __init__(self, poll_interval_s: float = 10.0, flush_interval_s: float = 30.0,
+                 batch_size: int = 500, retention_days: int = 90, renew_retention_days: int = 7):
+        self.poll_interval_s = poll_interval_s
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.renew_retention_days = renew_retention_days
+        self.current: dict[int, dict] = {}
+        self._pending: list[dict] = []
+        self._pending_counts: list[dict] = []
+        self._last_mtime: Optional[float] = None
+        self._next_expiry: Optional[int] = None
+        self._last_flush = time.monotonic()
+        self._last_compact = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    def load_state(self) -> None:
+        with SessionLocal() as db:
+            rows = db.execute(text("SELECT mac, ip, hostname, expiry FROM client_state")).all()
+        self.current = {r.mac: {"ip": r.ip, "hostname": r.hostname, "expiry": r.expiry} for r in rows}
+
+    async def start(self) -> None:
+        await executors.pools["db"].run(init_schema)
+        await executors.pools["db"].run(self.load_state)
+        self._task = asyncio.create_task(self._run(), name="lease-history")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await executors.pools["db"].run(self.flush)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await executors.pools["db"].run(self.tick)
+            except Exception:
+                logger.exception("Lease history tick failed")
+            await asyncio.sleep(self.poll_interval_s)
+
+    # ---- polling ----
+    def _leases_mtime(self) -> Optional[float]:
+        for p in LEASES_PATHS:
+            try:
+                return Path(p).stat().st_mtime
+            except OSError:
+                continue
+        return None
+
+    def tick(self) -> None:
+        now = int(time.time())
+        mtime = self._leases_mtime()
+        expired = self._next_expiry is not None and now >= self._next_expiry
+        if mtime != self._last_mtime or expired:
+            self._last_mtime = mtime
+            self.observe(read_dnsmasq_leases(), now)
+
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+        if time.monotonic() - self._last_compact >= 6 * 3600:
+            self.compact(now)
+
+    def observe(self, leases: list[dict], now: int) -> list[dict]:
+        snapshot: dict[int, dict] = {}
+        next_expiry = None
+        for lease in leases:
+            mac = mac_to_int(lease.get("mac", ""))
+            expiry = lease.get("expiry_epoch")
+            if mac is None:
+                continue
+            # dnsmasq may keep an expired lease in the file for a while; it is gone for us.
+            if expiry and expiry <= now:
+                continue
+            snapshot[mac] = {"ip": lease.get("ip", ""), "hostname": lease.get("hostname", ""), "expiry": expiry}
+            if expiry and (next_expiry is None or expiry < next_expiry):
+                next_expiry = expiry
+        self._next_expiry = next_expiry
+
+        events = diff_snapshots(self.current, snapshot, now)
+        if events:
+            self._pending.extend(events)
+            if len(snapshot) != len(self.current):
+                self._pending_counts.append({"ts": now, "connected": len(snapshot)})
+        self.current = snapshot
+        return events
+
+    # ---- storage ----
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending and not self._pending_counts:
+            return
+        events, counts = self._pending, self._pending_counts
+        self._pending, self._pending_counts = [], []
+        state = [{"mac": mac, **lease} for mac, lease in self.current.items()]
+        try:
+            with SessionLocal() as db:
+                if events:
+                    db.execute(text(
+                        "INSERT OR IGNORE INTO client_events (mac, ts, kind, ip, hostname) "
+                        "VALUES (:mac, :ts, :kind, :ip, :hostname)"
+                    ), events)
+                if counts:
+                    db.execute(text(
+                        "INSERT OR REPLACE INTO client_concurrency (ts, connected) VALUES (:ts, :connected)"
+                    ), counts)
+                db.execute(text("DELETE FROM client_state"))
+                if state:
+                    db.execute(text(
+                        "INSERT INTO client_state (mac, ip, hostname, expiry) VALUES (:mac, :ip, :hostname, :expiry)"
+                    ), state)
+                db.commit()
+        except Exception:
+            # e.g. "database is locked": keep the events for the next flush, ahead of newer ones.
+            self._pending = events + self._pending
+            self._pending_counts = counts + self._pending_counts
+            raise
+        logger.info("Lease history flushed %d events", len(events))
+
+    def compact(self, now: int) -> None:
+        """Retention policy: drop renews after a week and everything after the retention window."""
+        self._last_compact = time.monotonic()
+        renew_cutoff = now - self.renew_retention_days * 86400
+        cutoff = now - self.retention_days * 86400
+        with SessionLocal() as db:
+            renews = db.execute(text(
+                "DELETE FROM client_events WHERE ts < :cutoff AND kind = :kind"
+            ), {"cutoff": renew_cutoff, "kind": EVENT_RENEW}).rowcount
+            old = db.execute(text("DELETE FROM client_events WHERE ts < :cutoff"), {"cutoff": cutoff}).rowcount
+            # Keep the last change point before the cutoff so the series still has a start value.
+            db.execute(text(
+                "DELETE FROM client_concurrency WHERE ts < "
+                "(SELECT MAX(ts) FROM client_concurrency WHERE ts < :cutoff)"
+            ), {"cutoff": cutoff})
+            db.commit()
+        if renews or old:
+            logger.info("Lease history compacted: %d renews, %d expired events removed", renews, old)
+
+
+# =========================
+# Queries
+# =========================
+def query_history(mac: Optional[str], since: Optional[int], until: Optional[int], limit: int) -> list[dict]:
+    clauses = []
+    params: dict = {"limit": limit}
+    if mac:
+        mac_int = mac_to_int(mac)
+        if mac_int is None:
+            raise ValueError(f"Invalid MAC address: {mac}")
+        clauses.append("mac = :mac")
+        params["mac"] = mac_int
+    if since is not None:
+        clauses.append("ts >= :since")
+        params["since"] = since
+    if until is not None:
+        clauses.append("ts < :until")
+        params["until"] = until
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with SessionLocal() as db:
+        rows = db.execute(text(
+            f"SELECT mac, ts, kind, ip, hostname FROM client_events {where} ORDER BY ts DESC LIMIT :limit"
+        ), params).all()
+    return [
+        {"mac": int_to_mac(r.mac), "ts": r.ts, "event": EVENT_NAMES.get(r.kind, "unknown"),
+         "ip": r.ip, "hostname": r.hostname}
+        for r in rows
+    ]
+
+
+def query_concurrency(since: int, until: int, bucket_s: int) -> dict:
+    """Max connected clients per time bucket, from the change-point table (not the event log)."""
+    with SessionLocal() as db:
+        start = db.execute(text(
+            "SELECT connected FROM client_concurrency WHERE ts < :since ORDER BY ts DESC LIMIT 1"
+        ), {"since": since}).scalar()
+        rows = db.execute(text(
+            "SELECT ts, connected FROM client_concurrency WHERE ts >= :since AND ts < :until ORDER BY ts"
+        ), {"since": since, "until": until}).all()
+
+    level = start or 0
+    buckets: list[dict] = []
+    i = 0
+    for b_start in range(since - since % bucket_s, until, bucket_s):
+        b_end = b_start + bucket_s
+        peak = level
+        while i < len(rows) and rows[i].ts < b_end:
+            level = rows[i].connected
+            peak = max(peak, level)
+            i += 1
+        buckets.append({"ts": b_start, "max_connected": peak})
+
+    peak = max(buckets, key=lambda b: b["max_connected"]) if buckets else None
+    return {
+        "since": since,
+        "until": until,
+        "bucket_s": bucket_s,
+        "peak": peak,
+        "series": buckets,
+    }
@@ -1,2 +1,405 @@
 # backend/services/network_service.py
 # Module: Network-related business logic (WAN, gateway, status)
+
+import re
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+from backend.core.metrics import collector, command_name, track_subprocess
+from backend.core.privhelper import OpError
+from backend.core.singleflight import coalesce
+from backend.services.helper_client import run_privileged
+
+# dnsmasq lease file locations (Debian / other distros).
+LEASES_PATHS = [
+    "/var/lib/misc/dnsmasq.leases",
+    "/var/lib/dnsmasq/dnsmasq.leases",
+]
+
+# Last successful wlan0 scan, reused by the WAN supervisor to rank failover candidates and
+# by the channel planner ("bssids": every radio heard, with its channel).
+LAST_SCAN: dict = {"ts": 0.0, "networks": [], "bssids": []}
+
+
+def parse_kv_from_file(path: str, key: str) -> str:
+    p = Path(path)
+    if not p.exists():
+        return ""
+    for ln in p.read_text(errors="ignore").splitlines():
+        ln = ln.strip()
+        if ln.startswith(f"{key}="):
+            return ln.split("=", 1)[1].strip()
+    return ""
+
+@coalesce(ttl_s=5.0)
+@collector
+def get_hostapd_iface_and_ssid():
+    hostapd_paths = ["/etc/hostapd/hostapd.conf", "/etc/hostapd.conf"]
+    for hp in hostapd_paths:
+        if Path(hp).exists():
+            return {
+                "path": hp,
+                "ap_iface": parse_kv_from_file(hp, "interface"),
+                "ssid": parse_kv_from_file(hp, "ssid"),
+            }
+    return {"path": "", "ap_iface": "", "ssid": ""}
+
+def split_terse(line: str) -> list[str]:
+    """nmcli -t fields: ":"-separated, with ":" and "\\" inside values escaped by "\\"."""
+    fields, cur, escaped = [], [], False
+    for ch in line:
+        if escaped:
+            cur.append(ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == ":":
+            fields.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+    fields.append("".join(cur))
+    return fields
+
+@coalesce(ttl_s=5.0)
+@collector
+def get_dnsmasq_dhcp_info():
+    # We read only /etc/dnsmasq.conf for now (your config is there).
+    p = "/etc/dnsmasq.conf"
+    iface = parse_kv_from_file(p, "interface")
+    dhcp_range = parse_kv_from_file(p, "dhcp-range")
+    return {"path": p, "dhcp_iface": iface, "dhcp_range": dhcp_range}
+
+def ip_addr_brief(iface: str) -> str:
+    with track_subprocess("ip") as t:
+        try:
+            out = subprocess.check_output(["ip", "-4", "-br", "addr", "show", iface], stderr=subprocess.DEVNULL)
+            return out.decode().strip()
+        except Exception:
+            t.failed = True
+            return ""
+
+
+
+def run_cmd(args: list[str], timeout: int = 20) -> dict:
+    with track_subprocess(command_name(args)) as t:
+        try:
+            res = subprocess.run(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=timeout,
+                check=False
+            )
+            t.failed = res.returncode != 0
+            return {
+                "rc": res.returncode,
+                "stdout": (res.stdout or "").strip(),
+                "stderr": (res.stderr or "").strip(),
+            }
+        except Exception as e:
+            t.failed = True
+            return {"rc": 99, "stdout": "", "stderr": str(e)}
+
+
+@coalesce(ttl_s=2.0)
+def get_iface_ipv4(iface: str) -> str:
+    if not iface:
+        return ""
+    out = ip_addr_brief(iface)
+    # example: wlan1 UP 192.168.50.1/24
+    m = re.search(r"\b(\d+\.\d+\.\d+\.\d+/\d+)\b", out)
+    return m.group(1) if m else ""
+
+def sh(cmd: str) -> str:
+    """Run a shell command and return stdout (safe for read-only ops)."""
+    with track_subprocess(command_name(cmd)) as t:
+        try:
+            return subprocess.check_output(cmd, shell=True, stderr=subprocess.DEVNULL).decode().strip()
+        except Exception:
+            t.failed = True
+            return ""
+
+# Overlapping rescans disturb each other; concurrent callers share one scan.
+@coalesce(ttl_s=5.0)
+@collector
+def wifi_scan_wlan0():
+    res = run_privileged("wifi_scan", iface="wlan0", rescan=True)
+
+    if res["rc"] != 0:
+        return []
+
+    out = res["stdout"]
+
+    best = {}
+    bssids = []
+    for ln in out.splitlines():
+        if not ln.strip():
+            continue
+        parts = split_terse(ln)
+        inuse = (parts[0] == "*") if len(parts) >= 1 else False
+        ssid = parts[1] if len(parts) >= 2 else ""
+        signal = int(parts[2]) if len(parts) >= 3 and parts[2].isdigit() else 0
+        security = parts[3] if len(parts) >= 4 else ""
+        bssid = parts[4].lower() if len(parts) >= 5 else ""
+        channel = int(parts[5]) if len(parts) >= 6 and parts[5].isdigit() else None
+        # FREQ is "2437 MHz"
+        freq = parts[6].split(" ", 1)[0] if len(parts) >= 7 else ""
+        freq = int(freq) if freq.isdigit() else None
+
+        if bssid and channel:
+            # Hidden networks and our own setup AP still take airtime.
+            bssids.append({"bssid": bssid, "ssid": ssid, "signal": signal, "channel": channel, "freq_mhz": freq})
+
+        if not ssid or ssid == "ODOCO_SETUP":
+            continue
+
+        rec = {"in_use": inuse, "ssid": ssid, "signal": signal, "security": security, "channel": channel}
+        if ssid not in best or signal > (best[ssid]["signal"] or 0) or inuse:
+            best[ssid] = rec
+
+    nets = list(best.values())
+    nets.sort(key=lambda x: (not x["in_use"], -(x["signal"] or 0), x["ssid"]))
+    LAST_SCAN["ts"] = time.time()
+    LAST_SCAN["networks"] = nets
+    LAST_SCAN["bssids"] = bssids
+    return nets
+
+def nmcli_saved_wifi_connections() -> list[str]:
+    res = run_privileged("saved_connections")
+    if res["rc"] != 0:
+        return []
+    names = []
+    for ln in res["stdout"].splitlines():
+        # NAME may contain escaped colons ("\:"); TYPE is always the last field.
+        name, _, ctype = ln.rpartition(":")
+        if ctype in ("802-11-wireless", "wifi") and name:
+            names.append(name.replace("\\:", ":"))
+    return names
+
+def nmcli_wifi_profile_ssid(name: str) -> str:
+    """SSID a saved profile connects to ("" if nmcli cannot tell)."""
+    try:
+        res = run_privileged("connection_ssid", name=name)
+    except OpError:
+        return ""
+    return res["stdout"].strip().replace("\\:", ":") if res["rc"] == 0 else ""
+
+
+def nmcli_saved_wifi_profiles() -> list[dict]:
+    """[{"name": profile, "ssid": network}]; a profile named "Casa" may join SSID "MOVISTAR_1A2B"."""
+    return [{"name": name, "ssid": nmcli_wifi_profile_ssid(name) or name} for name in nmcli_saved_wifi_connections()]
+
+
+def nmcli_connection_up(name: str, iface: str = "wlan0"):
+    """Activate a saved profile by name (its stored secrets and settings, not a new one)."""
+    try:
+        res = run_privileged("connection_up", name=name, iface=iface)
+    except OpError as e:
+        return {"rc": 2, "stdout": "", "stderr": str(e)}
+    nmcli_wlan0_state.cache_clear()
+    wifi_scan_wlan0.cache_clear()
+    return res
+
+
+def nmcli_connect_wlan0(ssid: str, password: Optional[str]):
+    try:
+        res = run_privileged("wifi_connect", ssid=ssid, password=password, iface="wlan0")
+    except OpError as e:
+        return {"rc": 2, "stdout": "", "stderr": str(e)}
+    # The link changed: cached state and scan results (IN-USE) are stale now.
+    nmcli_wlan0_state.cache_clear()
+    wifi_scan_wlan0.cache_clear()
+    return res
+
+
+@coalesce(ttl_s=1.0)
+@collector
+def nmcli_wlan0_state():
+    res = run_privileged("device_status")
+    out = res["stdout"]
+
+    for ln in out.splitlines():
+        if ln.startswith("wlan0:"):
+            parts = ln.split(":", 2)
+            return {
+                "raw": ln,
+                "state": parts[1] if len(parts) > 1 else "",
+                "connection": parts[2] if len(parts) > 2 else "",
+            }
+
+    return {"raw": out.strip(), "state": "", "connection": ""}
+
+
+
+
+def ping(ip: str, count: int = 1, timeout_sec: int = 2) -> bool:
+    if not ip:
+        return False
+    try:
+        return run_privileged("ping", host=ip, count=count, timeout=timeout_sec)["rc"] == 0
+    except OpError:
+        return False
+
+def dns_resolve(hostname: str) -> bool:
+    if not hostname:
+        return False
+    try:
+        return run_privileged("dns_resolve", hostname=hostname)["rc"] == 0
+    except OpError:
+        return False
+
+
+@coalesce(ttl_s=3.0)
+def check_internet() -> dict:
+    # Several tabs pressing "Test internet" share one set of pings and lookups.
+    internet_ip_ok = ping("1.1.1.1") or ping("8.8.8.8")
+    dns_ok = dns_resolve("one.one.one.one") or dns_resolve("google.com")
+    gw = get_default_route()["gateway"]
+    gw_ok = ping(gw) if gw else False
+
+    return {
+        "ok": bool(gw_ok and internet_ip_ok and dns_ok),
+        "gateway": gw,
+        "ping_ok": bool(internet_ip_ok),
+        "dns_ok": bool(dns_ok),
+        "gateway_ping_ok": bool(gw_ok),
+    }
+
+
+def connect_and_verify(ssid: str, password: Optional[str], wait_sec: int = 20, profile: Optional[str] = None):
+    # With a saved profile, bring that profile up instead of creating one from the SSID.
+    connect_output = nmcli_connection_up(profile) if profile else nmcli_connect_wlan0(ssid, password)
+
+    # wait for NM state to become connected
+    t0 = time.time()
+    state = nmcli_wlan0_state()
+    while time.time() - t0 < wait_sec:
+        state = nmcli_wlan0_state()
+        if state["state"] == "connected":
+            break
+        time.sleep(1)
+
+    route = get_default_route()
+    default_route = route["raw"]
+    gw = route["gateway"]
+
+    # Connectivity checks
+    gw_ok = ping(gw) if gw else False
+    internet_ip_ok = ping("1.1.1.1") or ping("8.8.8.8")
+    dns_ok = dns_resolve("one.one.one.one") or dns_resolve("google.com")
+
+    ok = (state["state"] == "connected") and gw_ok and internet_ip_ok and dns_ok
+
+    return {
+        "ok": ok,
+        "ssid_requested": ssid,
+        "profile": profile,
+        "nmcli_connect": connect_output,
+        "wlan0_state": state,
+        "default_route": default_route,
+        "gateway": gw,
+        "checks": {
+            "gateway_ping": gw_ok,
+            "internet_ping": internet_ip_ok,
+            "dns_resolve": dns_ok
+        }
+    }
+
+
+@coalesce()
+@collector
+def get_default_route():
+    out = sh("ip route show default")
+    # example: default via 172.16.1.1 dev wlan0 proto dhcp src 172.16.1.212 metric 600
+    m_dev = re.search(r"\bdev\s+(\S+)", out)
+    m_gw  = re.search(r"\bvia\s+(\S+)", out)
+    m_src = re.search(r"\bsrc\s+(\S+)", out)
+    return {
+        "raw": out,
+        "wan_iface": m_dev.group(1) if m_dev else "",
+        "gateway": m_gw.group(1) if m_gw else "",
+        "wan_ip": m_src.group(1) if m_src else "",
+    }
+
+def guess_lan_from_leases(clients):
+    # If we have clients like 192.168.50.153, return "192.168.50.0/24"
+    if not clients:
+        return ""
+    ip = clients[0].get("ip", "")
+    parts = ip.split(".")
+    if len(parts) == 4:
+        return f"{parts[0]}.{parts[1]}.{parts[2]}.0/24"
+    return ""
+
+
+@coalesce()
+@collector
+def read_dnsmasq_leases():
+    for p in LEASES_PATHS:
+        fp = Path(p)
+        if fp.exists():
+            rows = []
+            for ln in fp.read_text(errors="ignore").splitlines():
+                if not ln.strip():
+                    continue
+                # format: expiry epoch, mac, ip, hostname, clientid
+                parts = ln.split()
+                if len(parts) >= 5:
+                    expiry, mac, ip, hostname, clientid = parts[:5]
+                    now = int(time.time())
+                    expiry_int = int(expiry) if expiry.isdigit() else None
+                    expires_in = (expiry_int - now) if expiry_int else None
+
+                    rows.append({
+                        "ip": ip,
+                        "mac": mac,
+                        "hostname": "" if hostname == "*" else hostname,
+                        "expiry_epoch": expiry_int,
+                        "expires_in_seconds": expires_in,
+                        "expires_in_minutes": (expires_in // 60) if expires_in is not None else None,
+                        "clientid": "" if clientid == "*" else clientid,
+                    })
+            return rows
+    return []
+
+
+@coalesce(ttl_s=5.0)
+def get_ssid() -> str:
+    # Try common hostapd paths. We don't change anything; read-only.
+    candidates = [
+        "/etc/hostapd/hostapd.conf",
+        "/etc/hostapd.conf",
+    ]
+    for p in candidates:
+        if Path(p).exists():
+            line = sh(f"grep -E '^\\s*ssid=' {p} | tail -n 1")
+            if line and "=" in line:
+                return line.split("=", 1)[1].strip()
+    return "Unknown"
+
+
+@coalesce(ttl_s=2.0)
+@collector
+def get_dns_resolv_conf():
+    p = Path("/etc/resolv.conf")
+    if not p.exists():
+        return []
+    # Return only nameserver lines
+    lines = [ln.strip() for ln in p.read_text(errors="ignore").splitlines()]
+    return [ln for ln in lines if ln.startswith("nameserver")]
+
+
+def get_clients_count() -> int:
+    # dnsmasq leases file (common path)
+    for p in LEASES_PATHS:
+        fp = Path(p)
+        if fp.exists():
+            content = fp.read_text(errors="ignore").strip()
+            if not content:
+                return 0
+            return len([ln for ln in content.splitlines() if ln.strip()])
+    return 0
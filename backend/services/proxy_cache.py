@@ -0,0 +1,279 @@
+# backend/services/proxy_cache.py
+# Module: Proxy cache — size-bounded on-disk LRU with HTTP freshness rules
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from backend.core.logging import get_logger
+
+logger = get_logger("odoco.proxy")
+
+CACHEABLE_STATUS = {200, 203, 301, 308, 404, 410}
+# Last-Modified heuristic (RFC 9111 4.2.2): 10% of the age, capped at a day.
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_S = 86400
+STATS_FILE = "stats.json"
+
+# Not forwarded and not stored.
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-connection", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade",
+}
+
+
+def parse_cache_control(value: str) -> dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def request_cacheable(method: str, headers: dict[str, str]) -> bool:
+    if method != "GET" or "authorization" in headers or "range" in headers:
+        return False
+    return "no-store" not in parse_cache_control(headers.get("cache-control", ""))
+
+
+def freshness_lifetime(status: int, headers: dict[str, str], now: float) -> Optional[float]:
+    """Seconds the response is fresh for; 0 = store but revalidate every time; None = do not store."""
+    if status not in CACHEABLE_STATUS or "set-cookie" in headers:
+        return None
+    cc = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in cc or "private" in cc:
+        return None
+    vary = {v.strip().lower() for v in headers.get("vary", "").split(",") if v.strip()}
+    if vary - {"accept-encoding"}:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    for directive in ("s-maxage", "max-age"):
+        if directive in cc:
+            seconds = _seconds(cc[directive])
+            if seconds is not None:
+                return float(seconds)
+    date = http_date(headers.get("date")) or now
+    expires = http_date(headers.get("expires"))
+    if "expires" in headers:
+        # An invalid Expires (e.g. "0") means already expired.
+        return max(expires - date, 0.0) if expires is not None else 0.0
+    last_modified = http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(max(date - last_modified, 0.0) * HEURISTIC_FRACTION, HEURISTIC_MAX_S)
+    return 0.0 if "etag" in headers else None
+
+
+def cache_key(url: str, accept_encoding: str) -> str:
+    # Only the codings we might get back matter; everything else shares one variant.
+    codings = ",".join(c for c in ("br", "gzip") if c in accept_encoding.lower())
+    return hashlib.sha256(f"{url}\n{codings}".encode()).hexdigest()
+
+
+class CacheEntry:
+    __slots__ = ("key", "url", "status", "reason", "headers", "size", "stored_at", "fresh_until")
+
+    def __init__(self, key: str, url: str, status: int, reason: str, headers: list[tuple[str, str]],
+                 size: int, stored_at: float, fresh_until: float):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.size = size
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+
+    def header(self, name: str) -> Optional[str]:
+        for k, v in self.headers:
+            if k.lower() == name:
+                return v
+        return None
+
+    def fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def to_meta(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class CacheWriter:
+    """Body of one response being stored; committed only if it finished within the size cap."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.failed = False
+        self._fh = open(path, "wb")
+
+    def write(self, data: bytes) -> None:
+        if self.failed:
+            return
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.abort()
+            return
+        self._fh.write(data)
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    def abort(self) -> None:
+        self.failed = True
+        self.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class DiskCache:
+    """Bodies in <dir>/<key>.body, metadata in <key>.meta; the LRU order and byte total are
+    kept in memory and rebuilt from the .meta files (by mtime = last use) at startup.
+
+    Everything that touches the disk runs on the "disk" pool; `_lock` guards the index so
+    lookups on the event loop see it consistent, and files are unlinked outside the lock.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_object_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def body_path(self, entry: CacheEntry) -> str:
+        return self._path(entry.key, "body")
+
+    def load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.unlink(path)
+            elif name.endswith(".meta"):
+                try:
+                    with open(path) as fh:
+                        entry = CacheEntry(**json.load(fh))
+                    if os.path.getsize(self.body_path(entry)) != entry.size:
+                        raise ValueError("size mismatch")
+                    found.append((os.path.getmtime(path), entry))
+                except (OSError, ValueError, TypeError):
+                    self._unlink(name[:-5])
+        with self._lock:
+            for _, entry in sorted(found, key=lambda item: item[0]):
+                self.entries[entry.key] = entry
+                self.total_bytes += entry.size
+            victims = self._evict()
+        self._unlink_all(victims)
+        logger.info("Proxy cache: %d entries, %.1f MB in %s", len(self.entries), self.total_bytes / 1e6, self.directory)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        return entry
+
+    def begin(self, key: str) -> CacheWriter:
+        return CacheWriter(self._path(key, f"{os.getpid()}.{time.monotonic_ns()}.tmp"), self.max_object_bytes)
+
+    def commit(self, writer: CacheWriter, entry: CacheEntry) -> bool:
+        writer.close()
+        if writer.failed:
+            return False
+        entry.size = writer.size
+        os.replace(writer.path, self._path(entry.key, "body"))
+        self._write_meta(entry)
+        with self._lock:
+            old = self.entries.pop(entry.key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            self.entries[entry.key] = entry
+            self.total_bytes += entry.size
+            victims = self._evict()
+        self._unlink_all(victims)
+        return True
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Persist refreshed metadata (after a 304) and the new LRU position."""
+        self._write_meta(entry)
+
+    def _write_meta(self, entry: CacheEntry) -> None:
+        tmp = self._path(entry.key, "meta.tmp")
+        with open(tmp, "w") as fh:
+            json.dump(entry.to_meta(), fh)
+        os.replace(tmp, self._path(entry.key, "meta"))
+
+    def _evict(self) -> list[str]:
+        """Drop least-recently-used entries over the byte cap; caller holds _lock and unlinks."""
+        victims = []
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            victims.append(key)
+        return victims
+
+    def _unlink_all(self, keys: list[str]) -> None:
+        for key in keys:
+            self._unlink(key)
+
+    def _unlink(self, key: str) -> None:
+        for suffix in ("body", "meta"):
+            try:
+                os.unlink(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def purge(self) -> int:
+        with self._lock:
+            victims = list(self.entries)
+            self.entries.clear()
+            self.total_bytes = 0
+        self._unlink_all(victims)
+        return len(victims)
+
+
+def write_stats(directory: str, stats: dict) -> None:
+    tmp = os.path.join(directory, STATS_FILE + ".tmp")
+    with open(tmp, "w") as fh:
+        json.dump(stats, fh)
+    os.replace(tmp, os.path.join(directory, STATS_FILE))
+
+
+def read_stats(directory: str) -> Optional[dict]:
+    """Counters published by whichever worker runs the proxy (None if it never ran)."""
+    try:
+        with open(os.path.join(directory, STATS_FILE)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
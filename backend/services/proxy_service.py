@@ -0,0 +1,746 @@
+# backend/services/proxy_service.py
+# Module: Caching HTTP forward proxy — asyncio server, pooled upstreams, coalesced misses, sendfile hits
+
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.core.snapshot import LeaderLock
+from backend.db.models import Mode
+from backend.db.session import SessionLocal
+from backend.services.network_service import get_default_route
+from backend.services.proxy_cache import (
+    HOP_BY_HOP,
+    CacheEntry,
+    DiskCache,
+    cache_key,
+    freshness_lifetime,
+    http_date,
+    parse_cache_control,
+    request_cacheable,
+    write_stats,
+)
+
+logger = get_logger("odoco.proxy")
+
+MAX_HEADER_BYTES = 64 * 1024
+READ_CHUNK = 64 * 1024
+CLIENT_IDLE_S = 60.0
+UPSTREAM_TIMEOUT_S = 15.0
+# Stats file, WAN state and active mode are refreshed at most this often.
+STATS_INTERVAL_S = 5.0
+WAN_CHECK_S = 2.0
+MODE_CHECK_S = 10.0
+CONNECT_PORTS = {443, 8443}
+RESOLVE_TTL_S = 30.0
+
+PROXY_REQUESTS_TOTAL = metrics.Counter(
+    "odoco_proxy_requests_total",
+    "Proxy requests by result (hit, miss, revalidated, stale, bypass, tunnel, error).",
+    ("result",),
+)
+PROXY_BYTES_TOTAL = metrics.Counter(
+    "odoco_proxy_bytes_total", "Response body bytes sent by the proxy, by source.", ("source",)
+)
+
+REASONS = {400: "Bad Request", 403: "Forbidden", 411: "Length Required", 431: "Request Header Fields Too Large",
+           502: "Bad Gateway", 504: "Gateway Timeout", 508: "Loop Detected"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class Refused(Exception):
+    """The request must not go upstream (loop, or a target on this router)."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+
+
+def is_local_address(addr: str) -> bool:
+    """True for loopback/unspecified addresses and for any address assigned to this host
+    (binding to it succeeds), i.e. the proxy itself and every router-local service."""
+    ip = ipaddress.ip_address(addr.split("%", 1)[0])
+    if ip.is_loopback or ip.is_unspecified or ip.is_multicast:
+        return True
+    with socket.socket(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.bind((str(ip), 0))
+        except OSError:
+            return False
+    return True
+
+
+def parse_head(head: bytes) -> tuple[list[str], list[tuple[str, str]]]:
+    lines = head.decode("latin-1").split("\r\n")
+    start = lines[0].split(" ", 2)
+    if len(start) != 3:
+        raise BadRequest(f"bad start line: {lines[0][:80]!r}")
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep or not name or name != name.strip():
+            raise BadRequest(f"bad header line: {line[:80]!r}")
+        headers.append((name, value.strip()))
+    return start, headers
+
+
+def header_map(headers: list[tuple[str, str]]) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for name, value in headers:
+        name = name.lower()
+        out[name] = f"{out[name]}, {value}" if name in out else value
+    return out
+
+
+def end_to_end(headers: list[tuple[str, str]], drop: tuple[str, ...] = ()) -> list[tuple[str, str]]:
+    """Strip hop-by-hop headers, including those nominated by Connection."""
+    nominated = {t.strip().lower() for n, v in headers if n.lower() == "connection" for t in v.split(",")}
+    skip = HOP_BY_HOP | nominated | set(drop)
+    return [(n, v) for n, v in headers if n.lower() not in skip]
+
+
+def render_head(start: str, headers: list[tuple[str, str]]) -> bytes:
+    return (start + "\r\n" + "".join(f"{n}: {v}\r\n" for n, v in headers) + "\r\n").encode("latin-1")
+
+
+async def read_head(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """One header block, or None on a clean EOF between messages."""
+    try:
+        return await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+
+
+async def iter_body(reader: asyncio.StreamReader, headers: dict[str, str], status: int, method: str):
+    """Yields the decoded body (de-chunked) of an upstream response."""
+    if method == "HEAD" or status in (204, 304) or status < 200:
+        return
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            line = await reader.readline()
+            size = int(line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers are dropped
+                return
+            while size:
+                data = await reader.readexactly(min(size, READ_CHUNK))
+                size -= len(data)
+                yield data
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining:
+            data = await reader.read(min(remaining, READ_CHUNK))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(data)
+            yield data
+    else:
+        while data := await reader.read(READ_CHUNK):
+            yield data
+
+
+async def _pipe(src: asyncio.StreamReader, dst: asyncio.StreamWriter) -> None:
+    try:
+        while data := await src.read(READ_CHUNK):
+            dst.write(data)
+            await dst.drain()
+        if dst.can_write_eof():
+            dst.write_eof()
+    except (ConnectionError, OSError):
+        dst.close()
+
+
+class ProxyRequest:
+    __slots__ = ("method", "host", "port", "path", "url", "version", "headers", "hdr", "keep_alive")
+
+    def __init__(self, start: list[str], headers: list[tuple[str, str]]):
+        self.method, target, self.version = start
+        self.headers = headers
+        self.hdr = header_map(headers)
+        if target.startswith("http://"):
+            authority, _, rest = target[7:].partition("/")
+            self.path = "/" + rest
+        elif target.startswith("/"):
+            # Transparent redirect: origin-form target, the authority comes from Host.
+            authority, self.path = self.hdr.get("host", ""), target
+        else:
+            raise BadRequest(f"unsupported target: {target[:80]!r}")
+        host, _, port = authority.rpartition(":") if authority.rfind(":") > authority.rfind("]") else (authority, "", "")
+        self.host = host.strip("[]").lower()
+        if not self.host:
+            raise BadRequest("missing host")
+        try:
+            self.port = int(port) if port else 80
+        except ValueError:
+            raise BadRequest(f"bad port: {port!r}")
+        self.url = f"http://{self.host}{'' if self.port == 80 else f':{self.port}'}{self.path}"
+        connection = self.hdr.get("connection", self.hdr.get("proxy-connection", "")).lower()
+        self.keep_alive = "close" not in connection and (self.version == "HTTP/1.1" or "keep-alive" in connection)
+
+
+class Upstream:
+    __slots__ = ("reader", "writer", "status", "reason", "headers", "hdr", "reusable")
+
+    def __init__(self, reader, writer, status: int, reason: str, headers: list[tuple[str, str]]):
+        self.reader = reader
+        self.writer = writer
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.hdr = header_map(headers)
+        framed = "content-length" in self.hdr or "chunked" in self.hdr.get("transfer-encoding", "").lower()
+        self.reusable = "close" not in self.hdr.get("connection", "").lower() and (framed or status in (204, 304))
+
+
+class UpstreamPool:
+    """Idle keep-alive connections per (host, port); a connection is reused by one request at a time."""
+
+    def __init__(self, max_idle_per_host: int = 4, idle_s: float = 30.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_s = idle_s
+        self._idle: dict[tuple[str, int], list[tuple[asyncio.StreamReader, asyncio.StreamWriter, float]]] = {}
+        self.opened = 0
+        self.reused = 0
+
+    async def acquire(self, host: str, port: int, addr: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        idle = self._idle.get((host, port))
+        now = time.monotonic()
+        while idle:
+            reader, writer, ts = idle.pop()
+            if now - ts < self.idle_s and not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(addr, port, limit=MAX_HEADER_BYTES),
+                                                UPSTREAM_TIMEOUT_S)
+        self.opened += 1
+        return reader, writer, False
+
+    def release(self, host: str, port: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        idle = self._idle.setdefault((host, port), [])
+        if len(idle) >= self.max_idle_per_host or writer.is_closing():
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    def expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_s
+        for key, idle in list(self._idle.items()):
+            keep = [conn for conn in idle if conn[2] > cutoff and not conn[1].is_closing()]
+            for conn in idle:
+                if conn not in keep:
+                    conn[1].close()
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+
+    def close(self) -> None:
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle.clear()
+
+    def status(self) -> dict:
+        return {"idle": sum(len(v) for v in self._idle.values()), "opened": self.opened, "reused": self.reused}
+
+
+class ForwardProxy:
+    """One worker per host serves (flock next to the cache); the others retry the lock, so a
+    restarted worker takes over. Cacheable GETs are answered from the disk cache when fresh,
+    revalidated with the stored validators when stale, and fetched once for concurrent misses."""
+
+    def __init__(self, cache: DiskCache, listen_host: str, port: int, allow: list[str],
+                 stale_modes: list[str], stale_if_error: bool = False):
+        self.cache = cache
+        self.listen_host = listen_host
+        self.port = port
+        self.allow = [ipaddress.ip_network(net, strict=False) for net in allow]
+        self.stale_modes = {m.strip().lower() for m in stale_modes if m.strip()}
+        self.stale_if_error = stale_if_error
+        self.pool = UpstreamPool()
+        # RFC 9110 7.6.3 pseudonym; seeing it in a request's Via means it came back to us.
+        self.via_name = f"odoco-{socket.gethostname()}".lower()
+        self.via = f"1.1 {self.via_name}"
+        self._resolved: dict[tuple[str, int], tuple[float, Optional[str]]] = {}
+        self.stats = {k: 0 for k in ("requests", "hits", "misses", "revalidated", "stale", "coalesced",
+                                     "bypass", "tunnels", "errors", "bytes_from_cache", "bytes_from_upstream")}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._lock = LeaderLock(os.path.join(cache.directory, ".lock"))
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wan = (0.0, True)
+        self._mode = (0.0, False)
+
+    @property
+    def role(self) -> str:
+        return "server" if self._server is not None else "standby"
+
+    # -- lifecycle --
+    async def start(self) -> None:
+        os.makedirs(self.cache.directory, exist_ok=True)
+        self._task = asyncio.create_task(self._run(), name="proxy")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            await self._publish_stats()
+        self.pool.close()
+        self._lock.release()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._server is None and self._lock.try_acquire():
+                    await executors.pools["disk"].run(self.cache.load)
+                    self._server = await asyncio.start_server(self._client, self.listen_host, self.port,
+                                                              limit=MAX_HEADER_BYTES, backlog=512)
+                    logger.info("Proxy (pid %d) on %s:%d, cache %s", os.getpid(), self.listen_host, self.port,
+                                self.cache.directory)
+                if self._server is not None:
+                    self.pool.expire()
+                    await self._publish_stats()
+            except Exception:
+                logger.exception("Proxy loop failed")
+            await asyncio.sleep(STATS_INTERVAL_S)
+
+    async def _publish_stats(self) -> None:
+        try:
+            await executors.pools["disk"].run(write_stats, self.cache.directory, self.summary())
+        except (OSError, executors.PoolSaturated) as e:
+            logger.warning("Proxy stats not written: %s", e)
+
+    # -- state --
+    def summary(self) -> dict:
+        s = self.stats
+        lookups = s["hits"] + s["revalidated"] + s["stale"] + s["misses"]
+        served = s["bytes_from_cache"] + s["bytes_from_upstream"]
+        return {
+            **s,
+            "hit_ratio": round((lookups - s["misses"]) / lookups, 4) if lookups else None,
+            "byte_hit_ratio": round(s["bytes_from_cache"] / served, 4) if served else None,
+            "bytes_saved": s["bytes_from_cache"],
+            "cache_entries": len(self.cache.entries),
+            "cache_bytes": self.cache.total_bytes,
+            "cache_max_bytes": self.cache.max_bytes,
+            "updated_at": int(time.time()),
+        }
+
+    def status(self) -> dict:
+        return {
+            "role": self.role,
+            "listen": f"{self.listen_host}:{self.port}",
+            "cache_dir": self.cache.directory,
+            "stale_modes": sorted(self.stale_modes),
+            "stale_if_error": self.stale_if_error,
+            "inflight": len(self._inflight),
+            "upstream": self.pool.status(),
+            **self.summary(),
+        }
+
+    def _count(self, result: str, stat: str) -> None:
+        self.stats[stat] += 1
+        PROXY_REQUESTS_TOTAL.inc(result=result)
+
+    async def _wan_up(self) -> bool:
+        checked, up = self._wan
+        if time.monotonic() - checked > WAN_CHECK_S:
+            route = await executors.pools["network"].run(get_default_route)
+            self._wan = (time.monotonic(), up := bool(route.get("wan_iface")))
+        return up
+
+    async def _stale_allowed(self) -> bool:
+        if self.stale_if_error:
+            return True
+        checked, allowed = self._mode
+        if time.monotonic() - checked > MODE_CHECK_S:
+            title = (await executors.pools["db"].run(_active_mode_title) or "").strip().lower()
+            # A configured name also matches longer titles that start with it as a whole word:
+            # "Offline LAN" covers the seeded "Offline LAN (Local Services)".
+            allowed = any(title == m or title.startswith(m + " ") for m in self.stale_modes)
+            self._mode = (time.monotonic(), allowed)
+        return allowed
+
+    # -- client connections --
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = (writer.get_extra_info("peername") or ("",))[0]
+        try:
+            if not self._allowed(peer):
+                await self._send_error(writer, 403, False)
+                return
+            while True:
+                try:
+                    head = await asyncio.wait_for(read_head(reader), CLIENT_IDLE_S)
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 431, False)
+                    return
+                if head is None:
+                    return
+                try:
+                    start, headers = parse_head(head)
+                    if start[0] == "CONNECT":
+                        await self._tunnel(start[1], reader, writer)
+                        return
+                    req = ProxyRequest(start, headers)
+                except BadRequest as e:
+                    logger.debug("Proxy bad request from %s: %s", peer, e)
+                    await self._send_error(writer, 400, False)
+                    return
+                if not await self._request(req, reader, writer):
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        except ValueError as e:
+            # Malformed upstream framing (chunk sizes, status line) mid-response.
+            logger.debug("Proxy connection from %s aborted: %s", peer, e)
+        finally:
+            writer.close()
+
+    def _looped(self, hdr: dict[str, str]) -> bool:
+        for hop in hdr.get("via", "").split(","):
+            parts = hop.split()
+            if len(parts) >= 2 and parts[1].lower() == self.via_name:
+                return True
+        return False
+
+    async def _upstream_addr(self, host: str, port: int) -> str:
+        """Resolved address to connect to. Refused if the name resolves to this router: a
+        request for the proxy's own address/port would otherwise re-enter it until the
+        worker runs out of file descriptors."""
+        now = time.monotonic()
+        cached = self._resolved.get((host, port))
+        if cached is not None and cached[0] > now:
+            addr = cached[1]
+        else:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addrs = [info[4][0] for info in infos]
+            addr = None if not addrs or any(is_local_address(a) for a in addrs) else addrs[0]
+            if len(self._resolved) >= 1024:
+                self._resolved.clear()
+            self._resolved[(host, port)] = (now + RESOLVE_TTL_S, addr)
+        if addr is None:
+            raise Refused(403, f"{host}:{port} is this router")
+        return addr
+
+    def _allowed(self, peer: str) -> bool:
+        try:
+            addr = ipaddress.ip_address(peer)
+        except ValueError:
+            return False
+        return any(addr in net for net in self.allow)
+
+    async def _request(self, req: ProxyRequest, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Returns whether the client connection can carry another request."""
+        self.stats["requests"] += 1
+        if self._looped(req.hdr):
+            logger.warning("Proxy loop detected for %s (Via: %s)", req.url, req.hdr["via"])
+            self._count("error", "errors")
+            await self._send_error(writer, 508, False)
+            return False
+        if "transfer-encoding" in req.hdr:
+            await self._send_error(writer, 411, False)
+            return False
+        try:
+            length = int(req.hdr.get("content-length", "0"))
+        except ValueError:
+            await self._send_error(writer, 400, False)
+            return False
+        if length or not request_cacheable(req.method, req.hdr):
+            return await self._fetch(req, writer, body=(reader, length))
+        return await self._cached(req, writer)
+
+    async def _cached(self, req: ProxyRequest, writer: asyncio.StreamWriter) -> bool:
+        key = cache_key(req.url, req.hdr.get("accept-encoding", ""))
+        cc = parse_cache_control(req.hdr.get("cache-control", ""))
+        no_cache = "no-cache" in cc or "no-cache" in req.hdr.get("pragma", "").lower()
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh(time.time()) and not no_cache:
+            sent = await self._send_entry(req, writer, entry, "HIT")
+            if sent is not None:
+                return sent
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # Someone is already fetching this URL: wait and serve what they stored.
+            await asyncio.shield(pending)
+            entry = self.cache.get(key)
+            if entry is not None and entry.fresh(time.time()):
+                self.stats["coalesced"] += 1
+                sent = await self._send_entry(req, writer, entry, "HIT")
+                if sent is not None:
+                    return sent
+            return await self._fetch(req, writer, key=key, entry=entry)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            return await self._fetch(req, writer, key=key, entry=entry)
+        finally:
+            del self._inflight[key]
+            future.set_result(None)
+
+    # -- upstream --
+    async def _exchange(self, req: ProxyRequest, entry: Optional[CacheEntry], body) -> Upstream:
+        drop = ("host",)
+        extra = []
+        if entry is not None:
+            # Our own validators, not the client's: a 304 must refresh the stored copy.
+            drop += ("if-none-match", "if-modified-since")
+            if etag := entry.header("etag"):
+                extra.append(("If-None-Match", etag))
+            if last_modified := entry.header("last-modified"):
+                extra.append(("If-Modified-Since", last_modified))
+        elif body is None:
+            # Cacheable miss: ask for the full body so it can be stored.
+            drop += ("if-none-match", "if-modified-since")
+        addr = await self._upstream_addr(req.host, req.port)
+        host = req.host if req.port == 80 else f"{req.host}:{req.port}"
+        head = render_head(f"{req.method} {req.path} HTTP/1.1",
+                           [("Host", host)] + end_to_end(req.headers, drop) + extra
+                           + [("Via", self.via), ("Connection", "keep-alive")])
+
+        for attempt in (0, 1):
+            reader, writer, reused = await self.pool.acquire(req.host, req.port, addr)
+            try:
+                writer.write(head)
+                if body is not None:
+                    client_reader, remaining = body
+                    while remaining:
+                        data = await client_reader.read(min(remaining, READ_CHUNK))
+                        if not data:
+                            raise asyncio.IncompleteReadError(b"", remaining)
+                        remaining -= len(data)
+                        writer.write(data)
+                        await writer.drain()
+                await writer.drain()
+                while True:
+                    raw = await asyncio.wait_for(read_head(reader), UPSTREAM_TIMEOUT_S)
+                    if raw is None:
+                        raise ConnectionResetError("upstream closed the connection")
+                    start, headers = parse_head(raw)
+                    status = int(start[1])
+                    if status >= 200:
+                        return Upstream(reader, writer, status, start[2], headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # A pooled connection may have been closed by the server while idle: retry
+                # once on a fresh one, unless the request body is already consumed.
+                if not reused or attempt or (body is not None and body[1]):
+                    raise
+            except BaseException:
+                writer.close()
+                raise
+        raise ConnectionResetError("unreachable")
+
+    async def _fetch(self, req: ProxyRequest, writer: asyncio.StreamWriter, key: Optional[str] = None,
+                     entry: Optional[CacheEntry] = None, body=None) -> bool:
+        if entry is not None and not await self._wan_up() and await self._stale_allowed():
+            sent = await self._send_entry(req, writer, entry, "STALE")
+            if sent is not None:
+                return sent
+        try:
+            up = await self._exchange(req, entry, body)
+        except Refused as e:
+            logger.debug("Proxy refused %s: %s", req.url, e)
+            self._count("error", "errors")
+            await self._send_error(writer, e.status, False)
+            return False
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            if entry is not None and await self._stale_allowed():
+                sent = await self._send_entry(req, writer, entry, "STALE")
+                if sent is not None:
+                    return sent
+            logger.debug("Proxy upstream %s failed: %r", req.url, e)
+            self._count("error", "errors")
+            await self._send_error(writer, 504 if isinstance(e, asyncio.TimeoutError) else 502, req.keep_alive)
+            return req.keep_alive
+
+        now = time.time()
+        if up.status == 304 and entry is not None:
+            self.pool.release(req.host, req.port, up.reader, up.writer)
+            updated = {n.lower() for n, _ in up.headers}
+            entry.headers = [(n, v) for n, v in entry.headers if n.lower() not in updated] + end_to_end(
+                up.headers, ("content-length",))
+            lifetime = freshness_lifetime(entry.status, header_map(entry.headers), now)
+            entry.stored_at, entry.fresh_until = now, now + (lifetime or 0.0)
+            try:
+                await executors.pools["disk"].run(self.cache.touch, entry)
+            except executors.PoolSaturated:
+                pass  # index already updated; the .meta file catches up on the next revalidation
+            sent = await self._send_entry(req, writer, entry, "REVALIDATED")
+            if sent is not None:
+                return sent
+            return await self._fetch(req, writer, key=key)
+        return await self._relay(req, writer, up, key, now)
+
+    async def _relay(self, req: ProxyRequest, writer: asyncio.StreamWriter, up: Upstream, key: Optional[str],
+                     now: float) -> bool:
+        """Streams the upstream response to the client, copying it into the cache when storable."""
+        lifetime = freshness_lifetime(up.status, up.hdr, now) if key is not None else None
+        length = up.hdr.get("content-length")
+        disk = executors.pools["disk"]
+        store = None
+        if lifetime is not None and (length is None or int(length) <= self.cache.max_object_bytes):
+            try:
+                store = await disk.run(self.cache.begin, key)
+            except executors.PoolSaturated:
+                pass  # relay without storing rather than wait on a busy disk
+
+        no_body = req.method == "HEAD" or up.status in (204, 304) or up.status < 200
+        chunked_in = "chunked" in up.hdr.get("transfer-encoding", "").lower()
+        headers = end_to_end(up.headers, () if no_body else ("content-length",))
+        keep_alive = req.keep_alive
+        chunked_out = False
+        if not no_body:
+            if length is not None and not chunked_in:
+                headers.append(("Content-Length", length))
+            elif req.version == "HTTP/1.1":
+                headers.append(("Transfer-Encoding", "chunked"))
+                chunked_out = True
+            else:
+                keep_alive = False
+        result = "miss" if key is not None else "bypass"
+        headers += [("Via", self.via), ("X-Cache", result.upper()),
+                    ("Connection", "keep-alive" if keep_alive else "close")]
+        writer.write(render_head(f"HTTP/1.1 {up.status} {up.reason}", headers))
+
+        size = 0
+        complete = False
+        try:
+            async for data in iter_body(up.reader, up.hdr, up.status, req.method):
+                size += len(data)
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked_out else data)
+                if store is not None and not store.failed:
+                    # The transport flushes to the client while the chunk is written to disk.
+                    try:
+                        await disk.run(store.write, data)
+                    except executors.PoolSaturated:
+                        await asyncio.to_thread(store.abort)
+                await writer.drain()
+            if chunked_out:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            complete = True
+        finally:
+            if complete and up.reusable:
+                self.pool.release(req.host, req.port, up.reader, up.writer)
+            else:
+                up.writer.close()
+            if store is not None:
+                if complete and not store.failed:
+                    stored_headers = end_to_end(up.headers, ("content-length",))
+                    entry = CacheEntry(key, req.url, up.status, up.reason, stored_headers, 0, now, now + lifetime)
+                    try:
+                        await disk.run(self.cache.commit, store, entry)
+                    except executors.PoolSaturated:
+                        await asyncio.to_thread(store.abort)
+                else:
+                    await asyncio.to_thread(store.abort)
+            self.stats["bytes_from_upstream"] += size
+            PROXY_BYTES_TOTAL.inc(size, source="upstream")
+            self._count(result, "misses" if key is not None else "bypass")
+        return keep_alive
+
+    # -- responses --
+    async def _send_entry(self, req: ProxyRequest, writer: asyncio.StreamWriter, entry: CacheEntry,
+                          result: str) -> Optional[bool]:
+        """Headers from the entry, body with sendfile(2). None if the body file is gone (evicted)."""
+        try:
+            fh = await executors.pools["disk"].run(open, self.cache.body_path(entry), "rb")
+        except (OSError, executors.PoolSaturated):
+            return None
+        with fh:
+            status, reason = entry.status, entry.reason
+            if _not_modified(req.hdr, entry):
+                status, reason = 304, "Not Modified"
+            headers = list(entry.headers)
+            if status != 304:
+                headers.append(("Content-Length", str(entry.size)))
+            headers += [
+                ("Age", str(max(int(time.time() - entry.stored_at), 0))),
+                ("Via", self.via),
+                ("X-Cache", result),
+                ("Connection", "keep-alive" if req.keep_alive else "close"),
+            ]
+            writer.write(render_head(f"HTTP/1.1 {status} {reason}", headers))
+            sent = 0
+            if status != 304 and req.method != "HEAD" and entry.size:
+                await writer.drain()
+                sent = await asyncio.get_running_loop().sendfile(writer.transport, fh, 0, entry.size)
+            else:
+                await writer.drain()
+        self._count(result.lower(), {"HIT": "hits", "REVALIDATED": "revalidated", "STALE": "stale"}[result])
+        self.stats["bytes_from_cache"] += sent
+        PROXY_BYTES_TOTAL.inc(sent, source="cache")
+        return req.keep_alive
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        body = f"{status} {REASONS[status]}\n".encode()
+        writer.write(render_head(f"HTTP/1.1 {status} {REASONS[status]}", [
+            ("Content-Type", "text/plain"), ("Content-Length", str(len(body))),
+            ("Connection", "keep-alive" if keep_alive else "close"),
+        ]) + body)
+        await writer.drain()
+
+    async def _tunnel(self, target: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """CONNECT (HTTPS): bytes are relayed as-is, nothing is cached."""
+        host, _, port = target.rpartition(":")
+        if not host or not port.isdigit() or int(port) not in CONNECT_PORTS:
+            await self._send_error(writer, 403, False)
+            return
+        try:
+            addr = await self._upstream_addr(host.strip("[]").lower(), int(port))
+            up_reader, up_writer = await asyncio.wait_for(asyncio.open_connection(addr, int(port)),
+                                                          UPSTREAM_TIMEOUT_S)
+        except Refused:
+            self._count("error", "errors")
+            await self._send_error(writer, 403, False)
+            return
+        except (OSError, asyncio.TimeoutError):
+            self._count("error", "errors")
+            await self._send_error(writer, 502, False)
+            return
+        self._count("tunnel", "tunnels")
+        writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+        try:
+            await asyncio.gather(_pipe(reader, up_writer), _pipe(up_reader, writer))
+        finally:
+            up_writer.close()
+
+
+def _not_modified(hdr: dict[str, str], entry: CacheEntry) -> bool:
+    if entry.status != 200:
+        return False
+    if "if-none-match" in hdr:
+        etag = entry.header("etag")
+        tags = [t.strip() for t in hdr["if-none-match"].split(",")]
+        return etag is not None and ("*" in tags or etag in tags or etag.removeprefix("W/") in tags)
+    since = http_date(hdr.get("if-modified-since"))
+    modified = http_date(entry.header("last-modified"))
+    return since is not None and modified is not None and modified <= since
+
+
+def _active_mode_title() -> Optional[str]:
+    with SessionLocal() as db:
+        return db.execute(select(Mode.title).where(Mode.is_active == True)).scalars().first()
@@ -0,0 +1,74 @@
+# backend/services/servers_service.py
+# Module: Server listing — filters, keyset pagination and the SQLite indexes behind them
+
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.orm import Session
+
+from backend.db.models import Server
+from backend.db.session import SessionLocal
+
+SORT_COLUMNS = {
+    "active": Server.is_active,
+    "id": Server.id,
+    "name": Server.name,
+    "edition": Server.edition,
+}
+# "active" keeps the historical order of GET /servers: active server first.
+DEFAULT_ORDER = {"active": "desc"}
+
+# One (sort column, id) index per sort key: filter + seek + ordered scan, no temp B-tree.
+INDEXES = {
+    "ix_servers_active_id": "is_active, id",
+    "ix_servers_edition_id": "edition, id",
+    "ix_servers_name_id": "name, id",
+}
+
+
+def init_indexes() -> None:
+    table = Server.__tablename__
+    with SessionLocal() as db:
+        for name, cols in INDEXES.items():
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})"))
+        db.commit()
+
+
+def default_order(sort: str) -> str:
+    return DEFAULT_ORDER.get(sort, "asc")
+
+
+def list_page(db: Session, sort: str, order: str, limit: int, after: Optional[list] = None,
+              edition: Optional[str] = None, active: Optional[bool] = None,
+              name: Optional[str] = None) -> tuple[list[Server], Optional[list]]:
+    """Return (servers, [sort value, id] of the last one if more rows match).
+    Ties on the sort column are broken by id ascending, whatever the order."""
+    col = SORT_COLUMNS[sort]
+    query = select(Server)
+    if edition:
+        query = query.where(Server.edition == edition)
+    if active is not None:
+        query = query.where(Server.is_active == active)
+    if name:
+        query = query.where(Server.name.startswith(name, autoescape=True))
+    if after:
+        value, last_id = after
+        if isinstance(value, bool):
+            # SQL booleans only take ==/!=; SQLite stores them as 0/1 anyway.
+            value = int(value)
+        past = col > value if order == "asc" else col < value
+        if sort == "id":
+            query = query.where(past)
+        else:
+            query = query.where(or_(past, and_(col == value, Server.id > last_id)))
+    if sort == "id":
+        query = query.order_by(col.asc() if order == "asc" else col.desc())
+    else:
+        query = query.order_by(col.asc() if order == "asc" else col.desc(), Server.id.asc())
+
+    rows = db.execute(query.limit(limit + 1)).scalars().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, [getattr(last, col.key), last.id]
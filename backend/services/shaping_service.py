@@ -0,0 +1,365 @@
+# backend/services/shaping_service.py
+# Module: Per-client bandwidth shaping — desired tc state from SQLite, applied as one tc -batch
+
+import asyncio
+import json
+import re
+import time
+from typing import Optional
+
+from sqlalchemy import select, text
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.db.models import Mode
+from backend.db.session import SessionLocal
+from backend.services.helper_client import run_privileged
+from backend.services.network_service import read_dnsmasq_leases
+
+logger = get_logger("odoco.shaping")
+
+QDISCS = ("cake", "fq_codel")
+_MAC_RE = re.compile(r"^[0-9a-f]{2}(:[0-9a-f]{2}){5}$")
+_IPV4_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+# HTB classes for limited clients start here (1:10, 1:11, ...); 1:1 is the link, 1:ffff the rest.
+FIRST_CLIENT_CLASS = 0x10
+
+SCHEMA = [
+    # One profile per mode (modes.id); no row or enabled=0 means no shaping in that mode.
+    """
+    CREATE TABLE IF NOT EXISTS shaping_profiles (
+        mode_id INTEGER PRIMARY KEY,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        qdisc TEXT NOT NULL DEFAULT 'cake',
+        wan_down_kbit INTEGER NOT NULL DEFAULT 0,
+        wan_up_kbit INTEGER NOT NULL DEFAULT 0,
+        client_down_kbit INTEGER NOT NULL DEFAULT 0,
+        client_up_kbit INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Per-client overrides of the profile's default client limits (0 = unlimited).
+    """
+    CREATE TABLE IF NOT EXISTS shaping_limits (
+        mac TEXT PRIMARY KEY,
+        down_kbit INTEGER NOT NULL DEFAULT 0,
+        up_kbit INTEGER NOT NULL DEFAULT 0,
+        note TEXT NOT NULL DEFAULT ''
+    )
+    """,
+]
+
+PROFILE_FIELDS = ("enabled", "qdisc", "wan_down_kbit", "wan_up_kbit", "client_down_kbit", "client_up_kbit")
+# Used when shaping is forced on (benchmark) in a mode without a profile; the WAN rates
+# always come from the override (see ShapingManager.set_override).
+DEFAULT_PROFILE = {"enabled": True, "qdisc": "cake", "wan_down_kbit": 0, "wan_up_kbit": 0,
+                   "client_down_kbit": 0, "client_up_kbit": 0}
+
+SHAPING_APPLIES_TOTAL = metrics.Counter("odoco_shaping_applies_total", "tc batches applied, by result.", ("result",))
+SHAPING_CLIENTS = metrics.Gauge("odoco_shaping_limited_clients", "Clients with an active rate limit.")
+
+
+# ---- SQLite ----
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+def active_mode_id() -> Optional[int]:
+    with SessionLocal() as db:
+        return db.execute(select(Mode.id).where(Mode.is_active == True)).scalars().first()
+
+
+def list_profiles() -> dict[int, dict]:
+    with SessionLocal() as db:
+        rows = db.execute(text(f"SELECT mode_id, {', '.join(PROFILE_FIELDS)} FROM shaping_profiles")).mappings().all()
+    return {r["mode_id"]: {k: (bool(r[k]) if k == "enabled" else r[k]) for k in PROFILE_FIELDS} for r in rows}
+
+
+def save_profile(mode_id: int, profile: dict) -> None:
+    if profile["qdisc"] not in QDISCS:
+        raise ValueError(f"qdisc must be one of {', '.join(QDISCS)}")
+    cols = ", ".join(PROFILE_FIELDS)
+    binds = ", ".join(f":{k}" for k in PROFILE_FIELDS)
+    updates = ", ".join(f"{k} = :{k}" for k in PROFILE_FIELDS)
+    with SessionLocal() as db:
+        db.execute(text(
+            f"INSERT INTO shaping_profiles (mode_id, {cols}) VALUES (:mode_id, {binds}) "
+            f"ON CONFLICT(mode_id) DO UPDATE SET {updates}"
+        ), {"mode_id": mode_id, **{k: profile[k] for k in PROFILE_FIELDS}})
+        db.commit()
+
+
+def delete_profile(mode_id: int) -> bool:
+    with SessionLocal() as db:
+        deleted = db.execute(text("DELETE FROM shaping_profiles WHERE mode_id = :m"), {"m": mode_id}).rowcount
+        db.commit()
+    return bool(deleted)
+
+
+def list_limits() -> dict[str, dict]:
+    with SessionLocal() as db:
+        rows = db.execute(text("SELECT mac, down_kbit, up_kbit, note FROM shaping_limits ORDER BY mac")).all()
+    return {r.mac: {"down_kbit": r.down_kbit, "up_kbit": r.up_kbit, "note": r.note} for r in rows}
+
+
+def normalize_mac(mac: str) -> str:
+    mac = mac.strip().lower().replace("-", ":")
+    if not _MAC_RE.match(mac):
+        raise ValueError("invalid MAC address")
+    return mac
+
+
+def save_limit(mac: str, down_kbit: int, up_kbit: int, note: str = "") -> str:
+    mac = normalize_mac(mac)
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT INTO shaping_limits (mac, down_kbit, up_kbit, note) VALUES (:mac, :down, :up, :note) "
+            "ON CONFLICT(mac) DO UPDATE SET down_kbit = :down, up_kbit = :up, note = :note"
+        ), {"mac": mac, "down": down_kbit, "up": up_kbit, "note": note})
+        db.commit()
+    return mac
+
+
+def delete_limit(mac: str) -> bool:
+    with SessionLocal() as db:
+        deleted = db.execute(text("DELETE FROM shaping_limits WHERE mac = :mac"), {"mac": normalize_mac(mac)}).rowcount
+        db.commit()
+    return bool(deleted)
+
+
+# ---- tc plan ----
+def _rate(kbit: int) -> str:
+    return f"{kbit}kbit" if kbit > 0 else "1000mbit"
+
+
+def off_batch(ap_iface: str, wan_iface: str) -> str:
+    # Deleting the root qdisc restores the driver default (mq + fq_codel on most Wi-Fi).
+    return "\n".join([
+        f"qdisc del dev {ap_iface} root",
+        f"qdisc del dev {ap_iface} ingress",
+        f"qdisc del dev {wan_iface} root",
+        "",
+    ])
+
+
+def build_plan(profile: dict, limits: dict[str, dict], leases: list[dict],
+               ap_iface: str, wan_iface: str) -> tuple[str, list[dict]]:
+    """(tc batch, limited clients). Deterministic for the same inputs, so the manager can
+    compare it with the last applied batch and skip no-op reloads."""
+    qdisc = profile["qdisc"]
+    link = _rate(profile["wan_down_kbit"])
+    ap, wan = ap_iface, wan_iface
+    lines = [
+        # Replacing the root with another kind drops the old tree (classes, filters) in one step.
+        f"qdisc replace dev {ap} root pfifo",
+        f"qdisc replace dev {ap} root handle 1: htb default ffff",
+        f"class add dev {ap} parent 1: classid 1:1 htb rate {link} ceil {link}",
+        f"class add dev {ap} parent 1:1 classid 1:ffff htb rate {link} ceil {link}",
+        # Unlimited clients share the default class; cake keeps them fair per host.
+        f"qdisc add dev {ap} parent 1:ffff " + ("cake besteffort dual-dsthost" if qdisc == "cake" else "fq_codel"),
+        f"qdisc replace dev {ap} handle ffff: ingress",
+        f"filter del dev {ap} parent ffff:",
+    ]
+
+    clients = []
+    seen = set()
+    for lease in sorted(leases, key=lambda l: l["mac"].lower()):
+        mac, ip = lease["mac"].lower(), lease["ip"]
+        if mac in seen or not _IPV4_RE.match(ip):
+            continue
+        seen.add(mac)
+        limit = limits.get(mac, {})
+        down = limit.get("down_kbit") or profile["client_down_kbit"]
+        up = limit.get("up_kbit") or profile["client_up_kbit"]
+        if not down and not up:
+            continue
+        classid = f"1:{FIRST_CLIENT_CLASS + len(clients):x}"
+        if down:
+            lines += [
+                f"class add dev {ap} parent 1:1 classid {classid} htb rate {_rate(down)} ceil {_rate(down)}",
+                f"qdisc add dev {ap} parent {classid} fq_codel",
+                f"filter add dev {ap} parent 1: protocol ip prio 1 u32 match ip dst {ip}/32 flowid {classid}",
+            ]
+        if up:
+            # Upload from the client: police on AP ingress (~10ms of burst, at least 16KB).
+            burst = max(up * 1000 // 8 // 100, 16384)
+            lines.append(f"filter add dev {ap} parent ffff: protocol ip prio 1 u32 match ip src {ip}/32 "
+                         f"police rate {_rate(up)} burst {burst} drop flowid :1")
+        clients.append({"classid": classid if down else None, "mac": mac, "ip": ip,
+                        "hostname": lease.get("hostname", ""), "down_kbit": down, "up_kbit": up})
+
+    # Upload towards the WAN. After masquerade every packet has the WAN address; cake's `nat`
+    # looks up the original client in conntrack so dual-srchost is still fair per client.
+    lines.append(f"qdisc replace dev {wan} root pfifo")
+    if qdisc == "cake":
+        bandwidth = f"bandwidth {_rate(profile['wan_up_kbit'])}" if profile["wan_up_kbit"] else "unlimited"
+        lines.append(f"qdisc replace dev {wan} root cake {bandwidth} besteffort dual-srchost nat")
+    elif profile["wan_up_kbit"]:
+        up_link = _rate(profile["wan_up_kbit"])
+        lines += [
+            f"qdisc replace dev {wan} root handle 1: htb default 1",
+            f"class add dev {wan} parent 1: classid 1:1 htb rate {up_link} ceil {up_link}",
+            f"qdisc add dev {wan} parent 1:1 fq_codel",
+        ]
+    else:
+        lines.append(f"qdisc replace dev {wan} root fq_codel")
+    return "\n".join(lines) + "\n", clients
+
+
+def tc_stats(iface: str, kind: str) -> list[dict]:
+    res = run_privileged("tc_stats", iface=iface, kind=kind)
+    if res["rc"] != 0:
+        raise RuntimeError(res["stderr"] or f"tc exited with {res['rc']}")
+    return json.loads(res["stdout"] or "[]")
+
+
+class ShapingManager:
+    """Reconciles every `interval_s` (and right after any change through the API): builds the
+    batch for the active mode's profile, the limits and the current leases, and applies it
+    only when it differs from the last one applied."""
+
+    def __init__(self, ap_iface: str, wan_iface: str, interval_s: float = 10.0):
+        self.ap_iface = ap_iface
+        self.wan_iface = wan_iface
+        self.interval_s = interval_s
+        # None follows the mode profile; True/False forces shaping on/off (benchmark mode).
+        self.override: Optional[bool] = None
+        self.override_rates: dict[str, int] = {}
+        self.mode_id: Optional[int] = None
+        self.profile: Optional[dict] = None
+        self.clients: list[dict] = []
+        self.last_batch: Optional[str] = None
+        self.applied_at: Optional[float] = None
+        self.last_error = ""
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await executors.pools["db"].run(init_schema)
+        self._task = asyncio.create_task(self._run(), name="shaping-reconcile")
+
+    async def stop(self) -> None:
+        # Shaping stays applied: an API restart should not open the floodgates.
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def kick(self) -> None:
+        """Reconcile now; safe to call from pool threads."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await executors.pools["privileged"].run(self.reconcile)
+            except Exception:
+                logger.exception("Shaping reconcile failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def set_override(self, enabled: Optional[bool], wan_down_kbit: int = 0, wan_up_kbit: int = 0) -> None:
+        """Forcing shaping on needs the real link rates: HTB/cake at "unlimited" shape nothing."""
+        if enabled is True and (wan_down_kbit <= 0 or wan_up_kbit <= 0):
+            raise ValueError("forcing shaping on needs wan_down_kbit and wan_up_kbit > 0")
+        self.override = enabled
+        self.override_rates = {"wan_down_kbit": wan_down_kbit, "wan_up_kbit": wan_up_kbit} if enabled else {}
+        self.kick()
+
+    def desired(self) -> tuple[Optional[dict], str, bool, list[dict]]:
+        """(profile in effect, batch, force, clients)."""
+        self.mode_id = active_mode_id()
+        profile = list_profiles().get(self.mode_id) if self.mode_id is not None else None
+        if self.override is True:
+            profile = {**(profile or DEFAULT_PROFILE), "enabled": True, **self.override_rates}
+        elif self.override is False:
+            profile = None
+        if profile is None or not profile["enabled"]:
+            return None, off_batch(self.ap_iface, self.wan_iface), True, []
+        batch, clients = build_plan(profile, list_limits(), read_dnsmasq_leases(), self.ap_iface, self.wan_iface)
+        return profile, batch, False, clients
+
+    def reconcile(self) -> bool:
+        profile, batch, force, clients = self.desired()
+        self.profile = profile
+        if batch == self.last_batch:
+            return False
+        if profile is None and self.last_batch is None and not self._tree_found():
+            # Never shaped by us: leave the interfaces as the system configured them.
+            self.last_batch = batch
+            return False
+        res = run_privileged("tc_batch", batch=batch, force=force)
+        # With -force (shaping off) rc 1 only means a delete found nothing to remove.
+        if res["rc"] != 0 and not (force and res["rc"] == 1):
+            SHAPING_APPLIES_TOTAL.inc(result="error")
+            self.last_error = res["stderr"] or f"tc exited with {res['rc']}"
+            logger.warning("tc batch failed: %s", self.last_error)
+            # Forget it so the next pass retries.
+            self.last_batch = None
+            return False
+        SHAPING_APPLIES_TOTAL.inc(result="ok")
+        SHAPING_CLIENTS.set(len(clients))
+        self.last_batch = batch
+        self.clients = clients
+        self.applied_at = time.time()
+        self.last_error = ""
+        logger.info("Shaping %s (mode=%s, %d limited clients)", "on" if profile else "off", self.mode_id, len(clients))
+        return True
+
+    def _tree_found(self) -> bool:
+        """Whether a tree from build_plan is still installed (e.g. left by a previous run of the
+        API): htb root 1: on the AP, or cake with `nat` / htb root 1: on the WAN."""
+        try:
+            qdiscs = [(self.ap_iface, q) for q in tc_stats(self.ap_iface, "qdisc")]
+            qdiscs += [(self.wan_iface, q) for q in tc_stats(self.wan_iface, "qdisc")]
+        except (RuntimeError, ValueError) as e:
+            logger.warning("tc state unknown, leaving it alone: %s", e)
+            return False
+        for iface, q in qdiscs:
+            if not q.get("root"):
+                continue
+            if q.get("kind") == "htb" and q.get("handle") == "1:":
+                return True
+            if iface == self.wan_iface and q.get("kind") == "cake" and (q.get("options") or {}).get("nat"):
+                return True
+        return False
+
+    def status(self) -> dict:
+        return {
+            "ap_iface": self.ap_iface,
+            "wan_iface": self.wan_iface,
+            "mode_id": self.mode_id,
+            "override": self.override,
+            "override_rates": self.override_rates,
+            "active": self.profile is not None,
+            "profile": self.profile,
+            "clients": self.clients,
+            "applied_at": self.applied_at,
+            "last_error": self.last_error,
+            "batch": self.last_batch,
+        }
+
+    def stats(self) -> dict:
+        """tc -s statistics per interface; client classes are labeled with their MAC/IP."""
+        by_class = {c["classid"]: c for c in self.clients if c["classid"]}
+        out = {}
+        for iface in (self.ap_iface, self.wan_iface):
+            try:
+                qdiscs = tc_stats(iface, "qdisc")
+                classes = tc_stats(iface, "class") if iface == self.ap_iface else []
+            except (RuntimeError, ValueError) as e:
+                out[iface] = {"error": str(e)}
+                continue
+            for cls in classes:
+                client = by_class.get(cls.get("handle"))
+                if client is not None:
+                    cls["client"] = {k: client[k] for k in ("mac", "ip", "hostname")}
+            out[iface] = {"qdiscs": qdiscs, "classes": classes}
+        return out
@@ -0,0 +1,138 @@
+# backend/services/snapshot_service.py
+# Module: Summary snapshot — one publisher per host, every uvicorn worker reads the shared copy
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from backend.core import encoding, executors
+from backend.core.logging import get_logger
+from backend.core.snapshot import LeaderLock, SnapshotReader, SnapshotTooLarge, SnapshotWriter
+from backend.services.summary_service import LIVE_SECTIONS, SUMMARY_SECTIONS, build_summary
+
+logger = get_logger("odoco.snapshot")
+
+# Everything that probes the system; LIVE_SECTIONS (SQLite-backed) stay per request.
+SNAPSHOT_SECTIONS = set(SUMMARY_SECTIONS) - LIVE_SECTIONS
+
+
+class SummarySnapshot:
+    """The worker holding the lock runs the collectors every `interval_s` and publishes; the
+    others only read. Followers retry the lock each interval, so a dead publisher is replaced."""
+
+    def __init__(self, path: str, interval_s: float = 2.0):
+        self.path = path
+        self.interval_s = interval_s
+        self.max_age_s = interval_s * 3
+        self.reader = SnapshotReader(path)
+        self._lock = LeaderLock(path + ".lock")
+        self._writer: Optional[SnapshotWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def role(self) -> str:
+        return "publisher" if self._lock.held else "reader"
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="summary-snapshot")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._lock.release()
+        self.reader.close()
+
+    async def _run(self) -> None:
+        while True:
+            if self._lock.try_acquire():
+                try:
+                    await self._publish()
+                except Exception:
+                    logger.exception("Summary snapshot publish failed")
+            await asyncio.sleep(self.interval_s)
+
+    async def _publish(self) -> None:
+        if self._writer is None:
+            self._writer = SnapshotWriter(self.path)
+            logger.info("Worker %d publishes the summary snapshot to %s", os.getpid(), self.path)
+        data = await executors.pools["fast"].run(build_summary, SNAPSHOT_SECTIONS)
+        try:
+            self._writer.publish(data)
+        except SnapshotTooLarge as e:
+            logger.error("%s", e)
+
+    def current(self) -> Optional[dict]:
+        """Latest snapshot sections, or None when there is none or it is too old to trust."""
+        return self.current_versioned()[1]
+
+    def current_versioned(self) -> tuple[int, Optional[dict]]:
+        version, published_at, data = self.reader.read()
+        if data is None or time.time() - published_at > self.max_age_s:
+            return 0, None
+        return version, data
+
+    def status(self) -> dict:
+        version, published_at, data = self.reader.read()
+        return {
+            "role": self.role,
+            "pid": os.getpid(),
+            "path": self.path,
+            "version": version,
+            "age_s": round(time.time() - published_at, 2) if data is not None else None,
+            "interval_s": self.interval_s,
+        }
+
+
+def summary_from_snapshot(snapshot: Optional[SummarySnapshot], selected: set[str]) -> dict:
+    """Serve the selected sections from the snapshot, building only what it lacks."""
+    data = snapshot.current() if snapshot is not None else None
+    if data is None:
+        return build_summary(selected)
+    missing = {name for name in selected if name not in data}
+    extra = build_summary(missing) if missing else {}
+    return {name: data[name] if name in data else extra[name] for name in SUMMARY_SECTIONS if name in selected}
+
+
+class SectionEncoder:
+    """Each snapshot section is encoded once per version and format; a response is the
+    cached `name: value` members spliced together plus whatever must be built per request."""
+
+    def __init__(self):
+        # (version, {(fmt, section): bytes}), swapped as a whole so a member is never
+        # stored under the wrong version.
+        self._state: tuple[int, dict] = (0, {})
+
+    def member(self, version: int, data: dict, name: str, fmt: str) -> bytes:
+        cached_version, members = self._state
+        if version != cached_version:
+            if version < cached_version:
+                return encoding.encode_member(name, data[name], fmt)
+            members = {}
+            self._state = (version, members)
+        key = (fmt, name)
+        body = members.get(key)
+        if body is None:
+            body = members[key] = encoding.encode_member(name, data[name], fmt)
+        return body
+
+
+section_encoder = SectionEncoder()
+
+
+def encode_summary(snapshot: Optional[SummarySnapshot], selected: set[str], fmt: str = encoding.JSON) -> bytes:
+    """Encoded /api/summary body; same content as summary_from_snapshot()."""
+    version, data = snapshot.current_versioned() if snapshot is not None else (0, None)
+    if data is None:
+        return encoding.encode(build_summary(selected), fmt)
+    missing = {name for name in selected if name not in data}
+    extra = build_summary(missing) if missing else {}
+    members = [
+        section_encoder.member(version, data, name, fmt) if name in data else encoding.encode_member(name, extra[name], fmt)
+        for name in SUMMARY_SECTIONS if name in selected
+    ]
+    return encoding.join_members(members, fmt)
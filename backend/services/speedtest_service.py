@@ -0,0 +1,487 @@
+# backend/services/speedtest_service.py
+# Module: Throughput/latency tests — rate-capped sessions, TCP/UDP sink+source, gateway RTT under load
+
+import asyncio
+import json
+import os
+import secrets
+import socket
+import struct
+import time
+from typing import AsyncIterable, AsyncIterator, Optional
+
+from sqlalchemy import text
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.db.session import SessionLocal
+from backend.services.network_service import get_default_route
+
+try:
+    import httpx
+except ImportError:  # only the WAN goodput phase needs it
+    httpx = None
+
+logger = get_logger("odoco.speedtest")
+
+CHUNK = 64 * 1024
+# Incompressible, generated once: the source never spends CPU producing test data.
+PAYLOAD = os.urandom(CHUNK)
+# Results can still be posted this long after a session's deadline.
+RESULT_GRACE_S = 60.0
+PROBE_INTERVAL_S = 0.2
+PROBE_TIMEOUT_S = 1.0
+IDLE_PROBE_S = 3.0
+# Test sockets are marked CS1 ("lower effort"): cake/fq queues let real traffic go first.
+TOS_CS1 = 0x20
+UDP_HEADER = struct.Struct("!16sId")  # session id, seq, client send time
+KINDS = ("lan", "native", "wan")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS speedtest_results (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        started INTEGER NOT NULL,
+        duration_s REAL NOT NULL,
+        status TEXT NOT NULL,
+        client_ip TEXT NOT NULL DEFAULT '',
+        down_mbit REAL,
+        up_mbit REAL,
+        rtt_idle_ms REAL,
+        rtt_loaded_ms REAL,
+        rtt_loaded_p95_ms REAL,
+        loss REAL,
+        detail TEXT NOT NULL DEFAULT '{}'
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_speedtest_results_started ON speedtest_results (started)",
+]
+RESULT_FIELDS = ("down_mbit", "up_mbit", "rtt_idle_ms", "rtt_loaded_ms", "rtt_loaded_p95_ms", "loss")
+
+SPEEDTEST_BYTES_TOTAL = metrics.Counter(
+    "odoco_speedtest_bytes_total", "Test payload bytes moved by the router, by direction.", ("direction",)
+)
+SPEEDTEST_SESSIONS_TOTAL = metrics.Counter(
+    "odoco_speedtest_sessions_total", "Finished test sessions by kind and status.", ("kind", "status")
+)
+
+
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+def save_result(row: dict) -> None:
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT OR REPLACE INTO speedtest_results (id, kind, started, duration_s, status, client_ip, "
+            "down_mbit, up_mbit, rtt_idle_ms, rtt_loaded_ms, rtt_loaded_p95_ms, loss, detail) VALUES "
+            "(:id, :kind, :started, :duration_s, :status, :client_ip, :down_mbit, :up_mbit, :rtt_idle_ms, "
+            ":rtt_loaded_ms, :rtt_loaded_p95_ms, :loss, :detail)"
+        ), row)
+        db.commit()
+
+
+def list_results(kind: Optional[str], limit: int) -> list[dict]:
+    where = "WHERE kind = :kind" if kind else ""
+    with SessionLocal() as db:
+        rows = db.execute(text(
+            f"SELECT * FROM speedtest_results {where} ORDER BY started DESC LIMIT :limit"
+        ), {"kind": kind, "limit": limit}).mappings().all()
+    return [{**row, "detail": json.loads(row["detail"])} for row in rows]
+
+
+def percentile(values: list[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * p), len(values) - 1)], 2)
+
+
+def mark_low_priority(sock: Optional[socket.socket]) -> None:
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, TOS_CS1)
+    except OSError:
+        pass
+
+
+class TokenBucket:
+    """Byte budget at `rate_mbit`; takers go into debt and sleep it off, so concurrent
+    streams of one session share the cap instead of each getting it."""
+
+    def __init__(self, rate_mbit: float, burst: int = 4 * CHUNK):
+        self.rate = rate_mbit * 1e6 / 8
+        self.burst = burst
+        self.tokens = float(burst)
+        self._ts = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._ts) * self.rate)
+        self._ts = now
+
+    async def take(self, n: int) -> None:
+        self._refill()
+        self.tokens -= n
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def try_take(self, n: int) -> bool:
+        self._refill()
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        return True
+
+
+class TestSession:
+    def __init__(self, kind: str, duration_s: float, max_mbit: float, client_ip: str = ""):
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.client_ip = client_ip
+        self.started = time.time()
+        self.duration_s = duration_s
+        self.deadline = time.monotonic() + duration_s
+        self.max_mbit = max_mbit
+        self.bucket = TokenBucket(max_mbit)
+        self.cancelled = asyncio.Event()
+        self.status = "running"
+        self.bytes = {"down": 0, "up": 0}
+        self.udp = {"received": 0, "echoed": 0}
+        self.result: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status == "running" and not self.cancelled.is_set() and time.monotonic() < self.deadline
+
+    def count(self, direction: str, n: int) -> None:
+        self.bytes[direction] += n
+        SPEEDTEST_BYTES_TOTAL.inc(n, direction=direction)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": "expired" if self.status == "running" and not self.active else self.status,
+            "started": int(self.started),
+            "duration_s": self.duration_s,
+            "max_mbit": self.max_mbit,
+            "remaining_s": round(max(self.deadline - time.monotonic(), 0.0), 1),
+            "bytes": dict(self.bytes),
+            "udp": dict(self.udp),
+            "result": self.result,
+        }
+
+
+class RttProber:
+    """RTT to one host: unprivileged ICMP echo (ping socket) when the kernel allows it
+    (net.ipv4.ping_group_range), else TCP connect time to port 53 (a refusal counts too)."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.seq = 0
+        self.sock: Optional[socket.socket] = None
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            self.sock.setblocking(False)
+            self.sock.connect((host, 0))
+        except OSError:
+            self.close()
+        self.method = "icmp" if self.sock is not None else "tcp"
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    async def probe(self) -> Optional[float]:
+        t0 = time.perf_counter()
+        try:
+            if self.sock is not None:
+                await asyncio.wait_for(self._icmp(), PROBE_TIMEOUT_S)
+            else:
+                await asyncio.wait_for(self._tcp(), PROBE_TIMEOUT_S)
+        except (asyncio.TimeoutError, OSError):
+            return None
+        return (time.perf_counter() - t0) * 1000.0
+
+    async def _icmp(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.seq = (self.seq + 1) & 0xFFFF
+        # The kernel fills in the identifier and checksum of ping-socket packets.
+        await loop.sock_sendall(self.sock, struct.pack("!BBHHH", 8, 0, 0, 0, self.seq) + b"odoco")
+        while True:
+            reply = await loop.sock_recv(self.sock, 512)
+            if len(reply) >= 8 and reply[0] == 0 and struct.unpack("!H", reply[6:8])[0] == self.seq:
+                return
+
+    async def _tcp(self) -> None:
+        try:
+            _, writer = await asyncio.open_connection(self.host, 53)
+            writer.close()
+        except ConnectionRefusedError:
+            pass
+
+
+async def probe_series(prober: RttProber, until: asyncio.Future) -> tuple[list[float], int]:
+    """Probes every PROBE_INTERVAL_S until `until` resolves; (rtts in ms, lost probes)."""
+    rtts, lost = [], 0
+    while not until.done():
+        rtt = await prober.probe()
+        if rtt is None:
+            lost += 1
+        else:
+            rtts.append(rtt)
+        await asyncio.wait({until}, timeout=max(PROBE_INTERVAL_S - (rtt or 0) / 1000.0, 0.0))
+    return rtts, lost
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    """Upstream sink + echo: every datagram of an active session is counted and its header
+    echoed back (within the session's rate cap), so the client sees loss and RTT."""
+
+    def __init__(self, manager: "SpeedTestManager"):
+        self.manager = manager
+        self.transport = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        mark_low_priority(transport.get_extra_info("socket"))
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < UDP_HEADER.size:
+            return
+        session = self.manager.get(data[:16].decode("ascii", "replace"))
+        if session is None or not session.active:
+            return
+        session.udp["received"] += 1
+        session.count("up", len(data))
+        # Bare probes are always answered (no amplification); padded load datagrams only
+        # within the cap, so an overloaded cap shows up as loss.
+        if len(data) == UDP_HEADER.size or session.bucket.try_take(len(data)):
+            session.udp["echoed"] += 1
+            self.transport.sendto(data[:UDP_HEADER.size], addr)
+
+
+class SpeedTestManager:
+    """One session at a time, each capped in rate and duration and cancellable. Browsers use
+    the HTTP source/sink; native clients (python -m backend.bench.speedtest) the TCP/UDP
+    port; WAN tests run on the router against the default gateway."""
+
+    def __init__(self, port: int, max_mbit: float, max_duration_s: float, wan_url: str = "",
+                 listen_host: str = "0.0.0.0"):
+        self.port = port
+        self.max_mbit = max_mbit
+        self.max_duration_s = max_duration_s
+        self.wan_url = wan_url
+        self.listen_host = listen_host
+        self.sessions: dict[str, TestSession] = {}
+        self.current: Optional[TestSession] = None
+        self._tcp: Optional[asyncio.AbstractServer] = None
+        self._udp = None
+
+    # -- lifecycle --
+    async def start(self) -> None:
+        await executors.pools["db"].run(init_schema)
+        loop = asyncio.get_running_loop()
+        # reuse_port: every uvicorn worker listens; sessions are per worker, so a native
+        # client must talk to the worker that opened it (true with a single worker).
+        self._tcp = await asyncio.start_server(self._tcp_client, self.listen_host, self.port, reuse_port=True)
+        self._udp, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self),
+                                                           local_addr=(self.listen_host, self.port),
+                                                           reuse_port=True)
+        logger.info("Speed test on %s:%d tcp/udp (cap %.0f Mbit/s, %.0fs)", self.listen_host, self.port,
+                    self.max_mbit, self.max_duration_s)
+
+    async def stop(self) -> None:
+        for session in list(self.sessions.values()):
+            session.cancelled.set()
+            if session.task is not None:
+                session.task.cancel()
+                await asyncio.gather(session.task, return_exceptions=True)
+        if self._tcp is not None:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+        if self._udp is not None:
+            self._udp.close()
+
+    # -- sessions --
+    def open(self, kind: str, duration_s: Optional[float], max_mbit: Optional[float], client_ip: str = "") -> TestSession:
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if self.current is not None and self.current.active:
+            raise RuntimeError(f"test {self.current.id} is still running")
+        duration_s = min(duration_s or self.max_duration_s, self.max_duration_s)
+        max_mbit = min(max_mbit or self.max_mbit, self.max_mbit)
+        session = TestSession(kind, duration_s, max_mbit, client_ip)
+        self._prune()
+        self.sessions[session.id] = session
+        self.current = session
+        if kind == "wan":
+            session.task = asyncio.create_task(self._run_wan(session), name=f"speedtest-{session.id}")
+        return session
+
+    def get(self, session_id: str) -> Optional[TestSession]:
+        return self.sessions.get(session_id)
+
+    def cancel(self, session_id: str) -> Optional[TestSession]:
+        session = self.sessions.get(session_id)
+        if session is not None and session.status == "running":
+            session.cancelled.set()
+            session.status = "cancelled"
+            SPEEDTEST_SESSIONS_TOTAL.inc(kind=session.kind, status="cancelled")
+        return session
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - RESULT_GRACE_S
+        for sid, session in list(self.sessions.items()):
+            if session.deadline < cutoff:
+                del self.sessions[sid]
+
+    async def finish(self, session: TestSession, measured: dict, status: str = "done") -> dict:
+        """Stores a result. Browser/native clients report what they measured; the router's
+        own byte counters are kept next to it in `detail`."""
+        if time.monotonic() > session.deadline + RESULT_GRACE_S:
+            raise ValueError("session expired")
+        if session.status == "running":
+            session.status = status
+            SPEEDTEST_SESSIONS_TOTAL.inc(kind=session.kind, status=status)
+        session.cancelled.set()
+        values = {k: measured.get(k) for k in RESULT_FIELDS}
+        detail = {k: v for k, v in measured.items() if k not in RESULT_FIELDS}
+        detail.update(router_bytes=dict(session.bytes), udp=dict(session.udp), max_mbit=session.max_mbit)
+        session.result = {**values, "detail": detail}
+        await executors.pools["db"].run(save_result, {
+            "id": session.id, "kind": session.kind, "started": int(session.started),
+            "duration_s": session.duration_s, "status": session.status, "client_ip": session.client_ip,
+            **values, "detail": json.dumps(detail),
+        })
+        return session.to_dict()
+
+    # -- HTTP source / sink (browser) --
+    async def source(self, session: TestSession, limit_bytes: int) -> AsyncIterator[bytes]:
+        sent = 0
+        while sent < limit_bytes and session.active:
+            n = min(CHUNK, limit_bytes - sent)
+            await session.bucket.take(n)
+            session.count("down", n)
+            sent += n
+            yield PAYLOAD[:n]
+
+    async def sink(self, session: TestSession, stream: AsyncIterable[bytes]) -> int:
+        received = 0
+        async for chunk in stream:
+            if not session.active:
+                break
+            await session.bucket.take(len(chunk))
+            session.count("up", len(chunk))
+            received += len(chunk)
+        return received
+
+    # -- TCP (native client): "<session id> send|recv\n", then raw bytes --
+    async def _tcp_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        mark_low_priority(writer.get_extra_info("socket"))
+        try:
+            line = await asyncio.wait_for(reader.readline(), 5.0)
+            sid, _, mode = line.decode("ascii", "replace").strip().partition(" ")
+            session = self.get(sid)
+            if session is None or not session.active or mode not in ("send", "recv"):
+                writer.write(b"ERR\n")
+                return
+            writer.write(b"OK\n")
+            if mode == "recv":
+                async for chunk in self.source(session, 1 << 62):
+                    writer.write(chunk)
+                    await writer.drain()
+            else:
+                while session.active and (data := await reader.read(CHUNK)):
+                    await session.bucket.take(len(data))
+                    session.count("up", len(data))
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # -- WAN (router -> default gateway / internet) --
+    async def _run_wan(self, session: TestSession) -> None:
+        measured: dict = {}
+        status = "done"
+        prober = None
+        shutdown = False
+        try:
+            route = await executors.pools["network"].run(get_default_route)
+            gateway = route.get("gateway")
+            if not gateway:
+                raise RuntimeError("no default route")
+            prober = RttProber(gateway)
+            measured.update(gateway=gateway, wan_iface=route.get("wan_iface"), probe=prober.method)
+
+            loop = asyncio.get_running_loop()
+            idle_done = loop.create_future()
+            loop.call_later(min(IDLE_PROBE_S, session.duration_s / 3), idle_done.set_result, None)
+            idle, _ = await probe_series(prober, idle_done)
+
+            load = asyncio.ensure_future(self._wan_download(session))
+            loaded, lost = await probe_series(prober, load)
+            down_bytes, seconds = load.result()
+            probes = len(loaded) + lost
+            # Without a WAN URL nothing loaded the link: those probes are more idle samples.
+            has_load = bool(self.wan_url) and httpx is not None
+            if not has_load:
+                idle, loaded = idle + loaded, []
+            measured.update(
+                loaded=has_load,
+                rtt_idle_ms=percentile(idle, 0.5),
+                rtt_loaded_ms=percentile(loaded, 0.5) if has_load else None,
+                rtt_loaded_p95_ms=percentile(loaded, 0.95) if has_load else None,
+                loss=round(lost / probes, 4) if probes else None,
+                down_mbit=round(down_bytes * 8 / seconds / 1e6, 2) if down_bytes and seconds else None,
+                wan_url=self.wan_url or None,
+            )
+            if session.cancelled.is_set():
+                status = "cancelled"
+        except asyncio.CancelledError:
+            # Only stop() cancels the task; DELETE on the session sets the event instead.
+            shutdown = True
+            raise
+        except Exception as e:
+            logger.warning("WAN speed test failed: %s", e)
+            measured["error"] = str(e)
+            status = "failed"
+        finally:
+            if prober is not None:
+                prober.close()
+            if not shutdown:
+                await self.finish(session, measured, status)
+
+    async def _wan_download(self, session: TestSession) -> tuple[int, float]:
+        """Rate-capped download of ODOCO_SPEEDTEST_WAN_URL until the session ends; without a URL
+        the loaded phase is just idle time (latency and loss only)."""
+        t0 = time.monotonic()
+        remaining = max(session.deadline - time.monotonic(), 0.0)
+        if not self.wan_url or httpx is None:
+            try:
+                await asyncio.wait_for(session.cancelled.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            return 0, 0.0
+        received = 0
+        try:
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+                async with client.stream("GET", self.wan_url, headers={"Accept-Encoding": "identity"}) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.aiter_raw(CHUNK):
+                        await session.bucket.take(len(chunk))
+                        received += len(chunk)
+                        if not session.active:
+                            break
+        except httpx.HTTPError as e:
+            logger.warning("WAN speed test download failed: %s", e)
+        SPEEDTEST_BYTES_TOTAL.inc(received, direction="wan_down")
+        return received, time.monotonic() - t0
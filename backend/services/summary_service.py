@@ -0,0 +1,132 @@
+# backend/services/summary_service.py
+# Module: Dashboard summary — lazily evaluated sections shared by /api/summary and the snapshot publisher
+
+from functools import cached_property
+from typing import Optional
+
+from sqlalchemy import select
+
+from backend.core import config
+from backend.db.models import Server
+from backend.db.session import SessionLocal
+from backend.services.network_service import (
+    get_default_route,
+    get_dns_resolv_conf,
+    get_dnsmasq_dhcp_info,
+    get_hostapd_iface_and_ssid,
+    get_iface_ipv4,
+    get_ssid,
+    read_dnsmasq_leases,
+)
+from backend.services.proxy_cache import read_stats
+from backend.services.system_service import get_service_active, get_system_summary, get_temp_thresholds
+
+
+class SummaryContext:
+    """Inputs shared by summary sections, computed lazily and at most once per request."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if "db" in self.__dict__:
+            self.db.close()
+
+    @cached_property
+    def db(self):
+        return SessionLocal()
+
+    @cached_property
+    def route(self) -> dict:
+        return get_default_route()
+
+    @cached_property
+    def ap(self) -> dict:
+        return get_hostapd_iface_and_ssid()
+
+    @cached_property
+    def dhcp(self) -> dict:
+        return get_dnsmasq_dhcp_info()
+
+    @cached_property
+    def leases(self) -> list[dict]:
+        return read_dnsmasq_leases()
+
+def summary_ssid(ctx: SummaryContext):
+    return ctx.ap.get("ssid") or get_ssid()
+
+def summary_network(ctx: SummaryContext) -> dict:
+    route = ctx.route
+    ap_iface = ctx.ap.get("ap_iface") or ctx.dhcp.get("dhcp_iface")
+    return {
+        "wan_iface": route["wan_iface"],
+        "wan_ip": route["wan_ip"],
+        "gateway": route["gateway"],
+        "ap_iface": ap_iface,
+        "ap_ip": get_iface_ipv4(ap_iface),
+        "dhcp_range": ctx.dhcp.get("dhcp_range", ""),
+    }
+
+def summary_clients(ctx: SummaryContext) -> dict:
+    named = [c for c in ctx.leases if c.get("hostname")]
+    return {
+        "connected": len(ctx.leases),
+        "named": len(named),
+        "hostnames": [c["hostname"] for c in named][:10],
+    }
+
+def summary_dns(ctx: SummaryContext) -> list[str]:
+    return get_dns_resolv_conf()
+
+def summary_system(ctx: SummaryContext) -> dict:
+    return {
+        **get_system_summary(),
+        "temperature_thresholds": get_temp_thresholds(ctx.db),
+    }
+
+def summary_services(ctx: SummaryContext) -> dict:
+    return {
+        "hostapd": get_service_active("hostapd"),
+        "dnsmasq": get_service_active("dnsmasq"),
+    }
+
+def summary_active_server(ctx: SummaryContext) -> Optional[dict]:
+    active = ctx.db.execute(select(Server).where(Server.is_active == True)).scalars().first()
+    if not active:
+        return None
+    return {
+        "id": active.id,
+        "name": active.name,
+        "host": active.host,
+        "port": active.port,
+        "edition": active.edition,
+    }
+
+def summary_proxy(ctx: SummaryContext) -> Optional[dict]:
+    # Published by the worker running the proxy; None when the subsystem never ran.
+    stats = read_stats(config.PROXY_CACHE_DIR)
+    if not stats:
+        return None
+    return {k: stats.get(k) for k in ("hit_ratio", "byte_hit_ratio", "bytes_saved", "requests",
+                                      "cache_entries", "cache_bytes", "updated_at")}
+
+# Read from SQLite on every request: a server activated through one worker must show up
+# immediately in all of them, so these are never served from the shared snapshot.
+LIVE_SECTIONS = {"active_server"}
+
+# Section name -> builder. Insertion order is the response key order.
+SUMMARY_SECTIONS = {
+    "ssid": summary_ssid,
+    "network": summary_network,
+    "clients": summary_clients,
+    "dns": summary_dns,
+    "system": summary_system,
+    "services": summary_services,
+    "active_server": summary_active_server,
+    "proxy": summary_proxy,
+}
+
+
+def build_summary(selected: set[str]) -> dict:
+    with SummaryContext() as ctx:
+        return {name: build(ctx) for name, build in SUMMARY_SECTIONS.items() if name in selected}
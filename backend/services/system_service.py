@@ -1,2 +1,163 @@
 # backend/services/system_service.py
-# Module: ODOCO Backend — System service placeholder
+# Module: ODOCO Backend — System state (OS, CPU, memory, storage, services, thresholds)
+
+import platform
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from backend.core.metrics import collector
+from backend.core.singleflight import coalesce
+from backend.db.models import SystemTarget
+from backend.services.network_service import get_iface_ipv4, sh
+
+
+@coalesce(ttl_s=2.0)
+@collector
+def get_service_active(service: str) -> bool:
+    out = sh(f"systemctl is-active {service}")
+    return out.strip() == "active"
+
+@lru_cache(maxsize=1)
+def read_os_info() -> str:
+    p = Path("/etc/os-release")
+    if p.exists():
+        for ln in p.read_text(errors="ignore").splitlines():
+            if ln.startswith("PRETTY_NAME="):
+                return ln.split("=", 1)[1].strip().strip('"')
+    return platform.platform()
+
+@lru_cache(maxsize=1)
+def read_cpu_model() -> str:
+    p = Path("/proc/cpuinfo")
+    if p.exists():
+        lines = p.read_text(errors="ignore").splitlines()
+
+        # x86 typically exposes "model name", Raspberry Pi often exposes "Model".
+        preferred_keys = ("model name", "model", "hardware", "cpu part")
+        for key in preferred_keys:
+            for ln in lines:
+                if ":" not in ln:
+                    continue
+                k, v = ln.split(":", 1)
+                if k.strip().lower() == key and v.strip():
+                    return v.strip()
+
+        # Last-resort fallback for environments with sparse cpuinfo.
+        for ln in lines:
+            if ":" not in ln:
+                continue
+            k, v = ln.split(":", 1)
+            if k.strip().lower() == "processor" and v.strip():
+                return f"CPU {v.strip()}"
+
+    return platform.processor() or "Unknown"
+
+def read_cpu_temperature_c() -> Optional[float]:
+    candidates = [
+        "/sys/class/thermal/thermal_zone0/temp",
+        "/sys/devices/virtual/thermal/thermal_zone0/temp",
+    ]
+    for p in candidates:
+        fp = Path(p)
+        if not fp.exists():
+            continue
+        raw = fp.read_text(errors="ignore").strip()
+        if not raw:
+            continue
+        try:
+            val = float(raw)
+            # Typical Linux thermal files report milli-degrees C.
+            return round((val / 1000.0) if val > 300 else val, 1)
+        except ValueError:
+            continue
+    return None
+
+def read_ram_info() -> dict:
+    p = Path("/proc/meminfo")
+    if not p.exists():
+        return {"total_mb": 0, "used_mb": 0, "free_mb": 0}
+
+    total_kb = 0
+    available_kb = 0
+    for ln in p.read_text(errors="ignore").splitlines():
+        if ln.startswith("MemTotal:"):
+            parts = ln.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                total_kb = int(parts[1])
+        elif ln.startswith("MemAvailable:"):
+            parts = ln.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                available_kb = int(parts[1])
+
+    used_kb = max(total_kb - available_kb, 0)
+    return {
+        "total_mb": round(total_kb / 1024, 1),
+        "used_mb": round(used_kb / 1024, 1),
+        "free_mb": round(available_kb / 1024, 1),
+    }
+
+def read_storage_info() -> dict:
+    try:
+        total, used, free = shutil.disk_usage("/")
+    except Exception:
+        return {"total_gb": 0, "used_gb": 0, "free_gb": 0}
+
+    gb = 1024 * 1024 * 1024
+    return {
+        "total_gb": round(total / gb, 1),
+        "used_gb": round(used / gb, 1),
+        "free_gb": round(free / gb, 1),
+    }
+
+@collector
+def read_network_interfaces() -> list[dict]:
+    net_dir = Path("/sys/class/net")
+    if not net_dir.exists():
+        return []
+
+    result = []
+    for iface_path in sorted(net_dir.iterdir()):
+        iface = iface_path.name
+        if iface == "lo":
+            continue
+        mac = (iface_path / "address").read_text(errors="ignore").strip() if (iface_path / "address").exists() else ""
+        state = (iface_path / "operstate").read_text(errors="ignore").strip() if (iface_path / "operstate").exists() else ""
+        result.append({
+            "name": iface,
+            "mac": mac,
+            "state": state,
+            "ipv4": get_iface_ipv4(iface),
+        })
+    return result
+
+@coalesce(ttl_s=2.0)
+@collector
+def get_system_summary() -> dict:
+    return {
+        "os": read_os_info(),
+        "kernel": platform.release(),
+        "cpu": read_cpu_model(),
+        "temperature_c": read_cpu_temperature_c(),
+        "ram": read_ram_info(),
+        "storage": read_storage_info(),
+        "network_interfaces": read_network_interfaces(),
+    }
+
+def read_float_target(db, key: str, fallback: float) -> float:
+    row = db.get(SystemTarget, key)
+    if not row:
+        return fallback
+    try:
+        return float(row.value)
+    except (TypeError, ValueError):
+        return fallback
+
+def get_temp_thresholds(db) -> dict:
+    warn = read_float_target(db, "cpu_temp_warn_c", 60.0)
+    critical = read_float_target(db, "cpu_temp_critical_c", 75.0)
+    # Keep deterministic ordering even if DB values are inverted.
+    if warn >= critical:
+        warn, critical = 60.0, 75.0
+    return {"warn_c": warn, "critical_c": critical}
@@ -0,0 +1,295 @@
+# backend/services/wan_supervisor_service.py
+# Module: WAN auto-reconnect supervisor — netlink-driven loss detection and ranked failover
+
+import asyncio
+import socket
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.core import executors, metrics
+from backend.core.logging import get_logger
+from backend.db.session import SessionLocal
+from backend.services import network_service
+from backend.services.network_service import (
+    connect_and_verify,
+    get_default_route,
+    nmcli_saved_wifi_profiles,
+    wifi_scan_wlan0,
+)
+
+logger = get_logger("odoco.wan_supervisor")
+
+# rtnetlink multicast groups: link up/down and IPv4 route changes.
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_ROUTE = 0x40
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS wan_connect_stats (
+        ssid TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        successes INTEGER NOT NULL DEFAULT 0,
+        last_success_ts INTEGER
+    )
+    """,
+]
+
+WAN_RECOVER_SECONDS = metrics.Histogram(
+    "odoco_wan_recover_seconds",
+    "Time from WAN loss detection to verified recovery.",
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800),
+)
+WAN_OUTAGES_TOTAL = metrics.Counter("odoco_wan_outages_total", "WAN losses detected by the supervisor.")
+WAN_RECONNECT_ATTEMPTS_TOTAL = metrics.Counter(
+    "odoco_wan_reconnect_attempts_total",
+    "Reconnect attempts by result.",
+    ("result",),
+)
+
+
+def init_schema() -> None:
+    with SessionLocal() as db:
+        for stmt in SCHEMA:
+            db.execute(text(stmt))
+        db.commit()
+
+
+def load_stats() -> dict[str, dict]:
+    with SessionLocal() as db:
+        rows = db.execute(text("SELECT ssid, attempts, successes, last_success_ts FROM wan_connect_stats")).all()
+    return {r.ssid: {"attempts": r.attempts, "successes": r.successes, "last_success_ts": r.last_success_ts}
+            for r in rows}
+
+
+def record_attempt(ssid: str, ok: bool) -> None:
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT INTO wan_connect_stats (ssid, attempts, successes, last_success_ts) "
+            "VALUES (:ssid, 1, :ok, :ts) "
+            "ON CONFLICT(ssid) DO UPDATE SET attempts = attempts + 1, successes = successes + :ok, "
+            "last_success_ts = COALESCE(:ts, last_success_ts)"
+        ), {"ssid": ssid, "ok": 1 if ok else 0, "ts": int(time.time()) if ok else None})
+        db.commit()
+
+
+def rank_candidates(saved: list[dict], scan: list[dict], stats: dict[str, dict]) -> list[dict]:
+    """Saved profiles ({"name", "ssid"}) whose network is visible in the last scan, best first.
+
+    score = 0.6 * signal + 0.4 * success rate (Laplace-smoothed so new networks are not last).
+    Saved networks missing from the scan are kept at the end in case the scan is stale.
+    """
+    signals = {n["ssid"]: n.get("signal") or 0 for n in scan}
+    ranked = []
+    for profile in saved:
+        ssid = profile["ssid"]
+        st = stats.get(ssid, {})
+        rate = (st.get("successes", 0) + 1) / (st.get("attempts", 0) + 2)
+        signal = signals.get(ssid)
+        score = 0.6 * ((signal or 0) / 100.0) + 0.4 * rate
+        ranked.append({
+            "profile": profile["name"],
+            "ssid": ssid,
+            "signal": signal,
+            "success_rate": round(rate, 3),
+            "score": round(score, 3),
+            "visible": signal is not None,
+        })
+    ranked.sort(key=lambda c: (not c["visible"], -c["score"], c["ssid"], c["profile"]))
+    return ranked
+
+
+class NetlinkWatcher:
+    """Wakes the supervisor on kernel link/route notifications; no polling, no forks."""
+
+    def __init__(self):
+        self.changed = asyncio.Event()
+        self._sock: Optional[socket.socket] = None
+
+    def open(self) -> bool:
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_ROUTE))
+            sock.setblocking(False)
+        except (AttributeError, OSError) as e:
+            logger.warning("Netlink monitor unavailable (%s); falling back to periodic checks", e)
+            return False
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+        return True
+
+    def _on_readable(self) -> None:
+        try:
+            while self._sock.recv(65536):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            # ENOBUFS on bursts: we only need "something changed", so just re-check.
+            pass
+        self.changed.set()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+
+
+class WanSupervisor:
+    def __init__(self, iface: str = "wlan0", grace_s: float = 5.0, safety_check_s: float = 60.0,
+                 backoff_base_s: float = 2.0, backoff_max_s: float = 300.0, scan_max_age_s: float = 120.0,
+                 connect_wait_s: int = 20):
+        self.iface = iface
+        self.grace_s = grace_s
+        self.safety_check_s = safety_check_s
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.scan_max_age_s = scan_max_age_s
+        self.connect_wait_s = connect_wait_s
+        self.enabled = True
+        self.state = "starting"
+        self.outage_started: Optional[float] = None
+        self.last_recovery: Optional[dict] = None
+        self.last_candidates: list[dict] = []
+        self.attempts_in_outage = 0
+        self._watcher = NetlinkWatcher()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        await executors.pools["db"].run(init_schema)
+        self._loop = asyncio.get_running_loop()
+        self._watcher.open()
+        self._task = asyncio.create_task(self._run(), name="wan-supervisor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._watcher.close()
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Safe to call from pool threads (the sync endpoint runs on one)."""
+        self.enabled = enabled
+        logger.info("WAN auto-reconnect %s", "enabled" if enabled else "paused")
+        # Re-check right away instead of waiting for the next safety-net tick.
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._watcher.changed.set)
+
+    # ---- health ----
+    def link_healthy(self) -> tuple[bool, str]:
+        carrier = Path(f"/sys/class/net/{self.iface}/carrier")
+        try:
+            has_carrier = carrier.read_text().strip() == "1"
+        except OSError:
+            has_carrier = False
+        if not has_carrier:
+            return False, "no_carrier"
+        route = get_default_route()
+        if route["wan_iface"] != self.iface or not route["gateway"]:
+            return False, "no_default_route"
+        return True, "ok"
+
+    async def _wait_for_change(self, timeout: float) -> None:
+        self._watcher.changed.clear()
+        try:
+            await asyncio.wait_for(self._watcher.changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._step()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("WAN supervisor step failed")
+                await asyncio.sleep(self.backoff_base_s)
+
+    async def _step(self) -> None:
+        healthy, reason = await executors.pools["network"].run(self.link_healthy)
+        if healthy or not self.enabled:
+            self.state = "healthy" if healthy else "paused"
+            await self._wait_for_change(self.safety_check_s)
+            return
+
+        # Give NetworkManager a moment: short blips usually fix themselves.
+        self.state = "degraded"
+        await asyncio.sleep(self.grace_s)
+        healthy, reason = await executors.pools["network"].run(self.link_healthy)
+        if healthy:
+            return
+
+        WAN_OUTAGES_TOTAL.inc()
+        self.outage_started = time.monotonic()
+        self.attempts_in_outage = 0
+        logger.warning("WAN lost on %s (%s); starting failover", self.iface, reason)
+        await self._recover(reason)
+
+    async def _recover(self, reason: str) -> None:
+        self.state = "recovering"
+        delay = self.backoff_base_s
+        while self.enabled:
+            candidates = await executors.pools["network"].run(self._candidates)
+            self.last_candidates = candidates
+            for cand in candidates:
+                if not self.enabled:
+                    break
+                self.attempts_in_outage += 1
+                result = await executors.pools["network"].run(connect_and_verify, cand["ssid"], None,
+                                                              self.connect_wait_s, cand["profile"])
+                ok = bool(result.get("ok"))
+                await executors.pools["db"].run(record_attempt, cand["ssid"], ok)
+                WAN_RECONNECT_ATTEMPTS_TOTAL.inc(result="ok" if ok else "failed")
+                if ok:
+                    elapsed = time.monotonic() - self.outage_started
+                    WAN_RECOVER_SECONDS.observe(elapsed)
+                    self.last_recovery = {
+                        "ssid": cand["ssid"],
+                        "profile": cand["profile"],
+                        "reason": reason,
+                        "seconds": round(elapsed, 1),
+                        "attempts": self.attempts_in_outage,
+                        "at": int(time.time()),
+                    }
+                    logger.info("WAN recovered via %s in %.1fs", cand["ssid"], elapsed)
+                    self.outage_started = None
+                    self.state = "healthy"
+                    return
+
+            # Nothing worked this round: back off, but wake early if the link comes back.
+            self.state = "backoff"
+            await self._wait_for_change(delay)
+            delay = min(delay * 2, self.backoff_max_s)
+            healthy, _ = await executors.pools["network"].run(self.link_healthy)
+            if healthy:
+                elapsed = time.monotonic() - self.outage_started
+                WAN_RECOVER_SECONDS.observe(elapsed)
+                self.last_recovery = {"ssid": None, "profile": None, "reason": reason, "seconds": round(elapsed, 1),
+                                      "attempts": self.attempts_in_outage, "at": int(time.time())}
+                self.outage_started = None
+                self.state = "healthy"
+                return
+            self.state = "recovering"
+
+    def _candidates(self) -> list[dict]:
+        scan = network_service.LAST_SCAN
+        if time.time() - scan["ts"] > self.scan_max_age_s:
+            wifi_scan_wlan0()
+        return rank_candidates(nmcli_saved_wifi_profiles(), scan["networks"], load_stats())
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "iface": self.iface,
+            "state": self.state,
+            "outage_s": round(time.monotonic() - self.outage_started, 1) if self.outage_started else None,
+            "attempts_in_outage": self.attempts_in_outage,
+            "last_recovery": self.last_recovery,
+            "candidates": self.last_candidates,
+        }
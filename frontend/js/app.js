@@ -264,8 +264,15 @@ async function scanNetworks() {
 }
 
 async function loadClients() {
-    const data = await fetchJSON("/clients");
-    const clients = data.clients || [];
+    // /clients is paginated: follow next_cursor until the last page.
+    const clients = [];
+    let cursor = null;
+    do {
+        const q = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+        const data = await fetchJSON(`/clients?limit=500${q}`);
+        clients.push(...(data.clients || []));
+        cursor = data.next_cursor;
+    } while (cursor);
 
     // overview table (compact)
     const compact = clients.slice(0, 12).map(c => `
@@ -425,7 +432,7 @@ el("btnClearLog").addEventListener("click", () => {
 
 el("btnCopyServer").addEventListener("click", async () => {
     try {
-        const data = await fetchJSON("/api/summary");
+        const data = await fetchJSON("/api/summary?fields=active_server");
         const s = data.active_server;
         if (!s) return alert("No hay servidor activo.");
         const txt = `${s.name} ${s.host}:${s.port} (${s.edition})`;
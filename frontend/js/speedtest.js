@@ -0,0 +1,233 @@
+// frontend/js/speedtest.js
+// Module: ODOCO speed test client (browser side of /speedtest)
+const el = (id) => document.getElementById(id);
+
+const STREAMS = 4;            // descargas paralelas: una sola conexión no llena el enlace
+const PING_INTERVAL_MS = 200;
+const IDLE_PINGS = 10;
+const UPLOAD_CHUNK = 1 << 20;
+
+let session = null;
+let abort = null;
+
+function fmt(v, digits = 1) {
+    return v === null || v === undefined ? "—" : Number(v).toFixed(digits);
+}
+
+function pct(v) {
+    return v === null || v === undefined ? "—" : (v * 100).toFixed(1) + " %";
+}
+
+function percentile(values, p) {
+    if (!values.length) return null;
+    const s = [...values].sort((a, b) => a - b);
+    return s[Math.min(s.length - 1, Math.round(p * (s.length - 1)))];
+}
+
+function setState(text) {
+    el("stState").textContent = text;
+}
+
+function show(r) {
+    el("stDown").textContent = fmt(r.down_mbit);
+    el("stUp").textContent = fmt(r.up_mbit);
+    el("stRttIdle").textContent = fmt(r.rtt_idle_ms);
+    el("stRttLoaded").textContent = fmt(r.rtt_loaded_ms);
+    el("stRttP95").textContent = fmt(r.rtt_loaded_p95_ms);
+    el("stLoss").textContent = pct(r.loss);
+}
+
+async function api(url, opts) {
+    const res = await fetch(url, { cache: "no-store", ...(opts || {}) });
+    const text = await res.text();
+    if (!res.ok) throw new Error(`${res.status}: ${text.slice(0, 160)}`);
+    return text ? JSON.parse(text) : {};
+}
+
+function setRunning(running) {
+    el("btnLan").disabled = running;
+    el("btnWan").disabled = running;
+    el("btnCancel").disabled = !running;
+}
+
+// Un ping = GET pequeño sin caché; los que superan 1s cuentan como perdidos.
+async function ping(signal) {
+    const t0 = performance.now();
+    const ctl = new AbortController();
+    const timer = setTimeout(() => ctl.abort(), 1000);
+    const stop = () => ctl.abort();
+    signal.addEventListener("abort", stop);
+    try {
+        await fetch("/speedtest/ping", { cache: "no-store", signal: ctl.signal });
+        return performance.now() - t0;
+    } catch {
+        return null;
+    } finally {
+        clearTimeout(timer);
+        signal.removeEventListener("abort", stop);
+    }
+}
+
+async function pingWhile(running, signal) {
+    const rtts = [];
+    let lost = 0;
+    while (running() && !signal.aborted) {
+        const started = performance.now();
+        const rtt = await ping(signal);
+        if (signal.aborted) break;
+        if (rtt === null) lost++;
+        else rtts.push(rtt);
+        const wait = PING_INTERVAL_MS - (performance.now() - started);
+        if (wait > 0) await new Promise(r => setTimeout(r, wait));
+    }
+    return { rtts, lost };
+}
+
+async function downloadPhase(seconds, signal) {
+    let bytes = 0;
+    const t0 = performance.now();
+    const deadline = t0 + seconds * 1000;
+    const stream = async () => {
+        const res = await fetch(`/speedtest/download?session=${session.id}`, { cache: "no-store", signal });
+        const reader = res.body.getReader();
+        while (performance.now() < deadline) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            bytes += value.length;
+            el("stDown").textContent = fmt(bytes * 8 / (performance.now() - t0) / 1000);
+        }
+        await reader.cancel();
+    };
+    await Promise.allSettled(Array.from({ length: STREAMS }, stream));
+    return bytes * 8 / ((performance.now() - t0) * 1000);
+}
+
+async function uploadPhase(seconds, signal) {
+    const blob = new Blob([crypto.getRandomValues(new Uint8Array(65536))]);
+    const chunk = new Blob(Array(UPLOAD_CHUNK / 65536).fill(blob));
+    let bytes = 0;
+    const t0 = performance.now();
+    const deadline = t0 + seconds * 1000;
+    while (performance.now() < deadline && !signal.aborted) {
+        const r = await api(`/speedtest/upload?session=${session.id}`, { method: "POST", body: chunk, signal });
+        bytes += r.bytes;
+        el("stUp").textContent = fmt(bytes * 8 / (performance.now() - t0) / 1000);
+        if (r.bytes < UPLOAD_CHUNK) break;  // la sesión terminó en el router
+    }
+    return bytes * 8 / ((performance.now() - t0) * 1000);
+}
+
+async function runLan() {
+    show({});
+    abort = new AbortController();
+    const signal = abort.signal;
+    session = await api("/speedtest/sessions", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ kind: "lan" }),
+    });
+    setRunning(true);
+    const phase = Math.max((session.duration_s - IDLE_PINGS * PING_INTERVAL_MS / 1000) / 2 - 0.5, 1);
+    try {
+        setState("Latencia en reposo…");
+        let n = 0;
+        const idle = await pingWhile(() => n++ < IDLE_PINGS, signal);
+        el("stRttIdle").textContent = fmt(percentile(idle.rtts, 0.5));
+
+        setState("Bajada…");
+        let loading = true;
+        const loadedPings = pingWhile(() => loading, signal);
+        const down = await downloadPhase(phase, signal);
+        setState("Subida…");
+        const up = await uploadPhase(phase, signal);
+        loading = false;
+        const loaded = await loadedPings;
+
+        const probes = loaded.rtts.length + loaded.lost;
+        const result = {
+            down_mbit: down,
+            up_mbit: up,
+            rtt_idle_ms: percentile(idle.rtts, 0.5),
+            rtt_loaded_ms: percentile(loaded.rtts, 0.5),
+            rtt_loaded_p95_ms: percentile(loaded.rtts, 0.95),
+            loss: probes ? loaded.lost / probes : null,
+            detail: { streams: STREAMS, client: "browser", user_agent: navigator.userAgent },
+        };
+        show(result);
+        const saved = await api(`/speedtest/sessions/${session.id}/result`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(result),
+        });
+        setState(saved.status === "cancelled" ? "Cancelado" : "Listo");
+    } catch (e) {
+        setState(signal.aborted ? "Cancelado" : `Error: ${e.message}`);
+    } finally {
+        setRunning(false);
+        session = null;
+        loadHistory();
+    }
+}
+
+async function runWan() {
+    show({});
+    session = await api("/speedtest/sessions", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ kind: "wan" }),
+    });
+    setRunning(true);
+    setState("El router está midiendo hacia el gateway WAN…");
+    try {
+        let s = session;
+        while (s.status === "running") {
+            await new Promise(r => setTimeout(r, 1000));
+            s = await api(`/speedtest/sessions/${session.id}`);
+            // "expired" = plazo agotado; el resultado llega al cerrar la última sonda.
+            if (s.status === "expired" && !s.result) s.status = "running";
+        }
+        if (s.result) show(s.result);
+        setState(s.status === "failed" ? `Error: ${s.result?.detail?.error || "falló"}` :
+            s.status === "cancelled" ? "Cancelado" : "Listo");
+    } catch (e) {
+        setState(`Error: ${e.message}`);
+    } finally {
+        setRunning(false);
+        session = null;
+        loadHistory();
+    }
+}
+
+async function cancel() {
+    if (!session) return;
+    try {
+        await api(`/speedtest/sessions/${session.id}`, { method: "DELETE" });
+    } catch { /* ya terminó */ }
+    if (abort) abort.abort();
+}
+
+async function loadHistory() {
+    const body = el("historyBody");
+    try {
+        const { results } = await api("/speedtest/results?limit=20");
+        body.innerHTML = results.length ? results.map(r => `
+            <tr>
+                <td>${new Date(r.started * 1000).toLocaleString()}</td>
+                <td>${r.kind}</td>
+                <td>${r.status}</td>
+                <td>${fmt(r.down_mbit)}</td>
+                <td>${fmt(r.up_mbit)}</td>
+                <td>${fmt(r.rtt_idle_ms)}</td>
+                <td>${fmt(r.rtt_loaded_ms)}</td>
+                <td>${pct(r.loss)}</td>
+            </tr>`).join("") : `<tr><td colspan="8" class="muted">Sin resultados</td></tr>`;
+    } catch (e) {
+        body.innerHTML = `<tr><td colspan="8" class="muted">Error: ${e.message.replace(/</g, "&lt;")}</td></tr>`;
+    }
+}
+
+el("btnLan").addEventListener("click", () => runLan().catch(e => setState(`Error: ${e.message}`)));
+el("btnWan").addEventListener("click", () => runWan().catch(e => setState(`Error: ${e.message}`)));
+el("btnCancel").addEventListener("click", cancel);
+el("btnHistory").addEventListener("click", loadHistory);
+loadHistory();
@@ -44,6 +44,7 @@ interface=$AP_IF
 driver=nl80211
 ssid=$SSID
 hw_mode=g
+# Canal inicial; el subsistema channels puede moverlo en caliente (CSA) según la congestión.
 channel=6
 wmm_enabled=1
 ieee80211n=1
@@ -0,0 +1,62 @@
+# tests/test_clients.py
+# LeaseIndex: keyset cursors page through every lease exactly once, in both directions
+
+import pytest
+
+from backend.services import clients_service
+from backend.services.clients_service import LeaseIndex, valid_cursor_key
+
+LEASES = [
+    {"ip": f"192.168.50.{i}", "mac": f"aa:bb:cc:00:00:{i:02x}", "hostname": name,
+     "expiry_epoch": 1_700_000_000 + (i % 4) * 60, "clientid": ""}
+    for i, name in enumerate(["pos-1", "pos-2", "", "caja", "pos-3", "tablet", "", "pos-4", "bodega", "pos-5"], 10)
+]
+
+
+@pytest.fixture
+def index(monkeypatch) -> LeaseIndex:
+    monkeypatch.setattr(clients_service, "LEASES_PATHS", [])
+    monkeypatch.setattr(clients_service, "read_dnsmasq_leases", lambda: [dict(r) for r in LEASES])
+    return LeaseIndex()
+
+
+def walk(index: LeaseIndex, limit: int, **kw) -> list[dict]:
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = index.page(limit=limit, after=cursor, **kw)
+        rows += page
+        pages += 1
+        assert len(page) <= limit and pages <= len(LEASES) + 1
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize("sort", clients_service.SORT_FIELDS)
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_walk_matches_one_page(index, sort, order):
+    everything, cursor = index.page(sort=sort, order=order, limit=len(LEASES))
+    assert cursor is None and len(everything) == len(LEASES)
+    for limit in (1, 3, 4):
+        assert walk(index, limit, sort=sort, order=order) == everything
+
+
+def test_filtered_walk(index):
+    rows = walk(index, 2, sort="hostname", hostname="POS")
+    assert [r["hostname"] for r in rows] == ["pos-1", "pos-2", "pos-3", "pos-4", "pos-5"]
+    rows = walk(index, 2, sort="ip", mac="AA-BB-CC-00-00-1")
+    assert [r["ip"] for r in rows] == [f"192.168.50.{i}" for i in range(16, 20)]
+
+
+def test_cursor_of_last_row_is_none(index):
+    page, cursor = index.page(sort="ip", limit=len(LEASES) - 1)
+    assert cursor is not None
+    page, cursor = index.page(sort="ip", limit=5, after=cursor)
+    assert [r["ip"] for r in page] == ["192.168.50.19"] and cursor is None
+
+
+def test_cursor_key_shape():
+    assert valid_cursor_key("ip", [3232248330, "aa:bb:cc:00:00:0a", "192.168.50.10"])
+    assert valid_cursor_key("hostname", ["caja", "aa:bb:cc:00:00:0d", "192.168.50.13"])
+    assert not valid_cursor_key("ip", ["caja", "aa:bb:cc:00:00:0d", "192.168.50.13"])
+    assert not valid_cursor_key("expiry", [True, "m", "i"])
+    assert not valid_cursor_key("mac", ["aa", "m"])
@@ -0,0 +1,72 @@
+# tests/test_conntrack.py
+# Top talkers and per-client connections from canned conntrack lines
+
+import pytest
+
+from backend.services import conntrack_service
+from backend.services.conntrack_service import iter_conntrack_lines
+
+LINES = [
+    "ipv4     2 tcp      6 431999 ESTABLISHED src=192.168.50.10 dst=1.1.1.1 sport=40000 dport=443 "
+    "packets=10 bytes=1000 src=1.1.1.1 dst=192.168.50.10 sport=443 dport=40000 packets=20 bytes=9000 [ASSURED] mark=0 use=1\n",
+    "ipv4     2 tcp      6 431999 ESTABLISHED src=192.168.50.10 dst=1.1.1.1 sport=40001 dport=443 "
+    "packets=1 bytes=100 src=1.1.1.1 dst=192.168.50.10 sport=443 dport=40001 packets=1 bytes=100 [ASSURED] mark=0 use=1\n",
+    "ipv4     2 udp      17 29 src=192.168.50.20 dst=8.8.8.8 sport=5353 dport=53 "
+    "packets=1 bytes=60 src=8.8.8.8 dst=192.168.50.20 sport=53 dport=5353 packets=1 bytes=120 mark=0 use=1\n",
+    "ipv4     2 tcp      6 100 ESTABLISHED src=8.8.4.4 dst=192.168.50.10 sport=443 dport=40002 "
+    "packets=1 bytes=50 src=192.168.50.10 dst=8.8.4.4 sport=40002 dport=443 packets=1 bytes=50 mark=0 use=1\n",
+]
+
+
+@pytest.fixture(autouse=True)
+def canned(monkeypatch):
+    monkeypatch.setattr(conntrack_service, "iter_conntrack_lines", lambda: iter(LINES))
+    monkeypatch.setattr(conntrack_service, "_lease_index", lambda: {
+        "192.168.50.10": {"ip": "192.168.50.10", "hostname": "pos-1", "mac": "aa:bb:cc:00:00:01"},
+        "192.168.50.20": {"ip": "192.168.50.20", "hostname": "caja", "mac": "aa:bb:cc:00:00:02"},
+    })
+
+
+def test_top_talkers():
+    res = conntrack_service.top_talkers(limit=10, flows_limit=1)
+    assert res["accounting"] is True
+    assert [(c["ip"], c["flows"], c["bytes"]) for c in res["clients"]] == [
+        ("192.168.50.10", 2, 10200), ("192.168.50.20", 1, 180)]
+    assert [(f["src"], f["port"], f["bytes"]) for f in res["top_flows"]] == [("192.168.50.10", 443, 10000)]
+
+
+def test_top_talkers_without_flows():
+    res = conntrack_service.top_talkers(limit=1, flows_limit=0)
+    assert [c["ip"] for c in res["clients"]] == ["192.168.50.10"]
+    assert res["top_flows"] == []
+
+
+def test_client_connections_groups_by_destination():
+    res = conntrack_service.client_connections("192.168.50.10")
+    assert res["hostname"] == "pos-1" and res["total_flows"] == 2 and res["destinations"] == 1
+    assert res["connections"][0] == {"protocol": "tcp", "destination": "1.1.1.1", "port": 443, "flows": 2,
+                                     "bytes": 10200, "packets": 32, "states": ["ESTABLISHED"]}
+
+
+@pytest.mark.parametrize("error", [FileNotFoundError, PermissionError])
+def test_unreadable_proc_falls_back_to_the_helper(monkeypatch, error):
+    def no_proc(*args, **kwargs):
+        raise error(conntrack_service.CONNTRACK_PROC)
+
+    calls = []
+
+    def helper(op, **args):
+        calls.append(op)
+        return {"rc": 0, "stdout": "".join(LINES[:2]).strip(), "stderr": ""}
+
+    monkeypatch.setattr(conntrack_service, "open", no_proc, raising=False)
+    monkeypatch.setattr(conntrack_service, "run_privileged", helper)
+    assert len(list(iter_conntrack_lines())) == 2
+    assert calls == ["conntrack_list"]
+
+
+def test_helper_failure_yields_nothing(monkeypatch):
+    monkeypatch.setattr(conntrack_service, "CONNTRACK_PROC", "/nonexistent/nf_conntrack")
+    monkeypatch.setattr(conntrack_service, "run_privileged",
+                        lambda op, **args: {"rc": 1, "stdout": "", "stderr": "conntrack: not found"})
+    assert list(iter_conntrack_lines()) == []
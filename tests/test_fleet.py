@@ -0,0 +1,120 @@
+# tests/test_fleet.py
+# Fleet aggregator against stand-in ODOCO nodes (FastAPI apps over httpx.ASGITransport)
+
+import asyncio
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Request, Response
+
+# Optional dependency, also required by fleet_service itself.
+httpx = pytest.importorskip("httpx")
+
+from backend.services import fleet_service  # noqa: E402
+from backend.services.fleet_service import BREAKER_THRESHOLD, FleetAggregator  # noqa: E402
+
+
+def stand_in_node(clients: list[dict], servers: list[dict], page_size: int = 500,
+                  fail: bool = False, broken_page: bool = False) -> FastAPI:
+    """Serves the three paths the aggregator polls, paginated like the real API."""
+    app = FastAPI()
+    app.state.hits = {"summary": 0, "clients": 0, "servers": 0, "not_modified": 0}
+
+    @app.get("/api/summary")
+    def summary(request: Request):
+        app.state.hits["summary"] += 1
+        if fail:
+            return Response(status_code=500)
+        if request.headers.get("if-none-match") == '"s1"':
+            app.state.hits["not_modified"] += 1
+            return Response(status_code=304)
+        return Response('{"ssid": "odoco", "clients": %d}' % len(clients), media_type="application/json",
+                        headers={"ETag": '"s1"'})
+
+    @app.get("/clients")
+    def list_clients(limit: int = 100, cursor: Optional[str] = None):
+        app.state.hits["clients"] += 1
+        start = int(cursor or 0)
+        if broken_page and start:
+            return {}
+        end = start + page_size
+        return {"clients": clients[start:end], "next_cursor": str(end) if end < len(clients) else None}
+
+    @app.get("/servers")
+    def list_servers(response: Response, limit: int = 100, cursor: Optional[str] = None):
+        app.state.hits["servers"] += 1
+        start = int(cursor or 0)
+        end = start + page_size
+        if end < len(servers):
+            response.headers["X-Next-Cursor"] = str(end)
+        return servers[start:end]
+
+    return app
+
+
+def aggregator(apps: dict[str, FastAPI]) -> FleetAggregator:
+    client = httpx.AsyncClient(mounts={f"http://{name}": httpx.ASGITransport(app=app) for name, app in apps.items()})
+    return FleetAggregator([(name, f"http://{name}") for name in apps], node_timeout_s=2.0, client=client)
+
+
+def poll(fleet: FleetAggregator, times: int = 1) -> dict:
+    async def run():
+        for _ in range(times):
+            await fleet.poll_all()
+        await fleet.client.aclose()
+        return fleet.view()
+    return asyncio.run(run())
+
+
+def test_merges_nodes():
+    server = {"name": "odoo", "host": "10.0.0.5", "port": 8069, "edition": "ce"}
+    fleet = aggregator({
+        "sala": stand_in_node([{"ip": "192.168.50.10"}], [{**server, "is_active": True}]),
+        "patio": stand_in_node([{"ip": "192.168.50.20"}, {"ip": "192.168.50.21"}], [{**server, "is_active": False}]),
+    })
+    view = poll(fleet)
+    assert view["totals"] == {"nodes": 2, "online": 2, "clients": 3}
+    assert sorted(c["node"] for c in view["clients"]) == ["patio", "patio", "sala"]
+    assert len(view["servers"]) == 1
+    assert view["servers"][0]["nodes"] == ["sala", "patio"]
+    assert view["servers"][0]["active_on"] == ["sala"]
+
+
+def test_follows_cursors(monkeypatch):
+    monkeypatch.setitem(fleet_service.POLL_PATHS, "clients", "/clients?limit=2")
+    monkeypatch.setitem(fleet_service.POLL_PATHS, "servers", "/servers?limit=2")
+    clients = [{"ip": f"192.168.50.{i}"} for i in range(5)]
+    servers = [{"name": f"s{i}", "host": f"10.0.0.{i}", "port": 8069, "edition": "ce"} for i in range(3)]
+    node = stand_in_node(clients, servers, page_size=2)
+    view = poll(aggregator({"sala": node}))
+    assert [c["ip"] for c in view["clients"]] == [c["ip"] for c in clients]
+    assert len(view["servers"]) == 3
+    assert node.state.hits["clients"] == 3 and node.state.hits["servers"] == 2
+
+
+def test_not_modified_reuses_last_payload():
+    node = stand_in_node([{"ip": "192.168.50.10"}], [])
+    fleet = aggregator({"sala": node})
+    view = poll(fleet, times=2)
+    assert node.state.hits["not_modified"] == 1
+    assert fleet.nodes[0].not_modified == 1
+    assert view["nodes"][0]["ssid"] == "odoco"
+
+
+def test_failing_node_opens_circuit_without_affecting_others():
+    fleet = aggregator({
+        "sala": stand_in_node([{"ip": "192.168.50.10"}], []),
+        "roto": stand_in_node([], [], fail=True),
+    })
+    view = poll(fleet, times=BREAKER_THRESHOLD)
+    status = {n["name"]: n["status"] for n in view["nodes"]}
+    assert status == {"sala": "ok", "roto": "circuit_open"}
+    assert "500" in view["nodes"][1]["error"]
+
+
+def test_unexpected_payload_is_recorded_as_failure(monkeypatch):
+    monkeypatch.setitem(fleet_service.POLL_PATHS, "clients", "/clients?limit=1")
+    fleet = aggregator({"sala": stand_in_node([{"ip": "a"}, {"ip": "b"}], [], page_size=1, broken_page=True)})
+    view = poll(fleet)
+    assert view["nodes"][0]["status"] == "down"
+    assert view["nodes"][0]["error"].startswith("KeyError")
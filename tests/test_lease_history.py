@@ -0,0 +1,61 @@
+# tests/test_lease_history.py
+# LeaseHistory: snapshot diffing and batched flushes that survive a failed write
+
+import pytest
+
+from backend.services import lease_history_service
+from backend.services.lease_history_service import EVENT_JOIN, EVENT_LEAVE, EVENT_RENEW, LeaseHistory
+
+NOW = 1_700_000_000
+
+
+def lease(mac: str, ip: str, expiry: int = NOW + 3600) -> dict:
+    return {"mac": mac, "ip": ip, "hostname": "", "expiry_epoch": expiry}
+
+
+class RecordingSession:
+    def __init__(self, store: list, fail: bool = False):
+        self.store = store
+        self.fail = fail
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, params=None):
+        if self.fail:
+            raise RuntimeError("database is locked")
+        self.store.append((str(stmt).split()[0], params))
+
+    def commit(self):
+        pass
+
+
+def test_observe_emits_join_renew_leave():
+    history = LeaseHistory()
+    history.observe([lease("aa:bb:cc:00:00:01", "192.168.50.10"), lease("aa:bb:cc:00:00:02", "192.168.50.11")], NOW)
+    events = history.observe([lease("aa:bb:cc:00:00:01", "192.168.50.12"),
+                              lease("aa:bb:cc:00:00:03", "192.168.50.13", expiry=NOW)], NOW + 60)
+    # The third lease is already expired, so it never joins.
+    assert {e["kind"] for e in events} == {EVENT_RENEW, EVENT_LEAVE} and len(events) == 2
+    assert [e["kind"] for e in history._pending[:2]] == [EVENT_JOIN, EVENT_JOIN]
+
+
+def test_failed_flush_keeps_events(monkeypatch):
+    history = LeaseHistory()
+    history.observe([lease("aa:bb:cc:00:00:01", "192.168.50.10")], NOW)
+
+    monkeypatch.setattr(lease_history_service, "SessionLocal", lambda: RecordingSession([], fail=True))
+    with pytest.raises(RuntimeError):
+        history.flush()
+    history.observe([], NOW + 60)
+    assert [e["kind"] for e in history._pending] == [EVENT_JOIN, EVENT_LEAVE]
+    assert [c["connected"] for c in history._pending_counts] == [1, 0]
+
+    written = []
+    monkeypatch.setattr(lease_history_service, "SessionLocal", lambda: RecordingSession(written))
+    history.flush()
+    assert [e["kind"] for e in written[0][1]] == [EVENT_JOIN, EVENT_LEAVE]
+    assert history._pending == [] and history._pending_counts == []
@@ -0,0 +1,115 @@
+# tests/test_privhelper.py
+# Allow-listed helper operations: argv builders and argument validation
+
+import pytest
+
+from backend.core import privhelper
+from backend.core.privhelper import OpError, build
+
+
+@pytest.fixture(autouse=True)
+def tc_devices(monkeypatch):
+    monkeypatch.setattr(privhelper, "TC_DEVICES", {"wlan1", "eth0"})
+
+
+def test_unknown_op_and_bad_args():
+    with pytest.raises(OpError):
+        build("shell", {"cmd": "id"})
+    with pytest.raises(OpError):
+        build("ping", ["host"])
+
+
+@pytest.mark.parametrize("host", ["192.168.50.1", "fe80::1", "odoo.local", "example.com"])
+def test_ping_hosts(host):
+    cmd = build("ping", {"host": host, "count": 2})
+    assert cmd.argv == ["ping", "-c", "2", "-W", "2", host]
+
+
+@pytest.mark.parametrize("args", [
+    {"host": "-f"},
+    {"host": "a b"},
+    {"host": "x\n"},
+    {"host": ""},
+    {"host": "1.1.1.1", "count": 50},
+    {"host": "1.1.1.1", "count": True},
+])
+def test_ping_rejects(args):
+    with pytest.raises(OpError):
+        build("ping", args)
+
+
+def test_iface_and_strings():
+    assert build("connection_up", {"name": "Casa -- 5G", "iface": "wlan0"}).argv == [
+        "nmcli", "con", "up", "id", "Casa -- 5G", "ifname", "wlan0"]
+    with pytest.raises(OpError):
+        build("wifi_scan", {"iface": "wlan0; reboot"})
+    with pytest.raises(OpError):
+        build("wifi_connect", {"ssid": "x" * 65})
+    with pytest.raises(OpError):
+        build("service_reload", {"service": "sshd"})
+
+
+def test_conntrack_list_takes_no_arguments():
+    cmd = build("conntrack_list", {"table": "expect"})
+    assert cmd.argv == ["conntrack", "-L", "-o", "extended"] and cmd.stdin is None
+
+
+def test_nft_apply_only_odoco_tables():
+    ruleset = """
+    table inet odoco_nat {
+        chain post { type nat hook postrouting priority 100; masquerade; }
+    }
+    flush table inet odoco_nat
+    add rule inet odoco_nat post oifname "eth0" masquerade
+    """
+    cmd = build("nft_apply", {"ruleset": ruleset})
+    assert cmd.argv == ["nft", "-f", "-"] and cmd.stdin == ruleset
+
+
+@pytest.mark.parametrize("ruleset", [
+    "flush ruleset",
+    "table inet filter { }",
+    "table inet odoco_nat { }; delete table inet filter",
+    "add rule inet odoco_nat post masquerade # ok\ntable ip nat {",
+    "table inet odoco_nat { } }",
+    "",
+])
+def test_nft_apply_rejects(ruleset):
+    with pytest.raises(OpError):
+        build("nft_apply", {"ruleset": ruleset})
+
+
+def test_tc_batch_accepts_shaping_statements():
+    batch = "\n".join([
+        "qdisc replace dev wlan1 root handle 1: htb default ffff",
+        "class add dev wlan1 parent 1:1 classid 1:10 htb rate 2000kbit ceil 2000kbit",
+        "qdisc add dev wlan1 parent 1:ffff cake besteffort dual-dsthost",
+        "filter add dev wlan1 parent 1: protocol ip prio 1 u32 match ip dst 192.168.50.10/32 flowid 1:10",
+        "filter add dev wlan1 parent ffff: protocol ip prio 1 u32 match ip src 192.168.50.10/32 "
+        "police rate 512kbit burst 16384 drop flowid :1",
+        "qdisc del dev eth0 root",
+        "",
+    ])
+    assert build("tc_batch", {"batch": batch, "force": True}).argv == ["tc", "-force", "-batch", "-"]
+
+
+@pytest.mark.parametrize("line", [
+    "qdisc add dev lo root pfifo",
+    "qdisc add root pfifo",
+    "qdisc add dev wlan1 root netem delay 100ms",
+    "filter add dev wlan1 parent 1: bpf obj x.o",
+    "filter add dev wlan1 parent 1: protocol ip u32 match ip dst 1.2.3.4/32 action mirred egress redirect dev eth0",
+    "filter add dev wlan1 parent 1: protocol ip u32 match ip dst 1.2.3.4/32 flowid 1:10 exec /bin/sh",
+    "qdisc show dev wlan1",
+    "action add action police rate 1mbit",
+    "qdisc add dev",
+])
+def test_tc_batch_rejects(line):
+    with pytest.raises(OpError):
+        build("tc_batch", {"batch": line})
+
+
+def test_tc_batch_needs_configured_devices(monkeypatch):
+    monkeypatch.setattr(privhelper, "TC_DEVICES", set())
+    with pytest.raises(OpError, match="none configured"):
+        build("tc_batch", {"batch": "qdisc del dev wlan1 root"})
@@ -0,0 +1,35 @@
+# tests/test_proxy.py
+# ForwardProxy: when stale copies may be served without WAN
+
+import asyncio
+
+import pytest
+
+from backend.services import proxy_service
+from backend.services.proxy_cache import DiskCache
+from backend.services.proxy_service import ForwardProxy
+
+
+def stale_allowed(tmp_path, monkeypatch, title, modes=("Offline LAN",), stale_if_error=False) -> bool:
+    monkeypatch.setattr(proxy_service, "_active_mode_title", lambda: title)
+    proxy = ForwardProxy(DiskCache(str(tmp_path), 1 << 20, 1 << 20), "127.0.0.1", 0, ["127.0.0.0/8"],
+                         list(modes), stale_if_error)
+    return asyncio.run(proxy._stale_allowed())
+
+
+@pytest.mark.parametrize("title", ["Offline LAN (Local Services)", "Offline LAN", " offline lan "])
+def test_stale_in_offline_modes(tmp_path, monkeypatch, title):
+    assert stale_allowed(tmp_path, monkeypatch, title)
+
+
+@pytest.mark.parametrize("title", ["Online", "Offline LANs", "Hybrid", None])
+def test_no_stale_in_other_modes(tmp_path, monkeypatch, title):
+    assert not stale_allowed(tmp_path, monkeypatch, title)
+
+
+def test_empty_mode_list_never_matches(tmp_path, monkeypatch):
+    assert not stale_allowed(tmp_path, monkeypatch, None, modes=["", " "])
+
+
+def test_stale_if_error_ignores_the_mode(tmp_path, monkeypatch):
+    assert stale_allowed(tmp_path, monkeypatch, "Online", stale_if_error=True)
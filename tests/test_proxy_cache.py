@@ -0,0 +1,39 @@
+# tests/test_proxy_cache.py
+# freshness_lifetime: what the proxy stores and for how long (RFC 9111)
+
+import pytest
+
+from backend.services.proxy_cache import HEURISTIC_MAX_S, freshness_lifetime
+
+NOW = 1_700_000_000.0
+DATE = "Tue, 14 Nov 2023 22:13:20 GMT"  # == NOW
+
+
+@pytest.mark.parametrize("status, headers, expected", [
+    (200, {"cache-control": "max-age=300"}, 300.0),
+    (200, {"cache-control": "public, s-maxage=60, max-age=300"}, 60.0),
+    (200, {"cache-control": "max-age=-5"}, 0.0),
+    (200, {"cache-control": "no-cache, max-age=300"}, 0.0),
+    (200, {"date": DATE, "expires": "Tue, 14 Nov 2023 23:13:20 GMT"}, 3600.0),
+    (200, {"date": DATE, "expires": "0"}, 0.0),
+    (200, {"date": DATE, "last-modified": "Tue, 14 Nov 2023 12:13:20 GMT"}, 3600.0),
+    (200, {"date": DATE, "last-modified": "Sun, 01 Jan 2023 00:00:00 GMT"}, float(HEURISTIC_MAX_S)),
+    (200, {"etag": '"v1"'}, 0.0),
+    (404, {"cache-control": "max-age=30"}, 30.0),
+    (200, {"cache-control": "max-age=60", "vary": "Accept-Encoding"}, 60.0),
+])
+def test_stored_for(status, headers, expected):
+    assert freshness_lifetime(status, headers, NOW) == expected
+
+
+@pytest.mark.parametrize("status, headers", [
+    (200, {}),
+    (206, {"cache-control": "max-age=300"}),
+    (500, {"cache-control": "max-age=300"}),
+    (200, {"cache-control": "max-age=300", "set-cookie": "sid=1"}),
+    (200, {"cache-control": "private, max-age=300"}),
+    (200, {"cache-control": "no-store"}),
+    (200, {"cache-control": "max-age=300", "vary": "Accept-Encoding, Cookie"}),
+])
+def test_not_stored(status, headers):
+    assert freshness_lifetime(status, headers, NOW) is None
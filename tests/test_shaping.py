@@ -0,0 +1,65 @@
+# tests/test_shaping.py
+# build_plan: the tc batch for a profile, the per-client limits and the current leases
+
+from backend.core import privhelper
+from backend.services.shaping_service import DEFAULT_PROFILE, build_plan, off_batch
+
+LEASES = [
+    {"ip": "192.168.50.20", "mac": "AA:BB:CC:00:00:02", "hostname": "caja"},
+    {"ip": "192.168.50.10", "mac": "aa:bb:cc:00:00:01", "hostname": "pos-1"},
+    {"ip": "fe80::1", "mac": "aa:bb:cc:00:00:03", "hostname": "v6-only"},
+    {"ip": "192.168.50.11", "mac": "aa:bb:cc:00:00:01", "hostname": "pos-1"},
+]
+
+
+def profile(**kw) -> dict:
+    return {**DEFAULT_PROFILE, "wan_down_kbit": 50_000, "wan_up_kbit": 10_000, **kw}
+
+
+def test_unlimited_clients_share_the_default_class():
+    batch, clients = build_plan(profile(), {}, LEASES, "wlan1", "eth0")
+    assert clients == []
+    assert "class add dev wlan1 parent 1: classid 1:1 htb rate 50000kbit ceil 50000kbit" in batch
+    assert "qdisc add dev wlan1 parent 1:ffff cake besteffort dual-dsthost" in batch
+    assert batch.endswith("qdisc replace dev eth0 root cake bandwidth 10000kbit besteffort dual-srchost nat\n")
+    assert "filter add" not in batch
+
+
+def test_client_limits_and_profile_defaults():
+    limits = {"aa:bb:cc:00:00:02": {"down_kbit": 4000, "up_kbit": 0}}
+    batch, clients = build_plan(profile(client_up_kbit=1000), limits, LEASES, "wlan1", "eth0")
+    # Sorted by MAC, one class per client, duplicate MACs and non-IPv4 leases skipped.
+    assert [(c["mac"], c["classid"], c["down_kbit"], c["up_kbit"]) for c in clients] == [
+        ("aa:bb:cc:00:00:01", None, 0, 1000),
+        ("aa:bb:cc:00:00:02", "1:11", 4000, 1000),
+    ]
+    assert "match ip src 192.168.50.10/32 police rate 1000kbit burst 16384 drop flowid :1" in batch
+    assert "class add dev wlan1 parent 1:1 classid 1:11 htb rate 4000kbit ceil 4000kbit" in batch
+    assert "match ip dst 192.168.50.20/32 flowid 1:11" in batch
+    assert "192.168.50.11" not in batch
+
+
+def test_fq_codel_without_wan_rate():
+    batch, _ = build_plan(profile(qdisc="fq_codel", wan_down_kbit=0, wan_up_kbit=0), {}, LEASES, "wlan1", "eth0")
+    assert "htb rate 1000mbit ceil 1000mbit" in batch
+    assert "qdisc add dev wlan1 parent 1:ffff fq_codel" in batch
+    assert batch.endswith("qdisc replace dev eth0 root fq_codel\n")
+
+
+def test_plan_is_deterministic():
+    limits = {"aa:bb:cc:00:00:01": {"down_kbit": 2000, "up_kbit": 500}}
+    first = build_plan(profile(), limits, LEASES, "wlan1", "eth0")
+    assert build_plan(profile(), limits, [dict(l) for l in LEASES], "wlan1", "eth0") == first
+    # Lease file order does not matter once MACs are unique.
+    unique = LEASES[:3]
+    assert build_plan(profile(), limits, unique[::-1], "wlan1", "eth0") == build_plan(
+        profile(), limits, unique, "wlan1", "eth0")
+
+
+def test_plans_pass_the_helper_allowlist(monkeypatch):
+    monkeypatch.setattr(privhelper, "TC_DEVICES", {"wlan1", "eth0"})
+    limits = {"aa:bb:cc:00:00:01": {"down_kbit": 2000, "up_kbit": 500}}
+    for p in (profile(), profile(qdisc="fq_codel"), profile(qdisc="fq_codel", wan_up_kbit=0)):
+        batch, _ = build_plan(p, limits, LEASES, "wlan1", "eth0")
+        privhelper.build("tc_batch", {"batch": batch})
+    privhelper.build("tc_batch", {"batch": off_batch("wlan1", "eth0"), "force": True})
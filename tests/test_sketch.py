@@ -0,0 +1,63 @@
+# tests/test_sketch.py
+# RollingTopK: window expiry and persistence of the raw counters
+
+from backend.core.sketch import RollingTopK
+
+
+def rolling() -> RollingTopK:
+    # 60 s window in 6 buckets of 10 s.
+    return RollingTopK(window_s=60, buckets=6, width=256, depth=4, capacity=10)
+
+
+def test_counts_within_window():
+    top = rolling()
+    for ts in (0, 5, 15, 25):
+        top.add("example.com", ts)
+    top.add("odoo.local", 30, count=2)
+    assert top.estimate("example.com") == 4
+    assert top.top(2) == [("example.com", 4), ("odoo.local", 2)]
+    assert top.events == 6
+
+
+def test_buckets_expire_as_the_window_slides():
+    top = rolling()
+    top.add("old.example", 0, count=5)
+    top.add("new.example", 50, count=2)
+    top.expire(59)
+    assert top.estimate("old.example") == 5
+    # Bucket 0 (ts 0-9) leaves the window once bucket 6 (ts 60-69) is the head.
+    top.expire(60)
+    assert top.estimate("old.example") == 0
+    assert top.top(5) == [("new.example", 2)]
+    assert top.events == 2
+    top.expire(200)
+    assert top.top(5) == [] and top.events == 0
+
+
+def test_add_outside_window_is_rejected():
+    top = rolling()
+    top.add("a.example", 100)
+    assert top.add("b.example", 30) is False
+    assert top.estimate("b.example") == 0
+
+
+def test_dump_restore_resumes_the_same_window():
+    top = rolling()
+    top.add("a.example", 0, count=3)
+    top.add("b.example", 40, count=7)
+    meta, blob = top.dump()
+
+    again = rolling()
+    assert again.restore(meta, blob)
+    assert again.top(2) == top.top(2)
+    assert again.events == 10
+    # Restored buckets keep expiring on schedule.
+    again.expire(65)
+    assert again.top(2) == [("b.example", 7)]
+
+
+def test_restore_rejects_another_shape():
+    meta, blob = rolling().dump()
+    other = RollingTopK(window_s=60, buckets=6, width=512, depth=4, capacity=10)
+    assert not other.restore(meta, blob)
+    assert not rolling().restore({**meta, "window_s": 120}, blob)